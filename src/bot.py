@@ -4,6 +4,10 @@ import os
 from discord.ext import commands
 from dotenv import load_dotenv
 from src.utils.logger import setup_logger
+from src.utils.database import DatabaseUtils
+from src.utils.embeds import EmbedUtils
+from src.utils.errors import DatabaseError
+from src.utils import cooldowns
 
 load_dotenv()
 PREFIX = os.getenv("PREFIX")
@@ -45,6 +49,19 @@ async def on_connect():
     await bot.change_presence(activity=activity)
 
 
+@bot.event
+async def on_command_error(ctx: commands.Context, error: commands.CommandError):
+    # Cogs handle their own errors in listeners, database failures can come from any of them
+    if isinstance(error, DatabaseError):
+        await ctx.send(embed=EmbedUtils.error_embed(error))
+
+
 async def login(token):
-    await load_cogs()
-    await bot.start(token)
+    await DatabaseUtils.open_pool()
+    try:
+        async with bot:
+            await load_cogs()
+            await bot.start(token)
+    finally:
+        await cooldowns.backend.close()
+        await DatabaseUtils.close_pool()
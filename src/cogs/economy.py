@@ -1,73 +1,172 @@
-import random
-import json
+import asyncio
 
-from typing import Optional
+from typing import List, Optional
 
 import discord
 
 from discord.ext import commands
-from src.utils.database import DatabaseUtils
+from src.utils.cooldowns import shared_cooldown
+from src.utils.economy import EconomyService, RankedAccount
+from src.utils.economy_config import EconomyConfigLoader
 from src.utils.logger import setup_logger
 from src.utils.embeds import EmbedUtils
-from src.utils.errors import AccountNotFound, InvalidFunds
+from src.utils.errors import AccountNotFound, InvalidEconomyConfig, InvalidFunds
+from src.utils.ledger import LedgerEntry
+from src.utils.pagination import PaginatedView
 
 logger = setup_logger()
 
+# How many accounts the leaderboard fetches and pages through
+LEADERBOARD_SIZE = 100
+# How many ledger entries the history command fetches and pages through
+HISTORY_SIZE = 100
+MEDALS = {1: "🥇", 2: "🥈", 3: "🥉"}
+
+
+class HistoryView(PaginatedView):
+    """
+    Pages through a user's most recent ledger entries.
+    """
+
+    def __init__(
+        self, member: discord.abc.User, entries: List[LedgerEntry], *, timeout=300
+    ):
+        super().__init__(per_page=10, timeout=timeout)
+        self.member = member
+        self.entries = entries
+
+    def item_count(self) -> int:
+        return len(self.entries)
+
+    @staticmethod
+    def describe(entry: LedgerEntry) -> str:
+        changes = []
+        if entry.wallet_delta:
+            changes.append(f"{entry.wallet_delta:+} 💳")
+        if entry.bank_delta:
+            changes.append(f"{entry.bank_delta:+} 🏛️")
+        timestamp = int(entry.created_at.timestamp())
+        return f"`{' '.join(changes) or '0'}` {entry.reason} <t:{timestamp}:R>"
+
+    def render(self, page: int) -> discord.Embed:
+        lines = [self.describe(entry) for entry in self.entries[self.page_bounds(page)]]
+        return EmbedUtils.create_embed(
+            title=f"{self.member.name}'s Transactions",
+            description="\n".join(lines) or "No transactions yet!",
+            footer=f"Page {page + 1}/{self.page_count}",
+        )
+
+
+class LeaderboardView(PaginatedView):
+    """
+    Pages through the accounts fetched for a leaderboard, with the author's own rank
+    in the footer.
+    """
+
+    def __init__(
+        self,
+        bot: commands.Bot,
+        title: str,
+        entries: List[RankedAccount],
+        rank: Optional[int],
+        total: int,
+        guild: Optional[discord.Guild] = None,
+        *,
+        timeout=300,
+    ):
+        super().__init__(per_page=10, timeout=timeout)
+        self.bot = bot
+        self.title = title
+        self.entries = entries
+        self.rank = rank
+        self.total = total
+        self.guild = guild
+
+    def item_count(self) -> int:
+        return len(self.entries)
+
+    def position(self, index: int) -> int:
+        """
+        Leaderboard position of the entry at `index`, shared with richer entries of the
+        same net worth like EconomyService.rank.
+        """
+        net_worth = self.entries[index].net_worth
+        while index and self.entries[index - 1].net_worth == net_worth:
+            index -= 1
+        return index + 1
+
+    def display_name(self, user_id: int) -> str:
+        user = (self.guild and self.guild.get_member(user_id)) or self.bot.get_user(
+            user_id
+        )
+        return user.display_name if user else f"<@{user_id}>"
+
+    def render(self, page: int) -> discord.Embed:
+        bounds = self.page_bounds(page)
+        lines = []
+        for index in range(bounds.start, min(bounds.stop, len(self.entries))):
+            entry = self.entries[index]
+            position = self.position(index)
+            place = MEDALS.get(position, f"**#{position}**")
+            lines.append(
+                f"{place} {self.display_name(entry.user_id)} - "
+                f"{entry.net_worth} <:blahajCoin:1339437832346796132>"
+            )
+
+        your_rank = (
+            f"Your rank: #{self.rank} of {self.total}"
+            if self.rank
+            else "You don't have an account yet"
+        )
+        return EmbedUtils.create_embed(
+            title=self.title,
+            description="\n".join(lines) or "Nobody has any money yet!",
+            footer=f"{your_rank} | Page {page + 1}/{self.page_count}",
+        )
+
 
 class Economy(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.db = DatabaseUtils()
-        self.cooldowns = {}
-        self.economy_config = self.load_economy_config()
+        self.service = EconomyService()
+        self.economy_config = EconomyConfigLoader()
 
-    def load_economy_config(self):
-        """Load economy configuration from JSON file."""
-        try:
-            with open("./src/json/economy.json", "r") as f:
-                return json.load(f)
-        except FileNotFoundError:
-            logger.error("Economy config file not found.")
-            return {}
+    async def cog_load(self):
+        self.economy_config.start()
+        self.service.ledger.start()
+        self.service.ranks.start()
+
+    async def cog_unload(self):
+        await self.economy_config.stop()
+        await self.service.ledger.stop()
+        await self.service.ranks.stop()
 
     async def create_balance(self, user: discord.Member):
-        query = "INSERT INTO bank (user_id, wallet, bank, maxbank) VALUES (%s, %s, %s, %s) ON CONFLICT (user_id) DO NOTHING"
-        self.db.execute_query(query, (str(user.id), 0, 100, 25000))
+        await self.service.create_account(user.id)
 
     async def get_balance(self, user: discord.Member):
-        query = "SELECT wallet, bank, maxbank FROM bank WHERE user_id = %s"
-        data = self.db.execute_query(query, (str(user.id),), fetch="one")
-        if data is None:
-            await self.create_balance(user)
-            return 0, 100, 25000
-        wallet, bank, maxbank = data[0], data[1], data[2]
-        return wallet, bank, maxbank
-
-    async def update_wallet(self, user: discord.Member, amount: int):
-        query = "SELECT wallet FROM bank WHERE user_id = %s"
-        data = self.db.execute_query(query, (str(user.id),), fetch="one")
-        if data is None:
-            await self.create_balance(user)
-            return 0
-        self.db.execute_query(
-            "UPDATE bank SET wallet = %s WHERE user_id = %s",
-            (data[0] + amount, str(user.id)),
+        return await self.service.get_balance(user.id)
+
+    async def update_balance(
+        self,
+        user: discord.Member,
+        wallet: int = 0,
+        bank: int = 0,
+        reason: str = "adjust",
+    ):
+        return await self.service.update_balance(
+            user.id, wallet=wallet, bank=bank, reason=reason
         )
 
-    async def update_bank(self, user: discord.Member, amount: int):
-        query = "SELECT wallet, bank, maxbank FROM bank WHERE user_id = %s"
-        data = self.db.execute_query(query, (str(user.id),), fetch="one")
-        if data is None:
-            await self.create_balance(user)
-            return 0
-        capacity = int(data[2] - data[1])
-        if amount > capacity:
-            await self.update_wallet(user, amount)
-            return 1
-        self.db.execute_query(
-            "UPDATE bank SET bank = %s WHERE user_id = %s",
-            (data[1] + amount, str(user.id)),
-        )
+    async def update_wallet(
+        self, user: discord.Member, amount: int, reason: str = "adjust"
+    ):
+        return await self.update_balance(user, wallet=amount, reason=reason)
+
+    async def update_bank(
+        self, user: discord.Member, amount: int, reason: str = "adjust"
+    ):
+        return await self.update_balance(user, bank=amount, reason=reason)
 
     # @commands.Cog.listener()
     # async def on_ready(self):
@@ -107,100 +206,67 @@ class Economy(commands.Cog):
         await ctx.send(embed=embed)
 
     @commands.hybrid_command(name="beg")
-    @commands.cooldown(1, 30, commands.BucketType.user)
+    @shared_cooldown(1, 30, commands.BucketType.user)
     async def economy_beg(self, ctx: commands.Context):
         """Beg for some money. Maybe you'll get lucky!"""
-        # Get beg configuration
-        beg_config = self.economy_config.get("beg", {})
-        celebs = self.economy_config.get("celebs", {})
-        success_messages = self.economy_config.get("beg_success", {})
-        fail_messages = self.economy_config.get("beg_failed", {})
-
-        min_amount = beg_config.get("min_amount", 1)
-        max_amount = beg_config.get("max_amount", 100)
-        success_rate = beg_config.get("success_rate", 0.7)
-
-        # Random selection from celebs
-        celeb_key = random.choice(list(celebs.keys()))
-        chosen_name = celebs[celeb_key]
-
-        # Proper weighted randomizer
-        success_weight = int(success_rate * 100)  # Convert to percentage
-        fail_weight = 100 - success_weight
-
-        outcomes = ["success"] * success_weight + ["fail"] * fail_weight
-        result = random.choice(outcomes)
-
-        if result == "success":
-            # Calculate amount with weighted distribution (lower amounts more common)
-            weights = [
-                40,
-                30,
-                20,
-                10,
-            ]  # 40% chance low, 30% med-low, 20% med-high, 10% high
-            ranges = [
-                (min_amount, min_amount + (max_amount - min_amount) // 4),
-                (
-                    min_amount + (max_amount - min_amount) // 4,
-                    min_amount + (max_amount - min_amount) // 2,
-                ),
-                (
-                    min_amount + (max_amount - min_amount) // 2,
-                    min_amount + 3 * (max_amount - min_amount) // 4,
-                ),
-                (min_amount + 3 * (max_amount - min_amount) // 4, max_amount),
-            ]
-
-            chosen_range = random.choices(ranges, weights=weights)[0]
-            amount = random.randint(chosen_range[0], chosen_range[1])
-
-            res = await self.update_wallet(ctx.author, amount)
-            if res == 0:
-                raise AccountNotFound()
-
-            success_key = random.choice(list(success_messages.keys()))
-            message = success_messages[success_key].format(
-                money=f"{amount} <:blahajCoin:1339437832346796132>"
-            )
+        config = self.economy_config.current
+        if config is None:
+            embed = EmbedUtils.error_embed("⛔ | Begging isn't available right now.")
+            await ctx.send(embed=embed)
+            return
 
-            embed = EmbedUtils.success_embed(f"🤲 | **{chosen_name}**: {message}")
+        outcome = config.beg.roll()
+        if outcome.amount is not None:
+            await self.update_wallet(ctx.author, outcome.amount, reason="beg")
+            message = outcome.message.format(
+                money=f"{outcome.amount} <:blahajCoin:1339437832346796132>"
+            )
+            embed = EmbedUtils.success_embed(f"🤲 | **{outcome.celeb}**: {message}")
         else:
-            fail_key = random.choice(list(fail_messages.keys()))
-            message = fail_messages[fail_key]
+            embed = EmbedUtils.error_embed(
+                f"😔 | **{outcome.celeb}**: {outcome.message}"
+            )
 
-            embed = EmbedUtils.error_embed(f"😔 | **{chosen_name}**: {message}")
+        await ctx.send(embed=embed)
 
+    @commands.hybrid_command(name="reloadeconomy")
+    @commands.is_owner()
+    async def economy_reload_config(self, ctx: commands.Context):
+        """Reload the economy config file."""
+        try:
+            config = await asyncio.to_thread(self.economy_config.load)
+        except InvalidEconomyConfig as e:
+            embed = EmbedUtils.error_embed(
+                f"{e}\nThe previous config is still in use.",
+                title="Economy config not reloaded",
+            )
+            await ctx.send(embed=embed)
+            return
+
+        beg = config.beg
+        embed = EmbedUtils.success_embed(
+            f"✅ | Economy config reloaded: {len(beg.celebs)} celebs, "
+            f"{len(beg.success_messages)} success and "
+            f"{len(beg.fail_messages)} fail messages."
+        )
         await ctx.send(embed=embed)
 
     @commands.hybrid_command(name="withdraw")
-    @commands.cooldown(1, 5, commands.BucketType.user)
+    @shared_cooldown(1, 5, commands.BucketType.user)
     async def withdraw(self, ctx: commands.Context, amount):
         """Withdraw money from your bank."""
-        wallet, bank, maxbank = await self.get_balance(ctx.author)
         try:
             amount = int(amount)
         except ValueError:
+            amount = 0
+        if amount <= 0:
             return await ctx.send(
                 embed=EmbedUtils.error_embed(
                     "⛔ | Invalid amount. Please enter a valid number."
                 )
             )
 
-        if isinstance(amount, str):
-            if amount.lower() == "all" or amount.lower() == "max":
-                amount = int(wallet)
-        else:
-            amount = int(amount)
-
-        bank_res = await self.update_bank(ctx.author, -amount)
-        wallet_res = await self.update_wallet(ctx.author, amount)
-        if bank_res == 0 or wallet_res == 0:
-            raise AccountNotFound()
-        elif bank_res == 1:
-            raise InvalidFunds()
-
-        wallet, bank, maxbank = await self.get_balance(ctx.author)
+        wallet, bank, maxbank = await self.service.withdraw(ctx.author.id, amount)
         embed = EmbedUtils.create_embed(title=f"{amount} has been withdrew!")
         embed.add_field(
             name="Updated Wallet 💳",
@@ -213,34 +279,22 @@ class Economy(commands.Cog):
         await ctx.send(embed=embed)
 
     @commands.hybrid_command(name="deposit", aliases=["dep"])
-    @commands.cooldown(1, 5, commands.BucketType.user)
+    @shared_cooldown(1, 5, commands.BucketType.user)
     async def deposit(self, ctx: commands.Context, amount):
         """Deposit money into your bank."""
-        wallet, bank, maxbank = await self.get_balance(ctx.author)
         try:
             amount = int(amount)
         except ValueError:
+            amount = 0
+        if amount <= 0:
             return await ctx.send(
                 embed=EmbedUtils.error_embed(
                     "⛔ | Invalid amount. Please enter a valid number."
                 )
             )
 
-        if isinstance(amount, str):
-            if amount.lower() == "all" or amount.lower() == "max":
-                amount = int(bank)
-        else:
-            amount = int(amount)
-
-        bank_res = await self.update_bank(ctx.author, -amount)
-        wallet_res = await self.update_wallet(ctx.author, amount)
-        if bank_res == 0 or wallet_res == 0:
-            raise AccountNotFound()
-        elif bank_res == 1:
-            raise InvalidFunds()
-
-        wallet, bank, maxbank = await self.get_balance(ctx.author)
-        embed = EmbedUtils.create_embed(title=f"{amount} has been withdrew!")
+        wallet, bank, maxbank = await self.service.deposit(ctx.author.id, amount)
+        embed = EmbedUtils.create_embed(title=f"{amount} has been deposited!")
         embed.add_field(
             name="Updated Wallet 💳",
             value=f"{wallet} <:blahajCoin:1339437832346796132>",
@@ -251,6 +305,75 @@ class Economy(commands.Cog):
         )
         await ctx.send(embed=embed)
 
+    @commands.hybrid_command(name="pay", aliases=["give"])
+    @shared_cooldown(1, 5, commands.BucketType.user)
+    async def economy_pay(self, ctx: commands.Context, member: discord.Member, amount):
+        """Give money from your wallet to someone else."""
+        try:
+            amount = int(amount)
+        except ValueError:
+            amount = 0
+        if amount <= 0:
+            return await ctx.send(
+                embed=EmbedUtils.error_embed(
+                    "⛔ | Invalid amount. Please enter a valid number."
+                )
+            )
+        if member.bot or member.id == ctx.author.id:
+            return await ctx.send(
+                embed=EmbedUtils.error_embed("⛔ | You can't pay that user.")
+            )
+
+        # The invoking interaction or message identifies the request across retries
+        key = f"pay:{(ctx.interaction or ctx.message).id}"
+        transfer = await self.service.transfer(
+            ctx.author.id, member.id, amount, idempotency_key=key
+        )
+        if transfer.replayed:
+            return await ctx.send(
+                embed=EmbedUtils.warning_embed("⚠️ | That payment was already made.")
+            )
+
+        embed = EmbedUtils.success_embed(
+            f"💸 | You gave **{member.display_name}** "
+            f"{amount} <:blahajCoin:1339437832346796132>",
+        )
+        embed.add_field(
+            name="Updated Wallet 💳",
+            value=f"{transfer.sender.wallet} <:blahajCoin:1339437832346796132>",
+        )
+        await ctx.send(embed=embed)
+
+    @commands.hybrid_command(name="history", aliases=["transactions"])
+    @shared_cooldown(1, 5, commands.BucketType.user)
+    async def economy_history(
+        self, ctx: commands.Context, member: Optional[discord.Member] = None
+    ):
+        """Show your recent transactions."""
+        if member is None:
+            member = ctx.author
+
+        entries = await self.service.ledger.history(member.id, HISTORY_SIZE)
+        await HistoryView(member, entries).send(ctx)
+
+    @commands.hybrid_command(name="leaderboard", aliases=["lb", "top", "rich"])
+    @shared_cooldown(1, 5, commands.BucketType.user)
+    async def economy_leaderboard(self, ctx: commands.Context, scope: str = "global"):
+        """Show the richest users, globally or in this server ("server")."""
+        user_ids = None
+        title = "Global Leaderboard 🌍"
+        if ctx.guild and scope.lower() in ("server", "guild", "local"):
+            user_ids = [member.id for member in ctx.guild.members if not member.bot]
+            title = f"{ctx.guild.name} Leaderboard 🏆"
+
+        entries, rank, total = await asyncio.gather(
+            self.service.leaderboard(LEADERBOARD_SIZE, user_ids),
+            self.service.rank(ctx.author.id, user_ids),
+            self.service.account_count(user_ids),
+        )
+        view = LeaderboardView(self.bot, title, entries, rank, total, ctx.guild)
+        await view.send(ctx)
+
     # @economy_beg.error
     # async def economy_beg_error(self, ctx: commands.Context, error):
     #     if isinstance(error, commands.CommandOnCooldown):
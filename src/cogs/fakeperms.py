@@ -1,14 +1,19 @@
 import discord
 import json
 
+from typing import Iterable, List
+
 from discord.ext import commands
 from src.utils.logger import setup_logger
 from src.utils.embeds import EmbedUtils
 from src.utils.checks import is_server_owner
 from src.utils.database import DatabaseUtils
+from src.utils.cache import LRUCache, MISSING
 
 logger = setup_logger()
 
+PERMISSION_CACHE_SIZE = 4096
+
 
 class FakePerms(commands.Cog):
     def __init__(self, bot):
@@ -16,6 +21,8 @@ class FakePerms(commands.Cog):
         self.db = DatabaseUtils()
         self.permission_file = "./src/json/permissions.json"
         self.permission_flags = self.load_permission_flags()
+        self.permission_cache = LRUCache(maxsize=PERMISSION_CACHE_SIZE)
+        self.cache_version = 0
 
     def load_permission_flags(self):
         """
@@ -28,29 +35,74 @@ class FakePerms(commands.Cog):
             logger.error(f"Permission file {self.permission_file} not found.")
             return {}
 
-    def get_role_permissions(self, role_id: int):
+    async def get_role_permissions(self, role_id: int):
+        """
+        Retrieve the permissions for a role, from the cache when possible.
+        """
+        return await self.get_effective_permissions([role_id])
+
+    async def get_effective_permissions(self, role_ids: Iterable[int]) -> int:
+        """
+        Retrieve the combined (OR'd) permissions of several roles.
+        Cached roles cost nothing, the rest are fetched together in a single query.
         """
-        Retrieve the permissions for a role from the database.
+        permissions = 0
+        missing = []
+        for role_id in role_ids:
+            role_perms = self.permission_cache.get(role_id, MISSING)
+            if role_perms is MISSING:
+                missing.append(role_id)
+            else:
+                permissions |= role_perms
+
+        if missing:
+            permissions |= await self.fetch_role_permissions(missing)
+        return permissions
+
+    async def fetch_role_permissions(self, role_ids: List[int]) -> int:
         """
+        Retrieve the permissions of several roles from the database and cache them.
+        Roles without a row are cached as having no permissions.
+        """
+        version = self.cache_version
         try:
-            result = self.db.execute_query(
-                "SELECT permissions FROM role_permissions WHERE role_id = %s",
-                (role_id,),
-                fetch="one",
+            rows = await self.db.execute(
+                """
+                SELECT role_id, permissions FROM role_permissions
+                WHERE role_id = ANY(%s::bigint[])
+                """,
+                (role_ids,),
+                fetch="all",
             )
-            return result[0] if result else 0
         except Exception as e:
-            logger.error(
-                f"Error retrieving role permissions for role_id {role_id}: {e}"
-            )
+            logger.error(f"Error retrieving permissions for role_ids {role_ids}: {e}")
             return 0
 
-    def set_role_permissions(self, role_id: int, permissions: int):
+        found = dict(rows)
+        # Skip caching if a grant/revoke landed while the query was in flight
+        if version == self.cache_version:
+            for role_id in role_ids:
+                self.permission_cache.put(role_id, found.get(role_id, 0))
+
+        permissions = 0
+        for role_perms in found.values():
+            permissions |= role_perms
+        return permissions
+
+    def invalidate_role(self, role_id: int):
+        """
+        Drop a role from the permission cache.
+        """
+        self.cache_version += 1
+        self.permission_cache.invalidate(role_id)
+
+    async def set_role_permissions(self, role_id: int, permissions: int):
         """
         Set the permissions for a role in the database.
         """
+        self.invalidate_role(role_id)
         try:
-            self.db.execute_query(
+            await self.db.execute(
                 """
                 INSERT INTO role_permissions (role_id, permissions) VALUES (%s, %s)
                 ON CONFLICT (role_id) DO UPDATE SET permissions = EXCLUDED.permissions
@@ -59,6 +111,18 @@ class FakePerms(commands.Cog):
             )
         except Exception as e:
             logger.error(f"Error setting role permissions for role_id {role_id}: {e}")
+        finally:
+            self.invalidate_role(role_id)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        self.invalidate_role(role.id)
+        try:
+            await self.db.execute(
+                "DELETE FROM role_permissions WHERE role_id = %s", (role.id,)
+            )
+        except Exception as e:
+            logger.error(f"Error deleting role permissions for role_id {role.id}: {e}")
 
     @commands.Cog.listener()
     async def on_command_error(
@@ -93,9 +157,9 @@ class FakePerms(commands.Cog):
             )
             return await ctx.send(embed=embed)
 
-        current_perms = self.get_role_permissions(role.id)
+        current_perms = await self.get_role_permissions(role.id)
         new_perms = current_perms | perm_flag
-        self.set_role_permissions(role.id, new_perms)
+        await self.set_role_permissions(role.id, new_perms)
 
         embed = EmbedUtils.success_embed(
             f"✅ | Permission `{perm_name}` granted to role {role.mention}."
@@ -111,9 +175,9 @@ class FakePerms(commands.Cog):
             )
             return await ctx.send(embed=embed)
 
-        current_perms = self.get_role_permissions(role.id)
+        current_perms = await self.get_role_permissions(role.id)
         new_perms = current_perms & ~perm_flag
-        self.set_role_permissions(role.id, new_perms)
+        await self.set_role_permissions(role.id, new_perms)
 
         embed = EmbedUtils.success_embed(
             f"✅ | Permission `{perm_name}` revoked from role {role.mention}."
@@ -122,7 +186,7 @@ class FakePerms(commands.Cog):
 
     @mod_fakeperms.command(name="list", help="List permissions for a role.")
     async def fp_list_permissions(self, ctx, role: discord.Role):
-        current_perms = self.get_role_permissions(role.id)
+        current_perms = await self.get_role_permissions(role.id)
         perms_list = [
             name for name, flag in self.permission_flags.items() if current_perms & flag
         ]
@@ -150,6 +214,24 @@ class FakePerms(commands.Cog):
         )
         await ctx.send(embed=embed)
 
+    @mod_fakeperms.command(name="cache", help="Show fake permission cache statistics.")
+    async def fp_cache_stats(self, ctx):
+        """Show fake permission cache statistics."""
+        stats = self.permission_cache.stats
+        embed = EmbedUtils.create_embed(
+            title="Fake Permission Cache",
+            fields=[
+                {
+                    "name": "Roles Cached",
+                    "value": f"{stats['size']}/{stats['maxsize']}",
+                },
+                {"name": "Hits", "value": str(stats["hits"])},
+                {"name": "Misses", "value": str(stats["misses"])},
+                {"name": "Hit Rate", "value": f"{stats['hit_rate']:.1%}"},
+            ],
+        )
+        await ctx.send(embed=embed)
+
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(FakePerms(bot))
@@ -9,7 +9,8 @@ from discord.ext import commands
 # from os import getenv
 from src.utils.logger import setup_logger
 from src.utils.embeds import EmbedUtils
-from src.utils.database import DatabaseUtils
+from src.utils.counting import CountingRegistry
+from src.utils.cooldowns import shared_cooldown
 
 logger = setup_logger()
 # load_dotenv()
@@ -35,6 +36,25 @@ logger = setup_logger()
 class Games(commands.Cog):
     def __init__(self, bot: commands.Bot) -> None:
         self.bot = bot
+        self.counting = CountingRegistry()
+
+    async def cog_load(self):
+        self.counting.start()
+        await self.load_counting_channels()
+
+    async def cog_unload(self):
+        await self.counting.stop()
+
+    async def load_counting_channels(self):
+        try:
+            await self.counting.load()
+        except Exception as e:
+            logger.error(f"Failed to load counting channels: {e}")
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        if not self.counting.loaded:
+            await self.load_counting_channels()
 
     # DatabaseUtils takes care of this
     # @commands.Cog.listener()
@@ -63,27 +83,14 @@ class Games(commands.Cog):
         # cursor = conn.cursor()
         channel_id = message.channel.id
 
-        result = DatabaseUtils.execute_query(
-            "SELECT count FROM counting_channels WHERE channel_id = %s",
-            (channel_id,),
-            fetch="one",
-        )
-        # cursor.execute(
-        #     "SELECT count FROM counting_channels WHERE channel_id = %s", (channel_id,)
-        # )
-        # result = cursor.fetchone()
-
-        if result:
-            current_count = result[0]
+        if channel_id in self.counting:
             try:
                 user_number = int(message.content)
 
-                if user_number == current_count:
-                    new_count = current_count + 1
-                    DatabaseUtils.execute_query(
-                        "UPDATE counting_channels SET count = %s WHERE channel_id = %s",
-                        (new_count, channel_id),
-                    )
+                # Checked and applied without awaiting, so concurrent messages are
+                # counted one at a time in gateway order
+                correct, current_count = self.counting.advance(channel_id, user_number)
+                if correct:
                     await message.add_reaction("✅")
                 else:
                     wrong_number_em = EmbedUtils.create_embed(
@@ -93,10 +100,6 @@ class Games(commands.Cog):
                         """,
                     )
                     await message.channel.send(embed=wrong_number_em)
-                    DatabaseUtils.execute_query(
-                        "UPDATE counting_channels SET count = 1 WHERE channel_id = %s",
-                        (channel_id,),
-                    )
             except ValueError:
                 invalid_int_embed = EmbedUtils.warning_embed(
                     "❗ | Please enter a valid number!"
@@ -108,7 +111,7 @@ class Games(commands.Cog):
         description="A die gets rolled and gives a result 1-6",
         aliases=["dice", "roll"],
     )
-    @commands.cooldown(1, 15, commands.BucketType.user)
+    @shared_cooldown(1, 15, commands.BucketType.user)
     async def games_diceroll(self, ctx: commands.Context):
         """A die gets rolled and gives a result 1-6"""
         dice_roll = random.randint(1, 6)
@@ -135,17 +138,7 @@ class Games(commands.Cog):
             existing_channel = discord.utils.get(guild.channels, name="counting")
 
             if existing_channel:
-                result = DatabaseUtils.execute_query(
-                    "SELECT count FROM counting_channels WHERE channel_id = %s",
-                    (existing_channel.id,),
-                    fetch="one",
-                )
-
-                if result is None:
-                    DatabaseUtils.execute_query(
-                        "INSERT INTO counting_channels (channel_id, count) VALUES (%s, 1)",
-                        (existing_channel.id,),
-                    )
+                await self.counting.register(existing_channel.id)
                 embed = EmbedUtils.warning_embed(
                     description=f"A counting channel already exists! Channel: {existing_channel.mention}"
                 )
@@ -153,10 +146,7 @@ class Games(commands.Cog):
                 return
 
             counting_channel = await guild.create_text_channel("counting")
-            DatabaseUtils.execute_query(
-                "INSERT INTO counting_channels (channel_id, count) VALUES (%s, 1)",
-                (counting_channel.id,),
-            )
+            await self.counting.register(counting_channel.id)
             embed = EmbedUtils.success_embed(
                 description=f"Counting channel created: {counting_channel.mention}",
             )
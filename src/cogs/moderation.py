@@ -1,5 +1,3 @@
-import asyncio
-
 from datetime import timedelta
 from typing import Optional
 
@@ -10,6 +8,8 @@ from src.utils.logger import setup_logger
 from src.utils.embeds import EmbedUtils
 from src.utils.checks import check_perms
 from src.utils.utils import parse_duration
+from src.utils.scheduler import Scheduler
+from src.utils.overwrites import OverwriteRollout
 
 logger = setup_logger()
 
@@ -18,6 +18,85 @@ class Moderation(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.parse_duration = parse_duration
+        self.scheduler = Scheduler()
+        self.scheduler.register("unban", self.expire_ban)
+        self.scheduler.register("unjail", self.expire_jail)
+
+    async def cog_load(self):
+        await self.load_scheduled_jobs()
+        # Loaded after startup (a reload), so on_ready won't come to start it
+        if self.bot.is_ready():
+            self.scheduler.start()
+
+    async def cog_unload(self):
+        await self.scheduler.stop()
+
+    async def load_scheduled_jobs(self):
+        try:
+            await self.scheduler.load()
+        except Exception as e:
+            logger.error(f"Failed to load scheduled jobs: {e}")
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        if not self.scheduler.loaded:
+            await self.load_scheduled_jobs()
+        # Overdue jobs need the guild cache, so only start running them once ready
+        self.scheduler.start()
+
+    async def fetch_guild(self, guild_id: int) -> Optional[discord.Guild]:
+        """Gets a guild from the cache or the API, or None if the bot isn't in it anymore"""
+        guild = self.bot.get_guild(guild_id)
+        if guild is not None:
+            return guild
+        try:
+            return await self.bot.fetch_guild(guild_id)
+        except (discord.NotFound, discord.Forbidden):
+            return None
+
+    async def expire_ban(self, payload: dict):
+        """Unbans a member once their temporary ban runs out"""
+        guild = await self.fetch_guild(payload["guild_id"])
+        if guild is None:
+            return
+
+        try:
+            await guild.unban(
+                discord.Object(id=payload["user_id"]), reason="Ban expired"
+            )
+        except discord.NotFound:
+            # Already unbanned
+            return
+
+    async def expire_jail(self, payload: dict):
+        """Releases a member from jail once their sentence runs out"""
+        guild = await self.fetch_guild(payload["guild_id"])
+        if guild is None:
+            return
+
+        jailed_role = guild.get_role(payload["role_id"])
+        if jailed_role is None:
+            roles = await guild.fetch_roles()
+            jailed_role = discord.utils.get(roles, id=payload["role_id"])
+        if jailed_role is None:
+            # The role was deleted, nobody has it anymore
+            return
+
+        member = guild.get_member(payload["user_id"])
+        if member is None:
+            try:
+                member = await guild.fetch_member(payload["user_id"])
+            except discord.NotFound:
+                # Left the server, and lost the role with it
+                return
+
+        await member.remove_roles(jailed_role, reason="Jail duration expired.")
+        channel = self.bot.get_channel(payload["channel_id"])
+        if channel is not None:
+            unjail_embed = EmbedUtils.success_embed(
+                f"🔓 | {member.mention} has been released from jail after {payload['duration']}."
+            )
+            await channel.send(embed=unjail_embed)
 
     @commands.Cog.listener()
     async def on_command_error(self, ctx: commands.Context, error):
@@ -79,7 +158,16 @@ class Moderation(commands.Cog):
             await ctx.send(embed=err_embed)
             return
 
-        await member.ban(reason=reason, delete_message_days=7)
+        # Scheduled first, so a ban never goes through without its unban
+        job_id = await self.scheduler.schedule(
+            "unban", duration_seconds, {"guild_id": guild.id, "user_id": member.id}
+        )
+        try:
+            await member.ban(reason=reason, delete_message_days=7)
+        except Exception:
+            await self.scheduler.cancel(job_id)
+            raise
+
         ban_embed = EmbedUtils.create_embed(
             title="Member Banned",
             description=f"""
@@ -89,12 +177,6 @@ class Moderation(commands.Cog):
         )
         await ctx.send(embed=ban_embed)
 
-        await asyncio.sleep(duration_seconds)
-        try:
-            await guild.unban(member, reason="Ban expired")
-        except discord.NotFound:
-            return
-
     @commands.hybrid_command(name="unban")
     @check_perms("ban_members")
     async def moderator_unban(
@@ -108,6 +190,7 @@ class Moderation(commands.Cog):
         guild = ctx.guild
 
         await guild.unban(user=user, reason=reason)
+        await self.scheduler.cancel_all("unban", guild_id=guild.id, user_id=user.id)
         unban_embed = EmbedUtils.create_embed(
             title="Member Unbanned",
             description=f"✅ | {user.mention} has been unbanned!",
@@ -181,6 +264,7 @@ class Moderation(commands.Cog):
     @check_perms("administrator")
     async def setup_jail(self, ctx: commands.Context):
         """Sets up a jail system: creates a 'Jail' category, 'jail' channel, and 'Jailed' role. Restricts jailed users to only see the jail channel."""
+        await ctx.defer()
         guild = ctx.guild
         # Create 'Jailed' role if it doesn't exist
         jailed_role = discord.utils.get(guild.roles, name="Jailed")
@@ -215,23 +299,37 @@ class Moderation(commands.Cog):
                 reason="Jail system setup",
             )
 
-        # Set permissions for all other roles to not view the jail channel
+        # Deny every other role from viewing the jail channel in a single edit
+        jail_overwrites = dict(jail_channel.overwrites)
         for role in guild.roles:
             if role not in [guild.default_role, jailed_role, guild.me.top_role]:
-                await jail_channel.set_permissions(role, view_channel=False)
+                jail_overwrites[role] = discord.PermissionOverwrite(view_channel=False)
+        if jail_overwrites != jail_channel.overwrites:
+            await jail_channel.edit(
+                overwrites=jail_overwrites, reason="Jail system setup"
+            )
 
         # Set view_channel=False for 'Jailed' role on all channels except 'jail'
+        status = await ctx.send(
+            embed=EmbedUtils.create_embed(
+                title="Setting up permissions...",
+                description="🔧 | Planning channel permissions",
+            )
+        )
+        rollout = OverwriteRollout(status_message=status, reason="Jail system setup")
         for channel in guild.channels:
             if channel != jail_channel:
-                try:
-                    await channel.set_permissions(jailed_role, view_channel=False)
-                except Exception:
-                    pass
-
-        embed = EmbedUtils.success_embed(
-            "✅ | Jail system setup complete! 'Jailed' role, 'Jail' category, and 'jail' channel created. Jailed users can only see the jail channel."
-        )
-        await ctx.send(embed=embed)
+                rollout.add(
+                    channel,
+                    jailed_role,
+                    discord.PermissionOverwrite(view_channel=False),
+                )
+        await rollout.run()
+
+        description = "✅ | Jail system setup complete! 'Jailed' role, 'Jail' category, and 'jail' channel created. Jailed users can only see the jail channel."
+        if rollout.failed:
+            description += f"\n\n⚠️ | {rollout.failed} channel(s) could not be updated, run this command again to retry them."
+        await status.edit(embed=EmbedUtils.success_embed(description))
 
     @commands.hybrid_command(name="jail")
     @check_perms("manage_members")
@@ -261,6 +359,20 @@ class Moderation(commands.Cog):
             await ctx.send(embed=err_embed)
             return
 
+        # Release them once the duration is up, even across restarts. Scheduled first,
+        # so nobody is jailed without a release
+        job_id = await self.scheduler.schedule(
+            "unjail",
+            seconds,
+            {
+                "guild_id": guild.id,
+                "user_id": member.id,
+                "role_id": jailed_role.id,
+                "channel_id": ctx.channel.id,
+                "duration": duration,
+            },
+        )
+
         # Remove all roles except @everyone and assign 'Jailed' role
         roles_to_remove = [
             role
@@ -271,6 +383,7 @@ class Moderation(commands.Cog):
             await member.remove_roles(*roles_to_remove, reason=f"Jailed: {reason}")
             await member.add_roles(jailed_role, reason=f"Jailed: {reason}")
         except discord.Forbidden:
+            await self.scheduler.cancel(job_id)
             err_embed = EmbedUtils.error_embed(
                 "❗ | I do not have permission to modify this member's roles. Try putting me higher in the role hierarchy."
             )
@@ -282,16 +395,37 @@ class Moderation(commands.Cog):
         )
         await ctx.send(embed=embed)
 
-        # Wait for the duration, then unjail
-        await asyncio.sleep(seconds)
+    @commands.hybrid_command(name="unjail")
+    @check_perms("manage_members")
+    async def unjail_member(
+        self,
+        ctx: commands.Context,
+        member: discord.Member,
+        *,
+        reason: str = "No reason provided.",
+    ):
+        """Releases a jailed member before their sentence runs out."""
+        guild = ctx.guild
+        jailed_role = discord.utils.get(guild.roles, name="Jailed")
+        if not jailed_role or jailed_role not in member.roles:
+            err_embed = EmbedUtils.error_embed(f"❗ | {member.mention} isn't jailed.")
+            await ctx.send(embed=err_embed)
+            return
+
         try:
-            await member.remove_roles(jailed_role, reason="Jail duration expired.")
-            unjail_embed = EmbedUtils.success_embed(
-                f"🔓 | {member.mention} has been released from jail after {duration}."
+            await member.remove_roles(jailed_role, reason=f"Unjailed: {reason}")
+        except discord.Forbidden:
+            err_embed = EmbedUtils.error_embed(
+                "❗ | I do not have permission to modify this member's roles. Try putting me higher in the role hierarchy."
             )
-            await ctx.send(embed=unjail_embed)
-        except Exception:
-            pass
+            await ctx.send(embed=err_embed)
+            return
+        await self.scheduler.cancel_all("unjail", guild_id=guild.id, user_id=member.id)
+
+        embed = EmbedUtils.success_embed(
+            f"🔓 | {member.mention} has been released from jail. Reason: {reason}"
+        )
+        await ctx.send(embed=embed)
 
 
 async def setup(bot):
@@ -1,7 +1,4 @@
-import asyncio
-import math
-
-from typing import cast
+from typing import Optional, cast
 
 import discord
 import wavelink
@@ -9,59 +6,323 @@ import wavelink
 from discord.ext import commands
 
 from dotenv import load_dotenv
-from os import getenv
 from src.utils.embeds import EmbedUtils
 from src.utils.logger import setup_logger
 from src.utils.errors import *
 from src.utils.utils import parse_duration
+from src.utils.search_cache import SearchCache
+from src.utils.idle import IdleManager
+from src.utils.nodes import BalancedPlayer, NodeBalancer, node_configs
+from src.utils.player_state import PlayerStore
+from src.utils.pagination import PaginatedView
+from src.utils.now_playing import NowPlayingBoard
+from src.utils.lookahead import TrackLookahead
+from src.utils.ingest import IngestJob, PlaylistIngestor
+from src.utils.lyrics import LyricsService, split_lyrics
+from src.utils.debounce import Debouncer
 
 
 logger = setup_logger()
 
 load_dotenv()
-LAVALINK_URI = getenv("LAVALINK_URL")
-LAVALINK_PASS = getenv("LAVALINK_PASSWORD")
+LAVALINK_NODES = node_configs()
+
+
+class MusicPanel(discord.ui.View):
+    """
+    Control panel for the music player of whichever guild it is pressed in.
+
+    The panel is persistent: it never times out, its buttons have fixed custom ids and
+    the cog registers it on load, so panels sent before a restart keep working. Presses
+    are debounced per guild and button, so a burst of presses becomes a single player
+    operation.
+    """
+
+    VOLUME_STEP = 10
+
+    def __init__(self, music: "Music"):
+        super().__init__(timeout=None)
+        self.music = music
+
+    @staticmethod
+    def get_player(interaction: discord.Interaction) -> Optional[wavelink.Player]:
+        voice_client = interaction.guild.voice_client if interaction.guild else None
+        return voice_client if isinstance(voice_client, wavelink.Player) else None
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        player = self.get_player(interaction)
+        if player is None:
+            err_embed = EmbedUtils.error_embed(str(PlayerIsNotAvailable()))
+            await interaction.response.send_message(embed=err_embed, ephemeral=True)
+            return False
+
+        voice = getattr(interaction.user, "voice", None)
+        if voice is None or voice.channel != player.channel:
+            warning_embed = EmbedUtils.warning_embed(
+                description=f"⚠️ | Join {player.channel.mention} to use the panel!"
+            )
+            await interaction.response.send_message(embed=warning_embed, ephemeral=True)
+            return False
+        return True
+
+    async def submit(self, interaction: discord.Interaction, action: str, operation):
+        """
+        Acknowledge a press and queue its operation, merged with other recent presses.
+        """
+        await interaction.response.defer()
+        guild = interaction.guild
+
+        async def run(count: int):
+            player = guild.voice_client
+            if not isinstance(player, wavelink.Player):
+                return
+            await operation(player, count)
+            self.music.player_changed(player)
+
+        self.music.panel_actions.submit((guild.id, action), run)
+
+    @discord.ui.button(
+        emoji="⏯️", style=discord.ButtonStyle.grey, custom_id="music_panel:toggle"
+    )
+    async def panel_toggle(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ):
+        async def toggle(player: wavelink.Player, count: int):
+            if count % 2:
+                await player.pause(not player.paused)
 
+        await self.submit(interaction, "toggle", toggle)
 
-class MusicPanel(discord.ui.View):  # TODO: Complete Music Panel
-    def __init__(self, *, timeout=300):
-        super().__init__(timeout=timeout)
+    @discord.ui.button(
+        emoji="⏭️", style=discord.ButtonStyle.grey, custom_id="music_panel:skip"
+    )
+    async def panel_skip(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ):
+        async def skip(player: wavelink.Player, count: int):
+            await player.skip()
+
+        await self.submit(interaction, "skip", skip)
 
-    @discord.ui.button(label="loop", style=discord.ButtonStyle.grey)
+    @discord.ui.button(
+        emoji="🔂", style=discord.ButtonStyle.grey, custom_id="music_panel:loop"
+    )
     async def panel_loop(
         self, interaction: discord.Interaction, button: discord.ui.Button
     ):
-        player: wavelink.Player = cast(
-            wavelink.Player, interaction.client.voice_clients
+        async def loop(player: wavelink.Player, count: int):
+            if count % 2 and player.current:
+                if player.queue.mode == wavelink.QueueMode.normal:
+                    player.queue.mode = wavelink.QueueMode.loop
+                else:
+                    player.queue.mode = wavelink.QueueMode.normal
+
+        await self.submit(interaction, "loop", loop)
+
+    @discord.ui.button(
+        emoji="🔀", style=discord.ButtonStyle.grey, custom_id="music_panel:shuffle"
+    )
+    async def panel_shuffle(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ):
+        async def shuffle(player: wavelink.Player, count: int):
+            player.queue.shuffle()
+
+        await self.submit(interaction, "shuffle", shuffle)
+
+    @discord.ui.button(
+        emoji="🔉", style=discord.ButtonStyle.grey, custom_id="music_panel:volume_down"
+    )
+    async def panel_volume_down(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ):
+        async def volume_down(player: wavelink.Player, count: int):
+            await player.set_volume(max(0, player.volume - self.VOLUME_STEP * count))
+
+        await self.submit(interaction, "volume_down", volume_down)
+
+    @discord.ui.button(
+        emoji="🔊", style=discord.ButtonStyle.grey, custom_id="music_panel:volume_up"
+    )
+    async def panel_volume_up(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ):
+        async def volume_up(player: wavelink.Player, count: int):
+            await player.set_volume(min(100, player.volume + self.VOLUME_STEP * count))
+
+        await self.submit(interaction, "volume_up", volume_up)
+
+    @discord.ui.button(
+        emoji="📜", style=discord.ButtonStyle.grey, custom_id="music_panel:queue"
+    )
+    async def panel_queue(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ):
+        player = self.get_player(interaction)
+        if not player.current and player.queue.is_empty:
+            err_embed = EmbedUtils.error_embed(str(QueueIsEmpty()))
+            await interaction.response.send_message(embed=err_embed, ephemeral=True)
+            return
+        await QueueView(player).respond(interaction)
+
+
+class QueueSearchModal(discord.ui.Modal, title="Search the queue"):
+    query = discord.ui.TextInput(label="Title or artist", max_length=100)
+
+    def __init__(self, view: "QueueView"):
+        super().__init__()
+        self.view = view
+
+    async def on_submit(self, interaction: discord.Interaction):
+        matches = self.view.search(self.query.value)
+        if not matches:
+            warning_embed = EmbedUtils.warning_embed(
+                description=f"⚠️ | No tracks in the queue match `{self.query.value}`"
+            )
+            await interaction.response.send_message(embed=warning_embed, ephemeral=True)
+            return
+
+        await self.view.show_page(interaction, matches[0][0] // self.view.per_page)
+        results = "\n".join(
+            f"`{index + 1}.` {track.title} by `{track.author}`"
+            for index, track in matches
+        )
+        results_embed = EmbedUtils.create_embed(
+            title=f"Matches for {self.query.value}", description=results
+        )
+        await interaction.followup.send(embed=results_embed, ephemeral=True)
+
+
+class QueueView(PaginatedView):
+    """
+    Pages through a player's queue, reading only the tracks on the page being shown.
+    """
+
+    MAX_MATCHES = 10
+
+    def __init__(self, player: wavelink.Player, *, timeout=300):
+        super().__init__(per_page=10, timeout=timeout)
+        self.player = player
+
+    def item_count(self) -> int:
+        return len(self.player.queue)
+
+    def render(self, page: int) -> discord.Embed:
+        embed = EmbedUtils.create_embed(
+            title=f"Queue for {self.player.guild.name}",
+        )
+
+        current_track = self.player.current
+        if current_track:
+            embed.add_field(
+                name="Now Playing",
+                value=f"[{current_track.title} - {current_track.author}]({current_track.uri})",
+                inline=False,
+            )
+            embed.add_field(
+                name="----------------------------------", value=None, inline=False
+            )
+
+        bounds = self.page_bounds(page)
+        for offset, track in enumerate(self.player.queue[bounds]):
+            embed.add_field(
+                name=f"{bounds.start + offset + 1}. {track.title}"[:256],
+                value=f"by `{track.author}` | [link]({track.uri})",
+                inline=False,
+            )
+
+        embed.set_footer(
+            text=f"Page {page + 1}/{self.page_count} | {self.item_count()} track(s)"
+        )
+        return embed
+
+    def search(self, query: str) -> list:
+        """
+        Find the queued tracks whose title or artist contains `query`.
+        Returns up to `MAX_MATCHES` (index, track) pairs.
+        """
+        query = query.casefold()
+        matches = []
+        for index, track in enumerate(self.player.queue):
+            if query in track.title.casefold() or query in track.author.casefold():
+                matches.append((index, track))
+                if len(matches) >= self.MAX_MATCHES:
+                    break
+        return matches
+
+    @discord.ui.button(label="🔍", style=discord.ButtonStyle.grey)
+    async def search_queue(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ):
+        await interaction.response.send_modal(QueueSearchModal(self))
+
+
+class LyricsView(PaginatedView):
+    """
+    Pages through the lyrics of a track.
+    """
+
+    def __init__(self, track: wavelink.Playable, pages: list, *, timeout=300):
+        super().__init__(per_page=1, timeout=timeout)
+        self.track = track
+        self.pages = pages
+
+    def item_count(self) -> int:
+        return len(self.pages)
+
+    def render(self, page: int) -> discord.Embed:
+        embed = EmbedUtils.create_embed(
+            title=f"Lyrics for {self.track.title}"[:256],
+            description=self.pages[page],
         )
-        if player.current:
-            if player.queue.mode == wavelink.QueueMode.normal:
-                player.queue.mode = wavelink.QueueMode.loop
-                loop_embed = EmbedUtils.success_embed(
-                    description="🔂 | Loop mode enabled"
-                )
-                await interaction.response.send_message(
-                    embed=loop_embed, ephemeral=True
-                )
-            else:
-                player.queue.mode = wavelink.QueueMode.normal
-                loop_embed = EmbedUtils.success_embed(
-                    description="🔂 | Loop mode disabled"
-                )
-                await interaction.response.send_message(
-                    embed=loop_embed, ephemeral=True
-                )
+        embed.set_footer(text=f"Page {page + 1}/{self.page_count} | Lyrics by Genius")
+        return embed
 
 
 class Music(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.search_cache = SearchCache()
+        self.idle = IdleManager(bot)
+        self.balancer = NodeBalancer(bot)
+        BalancedPlayer.balancer = self.balancer
+        self.player_store = PlayerStore(bot)
+        self.now_playing = NowPlayingBoard(bot)
+        self.lookahead = TrackLookahead(on_drop=self.player_changed)
+        self.ingest = PlaylistIngestor()
+        self.lyrics = LyricsService()
+        self.panel_actions = Debouncer()
+        self.panel = MusicPanel(self)
+
+    async def cog_load(self):
+        self.bot.add_view(self.panel)
+        self.idle.start()
+        self.player_store.start()
+        self.now_playing.start()
+
+    async def cog_unload(self):
+        await self.idle.stop()
+        await self.now_playing.stop()
+        await self.lookahead.stop()
+        await self.ingest.stop()
+        await self.lyrics.close()
+        await self.panel_actions.stop()
+        self.panel.stop()
+        await self.player_store.stop()
+        await self.balancer.stop()
+        BalancedPlayer.balancer = None
 
     async def setup_hook(self) -> None:
         nodes = [
-            wavelink.Node(uri=LAVALINK_URI, password=LAVALINK_PASS),
+            wavelink.Node(**config)
+            for config in LAVALINK_NODES
+            if config["identifier"] not in wavelink.Pool.nodes
         ]
-        await wavelink.Pool.connect(nodes=nodes, client=self.bot, cache_capacity=None)
+        if nodes:
+            await wavelink.Pool.connect(
+                nodes=nodes, client=self.bot, cache_capacity=None
+            )
+        self.balancer.start()
 
     @commands.Cog.listener()
     async def on_ready(self):
@@ -86,6 +347,19 @@ class Music(commands.Cog):
             f"Wavelink Node connected: {payload.node} | Resumed: {payload.resumed}"
         )
 
+        # A node that restarted without resuming has forgotten its players
+        if not payload.resumed and payload.node.players:
+            self.balancer.migrate_from(payload.node.identifier, exclude_source=False)
+
+        try:
+            restored = await self.player_store.restore(cls=BalancedPlayer)
+        except Exception as e:
+            logger.error(f"Failed to restore music players: {e}")
+            return
+        for player in restored:
+            if not player.playing:
+                self.idle.arm(player.guild.id)
+
     @commands.Cog.listener()
     async def on_wavelink_track_start(
         self, payload: wavelink.TrackStartEventPayload
@@ -94,26 +368,9 @@ class Music(commands.Cog):
         if not player:
             return
 
-        original: wavelink.Playable | None = payload.original
-        track: wavelink.Playable = payload.track
-
-        np_embed = EmbedUtils.create_embed(
-            title="Now Playing",
-            description=f"🔊 | [**{track.title}** by `{track.author}`]({track.uri})",
-        )
-
-        if track.artwork:
-            np_embed.set_image(url=track.artwork)
-
-        if original and original.recommended:
-            np_embed.description += (
-                f"\n\n`This track was recommended via {track.source}`"
-            )
-
-        if track.album.name:
-            np_embed.add_field(name="Album", value=track.album.name)
-
-        await player.home.send(embed=np_embed)
+        self.idle.cancel(player.guild.id)
+        self.player_changed(player)
+        self.lookahead.schedule(player)
 
     @commands.Cog.listener()
     async def on_wavelink_track_end(self, payload: wavelink.TrackEndEventPayload):
@@ -121,16 +378,27 @@ class Music(commands.Cog):
         if not player:
             return
 
-        if player.queue.mode == wavelink.QueueMode.loop:
+        # Another track already took over, or the player is being torn down
+        if payload.reason in ("replaced", "cleanup"):
+            return
+
+        if (
+            player.queue.mode == wavelink.QueueMode.loop
+            and payload.reason == "finished"
+        ):
             await player.play(payload.track)
+            return
 
-        if not player.queue.is_empty:
-            new = await player.queue.get_wait()
-            await player.play(new)
-        else:
-            await asyncio.sleep(120)
-            await player.stop()
-            await player.disconnect()
+        # Skipped or failed tracks move on even in loop mode
+        while not player.queue.is_empty:
+            new = player.queue.get_at(0)
+            if not self.lookahead.is_dead(new):
+                await player.play(new)
+                return
+
+        if not player.playing:
+            self.idle.arm(player.guild.id)
+            self.player_changed(player)
 
     @commands.hybrid_command(name="play", aliases=["p"])
     async def music_play(self, ctx: commands.Context, *, query: str):
@@ -143,7 +411,7 @@ class Music(commands.Cog):
 
         if not player:
             try:
-                player = await ctx.author.voice.channel.connect(cls=wavelink.Player)
+                player = await ctx.author.voice.channel.connect(cls=BalancedPlayer)
             except AttributeError:
                 joinvc_embed = EmbedUtils.error_embed(
                     title="Unable to join",
@@ -166,7 +434,7 @@ class Music(commands.Cog):
             await ctx.send(embed=alreadyvc_embed)
             return
 
-        tracks: wavelink.Search = await wavelink.Playable.search(query)
+        tracks: wavelink.Search = await self.search_cache.search(query)
         if not tracks:
             notrack_embed = EmbedUtils.warning_embed(
                 title="No tracks found",
@@ -175,22 +443,87 @@ class Music(commands.Cog):
             await ctx.send(embed=notrack_embed)
             return
 
+        self.idle.cancel(ctx.guild.id)
+        dedup = getattr(player, "dedup", False)
+
         if isinstance(tracks, wavelink.Playlist):
-            added: int = await player.queue.put_wait(tracks)
-            playlistadded_embed = EmbedUtils.success_embed(
-                description=f"✅ | Added the playlist [**`{tracks.name}`**]({tracks.url}) ({added} songs) to the queue!"
+            await self.queue_playlist(ctx, player, tracks, dedup)
+            return
+
+        track: wavelink.Playable = tracks[0]
+        if not self.ingest.space(player):
+            full_embed = EmbedUtils.warning_embed(
+                description=f"⚠️ | The queue is full! It can hold up to {self.ingest.max_queue} songs."
             )
-            await ctx.send(embed=playlistadded_embed)
-        else:
-            track: wavelink.Playable = tracks[0]
-            await player.queue.put_wait(track)
-            trackadded_embed = EmbedUtils.success_embed(
-                description=f"✅ | Added [**`{track}`**]({track.uri}) to the queue!"
+            await ctx.send(embed=full_embed)
+            return
+        if dedup and self.ingest.is_queued(player, track):
+            duplicate_embed = EmbedUtils.warning_embed(
+                description=f"⚠️ | [**`{track}`**]({track.uri}) is already in the queue!"
             )
-            await ctx.send(embed=trackadded_embed)
+            await ctx.send(embed=duplicate_embed)
+            return
+
+        await player.queue.put_wait(track)
+        trackadded_embed = EmbedUtils.success_embed(
+            description=f"✅ | Added [**`{track}`**]({track.uri}) to the queue!"
+        )
+        await ctx.send(embed=trackadded_embed)
 
         if not player.playing:
             await player.play(player.queue.get(), volume=30)
+        self.queue_changed(player)
+
+    async def queue_playlist(
+        self,
+        ctx: commands.Context,
+        player: wavelink.Player,
+        playlist: wavelink.Playlist,
+        dedup: bool,
+    ):
+        """
+        Start playing a playlist right away and add the rest of it in the background.
+        """
+        pending = list(playlist.tracks)
+        started = 0
+        if not player.playing and pending:
+            await player.play(pending.pop(0), volume=30)
+            started = 1
+
+        link = f"[**`{playlist.name}`**]({playlist.url})"
+        status_embed = EmbedUtils.success_embed(
+            description=f"⏳ | Adding the playlist {link} (0/{len(pending)} songs)..."
+        )
+        status = await ctx.send(embed=status_embed)
+
+        async def report(job: IngestJob, done: bool):
+            if not done:
+                description = f"⏳ | Adding the playlist {link} ({job.processed}/{job.total} songs)..."
+            else:
+                description = f"✅ | Added the playlist {link} ({job.added + started} songs) to the queue!"
+                if job.duplicates:
+                    description += f"\n{job.duplicates} song(s) were already queued."
+                if job.truncated:
+                    description += f"\n{job.truncated} song(s) didn't fit, the queue holds up to {self.ingest.max_queue}."
+            await status.edit(embed=EmbedUtils.success_embed(description=description))
+
+        self.ingest.start(
+            player,
+            playlist.name,
+            pending,
+            dedup=dedup,
+            on_progress=report,
+            on_batch=lambda: self.queue_changed(player),
+        )
+        self.queue_changed(player)
+
+    def queue_changed(self, player: wavelink.Player):
+        self.lookahead.schedule(player)
+        self.player_changed(player)
+
+    def player_changed(self, player: wavelink.Player):
+        self.now_playing.update(player)
+        self.player_store.mark_dirty(player.guild.id)
 
     @commands.hybrid_command(name="skip")
     async def music_skip(self, ctx: commands.Context):
@@ -210,6 +543,7 @@ class Music(commands.Cog):
             raise PlayerIsNotAvailable()
 
         await player.pause(not player.paused)
+        self.player_changed(player)
         await ctx.message.add_reaction("✅")
 
     @commands.hybrid_command(name="volume", aliases=["vol", "v"])
@@ -233,6 +567,7 @@ class Music(commands.Cog):
             await ctx.send(embed=tooquiet_em)
         else:
             await player.set_volume(value)
+            self.player_changed(player)
             await ctx.message.add_reaction("✅")
 
     @commands.hybrid_command(name="disconnect", aliases=["stop", "dc", "leave"])
@@ -242,9 +577,14 @@ class Music(commands.Cog):
         if not player:
             raise PlayerIsNotAvailable()
 
+        self.idle.cancel(ctx.guild.id)
         await player.disconnect()
+        self.lookahead.cancel(ctx.guild.id)
+        self.ingest.cancel(ctx.guild.id)
+        await self.now_playing.clear(ctx.guild.id)
         dc_embed = EmbedUtils.success_embed("👋 | See you next time!")
         await ctx.send(embed=dc_embed)
+        await self.player_store.forget(ctx.guild.id)
 
     @commands.hybrid_command(name="loop", aliases=["repeat", "l"])
     async def music_loop_track(self, ctx: commands.Context):
@@ -260,12 +600,14 @@ class Music(commands.Cog):
                     description="🔂 | Loop mode enabled"
                 )
                 await ctx.send(embed=loop_embed)
+                self.player_changed(player)
             else:
                 player.queue.mode = wavelink.QueueMode.normal
                 loop_embed = EmbedUtils.success_embed(
                     description="🔂 | Loop mode disabled"
                 )
                 await ctx.send(embed=loop_embed)
+                self.player_changed(player)
 
     @commands.hybrid_command(name="shuffle", aliases=["sh"])
     async def music_shuffle_queue(self, ctx: commands.Context):
@@ -276,6 +618,7 @@ class Music(commands.Cog):
 
         try:
             player.queue.shuffle()
+            self.player_changed(player)
             shuffle_embed = EmbedUtils.success_embed(
                 description=f"🔀 | Shuffling the queue of **{len(player.queue)} songs**",
                 title="Shuffling...",
@@ -287,6 +630,20 @@ class Music(commands.Cog):
             )
             await ctx.send(embed=error_embed)
 
+    @commands.hybrid_command(name="dedup", aliases=["nodupes"])
+    async def music_dedup(self, ctx: commands.Context):
+        """Toggles skipping songs that are already in the queue"""
+        player: wavelink.Player = cast(wavelink.Player, ctx.voice_client)
+        if not player:
+            raise PlayerIsNotAvailable()
+
+        player.dedup = not getattr(player, "dedup", False)
+        state = "enabled" if player.dedup else "disabled"
+        dedup_embed = EmbedUtils.success_embed(
+            description=f"🧹 | Duplicate skipping {state}"
+        )
+        await ctx.send(embed=dedup_embed)
+
     @commands.hybrid_command(name="queue", aliases=["q", "playlist"])
     async def music_queue(self, ctx: commands.Context):
         """Displays the current queue"""
@@ -294,99 +651,11 @@ class Music(commands.Cog):
         if not player:
             raise PlayerIsNotAvailable()
 
-        try:
-            queue = player.queue
-            pages = math.ceil(len(queue) / 10)
-
-            def create_embed(page):
-                embed = EmbedUtils.create_embed(
-                    title=f"Queue for {ctx.guild.name}",
-                )
-                start_index = page * 10
-                end_index = start_index + 10
-
-                # Add now playing line
-                current_track = player.current
-                embed.add_field(
-                    name="Now Playing",
-                    value=f"[{current_track.title} - {current_track.author}]({current_track.uri})",
-                    inline=False,
-                )
-                embed.add_field(
-                    name="----------------------------------", value=None, inline=False
-                )
-
-                # Next 10 tracks of the song
-                for i in range(start_index, end_index):
-                    track = queue[i]
-                    embed.add_field(
-                        name=f"{i + 1}. {track.title}",
-                        value=f"by `{track.author}` | [link]({track.uri})",
-                        inline=False,
-                    )
-
-                embed.set_footer(text=f"Page {page + 1}/{pages}")
-
-                return embed
-
-            class QueueView(discord.ui.View):
-                def __init__(self):
-                    super().__init__(timeout=300)
-                    self.current_page = 0
-                    self.message = None
-
-                async def on_timeout(self):
-                    if not player.playing and self.message:
-                        try:
-                            await self.message.delete()
-                        except Exception:
-                            pass
-
-                @discord.ui.button(label="◀️", style=discord.ButtonStyle.grey)
-                async def previous_page(
-                    self, interaction: discord.Interaction, button: discord.ui.Button
-                ):
-                    if self.current_page > 0:
-                        self.current_page -= 1
-                        await interaction.response.edit_message(
-                            embed=create_embed(self.current_page)
-                        )
-                    else:
-                        warning_embed = EmbedUtils.warning_embed(
-                            description="⚠️ | You've reached the beginning of the queue! Add some more songs to expand on it!",
-                            title="Woah there!",
-                        )
-                        await interaction.response.send_message(
-                            embed=warning_embed, ephemeral=True
-                        )
-
-                @discord.ui.button(label="▶️", style=discord.ButtonStyle.grey)
-                async def next_page(
-                    self, interaction: discord.Interaction, button: discord.ui.Button
-                ):
-                    if self.current_page < pages - 1:
-                        self.current_page += 1
-                        await interaction.response.edit_message(
-                            embed=create_embed(self.current_page)
-                        )
-                    else:
-                        warning_embed = EmbedUtils.warning_embed(
-                            description="⚠️ | You've reached the end of the queue! Add some more songs to expand on it!",
-                            title="Woah there!",
-                        )
-                        await interaction.response.send_message(
-                            embed=warning_embed, ephemeral=True
-                        )
-
-            initial_embed = create_embed(0)
-            view = QueueView()
-            response = await ctx.send(embed=initial_embed, view=view)
-            view.message = response
-            await view.wait()
-
-        except wavelink.QueueEmpty:
+        if not player.current and player.queue.is_empty:
             raise QueueIsEmpty()
 
+        await QueueView(player).send(ctx)
+
     @commands.hybrid_command(name="nowplaying", aliases=["np", "current"])
     async def music_now_playing(self, ctx: commands.Context):
         player: wavelink.Player = cast(wavelink.Player, ctx.voice_client)
@@ -396,42 +665,54 @@ class Music(commands.Cog):
         if not player.current:
             raise QueueIsEmpty()
 
-        track: wavelink.Playable = player.current
+        if not hasattr(player, "home"):
+            player.home = ctx.channel
 
-        # Track Duration + Progress Bar
-        duration = track.length if track.length else 0
-        if duration and not track.is_stream:
-            total_seconds = int(duration // 1000)
-            hours = total_seconds // 3600
-            minutes = (total_seconds % 3600) // 60
-            seconds = total_seconds % 60
-            if hours > 0:
-                duration_formatted = f"{hours:01}:{minutes:02}:{seconds:02}"
-            else:
-                duration_formatted = f"{minutes:02}:{seconds:02}"
-        else:
-            duration_formatted = "🔴|LIVE"
-
-        progress = player.position / duration if duration else 0
-        bar_length = 15
-        pos = int(progress * bar_length)
-        if pos >= bar_length:
-            pos = bar_length - 1
-        bar = ""
-        for i in range(bar_length):
-            if i < pos:
-                bar += "━"
-            elif i == pos:
-                bar += "●"
-            else:
-                bar += "─"
-        progress_bar = bar
+        message = await self.now_playing.resend(player)
+        if message and (ctx.interaction or ctx.channel != player.home):
+            np_embed = EmbedUtils.success_embed(
+                description=f"🔊 | [Jump to the now playing message]({message.jump_url})"
+            )
+            await ctx.send(embed=np_embed, ephemeral=True, delete_after=7)
+
+    @commands.hybrid_command(name="lyrics", aliases=["ly"])
+    async def music_lyrics(self, ctx: commands.Context):
+        """Shows the lyrics of the current song"""
+        player: wavelink.Player = cast(wavelink.Player, ctx.voice_client)
+        if not player:
+            raise PlayerIsNotAvailable()
+
+        if not player.current:
+            raise QueueIsEmpty()
+
+        if not self.lyrics.available:
+            warning_embed = EmbedUtils.warning_embed(
+                description="⚠️ | Lyrics aren't set up on this bot yet!"
+            )
+            await ctx.send(embed=warning_embed)
+            return
+
+        await ctx.defer()
+        track: wavelink.Playable = player.current
+        try:
+            lyrics = await self.lyrics.fetch(track.title, track.author)
+        except Exception as e:
+            logger.warning(f"Failed to fetch lyrics for {track.title}: {e}")
+            error_embed = EmbedUtils.error_embed(
+                description="⛔ | I couldn't reach Genius for the lyrics. Try again later!"
+            )
+            await ctx.send(embed=error_embed)
+            return
 
-        description = f"[{track.title} by {track.author}]({track.uri}) \n"
-        description += f"Duration: {duration_formatted}  {progress_bar}"
+        if not lyrics:
+            nolyrics_embed = EmbedUtils.warning_embed(
+                title="No lyrics found",
+                description=f"⚠️ | Genius doesn't have the lyrics for **{track.title}**",
+            )
+            await ctx.send(embed=nolyrics_embed)
+            return
 
-        embed = EmbedUtils.create_embed(title="Now Playing", description=description)
-        await ctx.send(embed=embed, delete_after=7)
+        await LyricsView(track, split_lyrics(lyrics)).send(ctx)
 
     @commands.hybrid_command(name="fastforward", aliases=["ff", "seek"])
     async def music_fastforward(self, ctx: commands.Context, *, time: str = "10s"):
@@ -474,15 +755,86 @@ class Music(commands.Cog):
 
     @commands.hybrid_command(name="panel")
     async def music_panel(self, ctx: commands.Context):
-        # player: wavelink.Player = cast(wavelink.Player, ctx.voice_client)
-        # if not player:
-        #     raise PlayerIsNotAvailable()
+        """Sends a control panel for the music player"""
+        panel_embed = EmbedUtils.create_embed(
+            title="Music Panel",
+            description="⏯️ Play/Pause | ⏭️ Skip | 🔂 Loop | 🔀 Shuffle | 🔉🔊 Volume | 📜 Queue",
+        )
+        await ctx.send(embed=panel_embed, view=self.panel)
+
+    @commands.hybrid_command(name="searchcache")
+    @commands.is_owner()
+    async def music_search_cache(self, ctx: commands.Context):
+        """Shows how effective the track search cache is"""
+        stats = self.search_cache.stats
+        embed = EmbedUtils.create_embed(
+            title="Track Search Cache",
+            fields=[
+                {"name": "Searches Cached", "value": str(stats["size"])},
+                {
+                    "name": "Memory",
+                    "value": f"{stats['bytes'] / 1048576:.1f}/{stats['maxbytes'] / 1048576:.0f} MB",
+                },
+                {"name": "Hits", "value": str(stats["hits"])},
+                {"name": "Misses", "value": str(stats["misses"])},
+                {"name": "Hit Rate", "value": f"{stats['hit_rate']:.1%}"},
+            ],
+        )
+        await ctx.send(embed=embed)
+
+    @commands.hybrid_group(name="nodes", invoke_without_command=True)
+    @commands.is_owner()
+    async def music_nodes(self, ctx: commands.Context):
+        """Shows the Lavalink nodes and their load"""
+        fields = []
+        for identifier, node in wavelink.Pool.nodes.items():
+            state = node.status.name.lower()
+            if identifier in self.balancer.drained:
+                state += ", draining"
+            penalty = self.balancer.penalties.get(identifier)
+            load = f"{penalty:.1f}" if penalty is not None else "unknown"
+            fields.append(
+                {
+                    "name": identifier,
+                    "value": f"{state} | {len(node.players)} player(s) | penalty {load}",
+                    "inline": False,
+                }
+            )
+        embed = EmbedUtils.create_embed(title="Lavalink Nodes", fields=fields)
+        await ctx.send(embed=embed)
 
-        await ctx.send(view=MusicPanel())
+    @music_nodes.command(name="drain")
+    @commands.is_owner()
+    async def music_nodes_drain(
+        self, ctx: commands.Context, identifier: str, migrate: bool = False
+    ):
+        """Stops new players from using a node, optionally moving its players off"""
+        if identifier not in wavelink.Pool.nodes:
+            embed = EmbedUtils.error_embed(
+                description=f"⛔ | Unknown node `{identifier}`"
+            )
+            await ctx.send(embed=embed)
+            return
+
+        moved = await self.balancer.drain(identifier, migrate=migrate)
+        description = f"🚧 | Node `{identifier}` is draining"
+        if migrate:
+            description += f", moving {moved} player(s) off it"
+        await ctx.send(embed=EmbedUtils.success_embed(description=description))
+
+    @music_nodes.command(name="undrain")
+    @commands.is_owner()
+    async def music_nodes_undrain(self, ctx: commands.Context, identifier: str):
+        """Lets new players use a drained node again"""
+        self.balancer.undrain(identifier)
+        embed = EmbedUtils.success_embed(
+            description=f"✅ | Node `{identifier}` is accepting players"
+        )
+        await ctx.send(embed=embed)
 
 
 async def setup(bot):
-    if LAVALINK_URI and LAVALINK_PASS:
+    if LAVALINK_NODES:
         await bot.add_cog(Music(bot))
     else:
         logger.warning("Lavalink information is either incomplete or missing")
@@ -0,0 +1,98 @@
+"""
+In-memory caches used by the cogs
+"""
+
+import time
+
+from collections import OrderedDict
+from typing import Optional
+
+MISSING = object()
+
+
+class LRUCache:
+    """
+    Bounded least-recently-used cache that counts its hits and misses.
+
+    Entries can optionally expire after `ttl` seconds (overridable per entry), and the
+    cache can be bounded by the total `size` of its entries with `maxbytes` on top of
+    the `maxsize` entry count.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: Optional[float] = None,
+        maxbytes: Optional[int] = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxbytes = maxbytes
+        self.hits = 0
+        self.misses = 0
+        self.bytes = 0
+        self._data = OrderedDict()
+
+    def __contains__(self, key) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key, default=None):
+        """
+        Get a cached value, marking it as recently used.
+        Returns `default` (and counts a miss) if the key isn't cached or has expired.
+        """
+        try:
+            value, expires, size = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        if expires is not None and expires <= time.monotonic():
+            self.invalidate(key)
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def put(self, key, value, size: int = 0, ttl: Optional[float] = MISSING):
+        """
+        Cache a value, evicting the least recently used entries past `maxsize` / `maxbytes`.
+        """
+        if self.maxbytes is not None and size > self.maxbytes:
+            return
+        ttl = self.ttl if ttl is MISSING else ttl
+        expires = time.monotonic() + ttl if ttl is not None else None
+
+        self.invalidate(key)
+        self._data[key] = (value, expires, size)
+        self.bytes += size
+        while len(self._data) > self.maxsize or (
+            self.maxbytes is not None and self.bytes > self.maxbytes
+        ):
+            _, (_, _, evicted_size) = self._data.popitem(last=False)
+            self.bytes -= evicted_size
+
+    def invalidate(self, key):
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry[2]
+
+    def clear(self):
+        self._data.clear()
+        self.bytes = 0
+
+    @property
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "bytes": self.bytes,
+            "maxbytes": self.maxbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -18,15 +18,13 @@ def check_perms(perm_name: str):
             raise commands.CheckFailure("FakePerms Cog not activated")
 
         role_ids = [role.id for role in ctx.author.roles]
-
-        for role_id in role_ids:
-            role_perms = fp_cog.get_role_permissions(role_id)
-            admin_flag = fp_cog.permission_flags.get("ADMINISTRATOR")
-            perm_flag = fp_cog.permission_flags.get(perm_name.upper())
-            if perm_flag and (role_perms & perm_flag):
-                return True
-            elif admin_flag and (role_perms & admin_flag):
-                return True
+        role_perms = await fp_cog.get_effective_permissions(role_ids)
+        admin_flag = fp_cog.permission_flags.get("ADMINISTRATOR")
+        perm_flag = fp_cog.permission_flags.get(perm_name.upper())
+        if perm_flag and (role_perms & perm_flag):
+            return True
+        elif admin_flag and (role_perms & admin_flag):
+            return True
 
         raise commands.MissingPermissions([perm_name])
 
@@ -0,0 +1,252 @@
+"""
+Command cooldowns kept in a pluggable store, so they can survive restarts and be shared
+between bot processes
+"""
+
+import asyncio
+import time
+
+from dotenv import load_dotenv
+from os import getenv
+from typing import Dict, List, Optional, Set
+
+from discord.ext import commands
+
+from src.utils.database import DatabaseUtils
+from src.utils.logger import setup_logger
+
+try:
+    import redis.asyncio as redis
+except ImportError:
+    redis = None
+
+logger = setup_logger()
+load_dotenv()
+
+# Cooldown store configuration
+COOLDOWN_CONFIG = {
+    "backend": getenv("COOLDOWN_BACKEND", "memory").lower(),
+    "redis_url": getenv("REDIS_URL", "redis://localhost:6379/0"),
+}
+
+
+class CooldownBackend:
+    """
+    Where cooldown windows are kept.
+
+    `hit` records a use of `key` in a window of `per` seconds and returns how long to
+    wait before the key may be used again, or 0 if this use is allowed.
+    """
+
+    async def hit(self, key: str, rate: int, per: float) -> float:
+        raise NotImplementedError
+
+    async def reset(self, key: str):
+        raise NotImplementedError
+
+    async def close(self):
+        pass
+
+
+class MemoryCooldownBackend(CooldownBackend):
+    """
+    Cooldowns kept in this process, with expired windows swept by a timing wheel.
+
+    Every window is filed in the wheel slot of the second it ends. Once a second the
+    sweeper empties the slot that just came due, so checks and expiry are both O(1) and
+    memory only holds the windows that are still running.
+    """
+
+    def __init__(self, resolution: float = 1.0, slots: int = 512):
+        self.resolution = resolution
+        self.windows: Dict[str, List[float]] = {}
+
+        self._wheel: List[Set[str]] = [set() for _ in range(slots)]
+        self._tick = int(time.monotonic() / resolution)
+        self._sweeper: Optional[asyncio.Task] = None
+
+    def _slot(self, expires: float) -> int:
+        return int(expires / self.resolution) % len(self._wheel)
+
+    async def hit(self, key: str, rate: int, per: float) -> float:
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+
+        now = time.monotonic()
+        window = self.windows.get(key)
+        if window is None or window[0] <= now:
+            window = [now + per, 0]
+            self.windows[key] = window
+            self._wheel[self._slot(window[0])].add(key)
+
+        if window[1] >= rate:
+            return window[0] - now
+        window[1] += 1
+        return 0.0
+
+    async def reset(self, key: str):
+        self.windows.pop(key, None)
+
+    def sweep(self):
+        """
+        Drop every window that ended since the last sweep.
+        """
+        now = time.monotonic()
+        current = int(now / self.resolution)
+        # A sweep never needs to visit a slot more than once
+        start = max(self._tick, current - len(self._wheel) + 1)
+        for tick in range(start, current + 1):
+            index = tick % len(self._wheel)
+            slot = self._wheel[index]
+            for key in list(slot):
+                window = self.windows.get(key)
+                if window is None or self._slot(window[0]) != index:
+                    # Reset, or filed again under the slot of a newer window
+                    slot.discard(key)
+                elif window[0] <= now:
+                    del self.windows[key]
+                    slot.discard(key)
+        self._tick = current
+
+    async def close(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.resolution)
+            self.sweep()
+
+
+class PostgresCooldownBackend(CooldownBackend):
+    """
+    Cooldowns kept in the `cooldowns` table, shared by every process using the database.
+
+    A check is a single upsert that either opens a new window or counts a use in the
+    running one, timed by the database clock. Ended windows are deleted every
+    `cleanup_interval` seconds.
+    """
+
+    def __init__(self, cleanup_interval: float = 600):
+        self.cleanup_interval = cleanup_interval
+        self._cleaner: Optional[asyncio.Task] = None
+
+    async def hit(self, key: str, rate: int, per: float) -> float:
+        if self._cleaner is None or self._cleaner.done():
+            self._cleaner = asyncio.create_task(self._cleanup_loop())
+
+        uses, remaining = await DatabaseUtils.execute(
+            """
+            INSERT INTO cooldowns (key, window_end, uses)
+            VALUES (%s, now() + make_interval(secs => %s), 1)
+            ON CONFLICT (key) DO UPDATE SET
+                uses = CASE WHEN cooldowns.window_end <= now()
+                    THEN 1 ELSE cooldowns.uses + 1 END,
+                window_end = CASE WHEN cooldowns.window_end <= now()
+                    THEN EXCLUDED.window_end ELSE cooldowns.window_end END
+            RETURNING uses, EXTRACT(EPOCH FROM window_end - now())
+            """,
+            (key, per),
+            fetch="one",
+        )
+        return float(remaining) if uses > rate else 0.0
+
+    async def reset(self, key: str):
+        await DatabaseUtils.execute("DELETE FROM cooldowns WHERE key = %s", (key,))
+
+    async def close(self):
+        if self._cleaner is not None:
+            self._cleaner.cancel()
+            try:
+                await self._cleaner
+            except asyncio.CancelledError:
+                pass
+            self._cleaner = None
+
+    async def _cleanup_loop(self):
+        while True:
+            await asyncio.sleep(self.cleanup_interval)
+            try:
+                await DatabaseUtils.execute(
+                    "DELETE FROM cooldowns WHERE window_end <= now()"
+                )
+            except Exception as e:
+                logger.error(f"Failed to clean up cooldowns: {e}")
+
+
+class RedisCooldownBackend(CooldownBackend):
+    """
+    Cooldowns kept in Redis (or anything speaking its protocol), shared by every
+    process using it. Each window is a counter that expires with the window.
+    """
+
+    def __init__(self, url: str = COOLDOWN_CONFIG["redis_url"]):
+        if redis is None:
+            raise RuntimeError("The redis package is required for Redis cooldowns")
+        self.client = redis.from_url(url)
+
+    async def hit(self, key: str, rate: int, per: float) -> float:
+        key = f"cooldown:{key}"
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.set(key, 0, px=int(per * 1000), nx=True)
+            pipe.incr(key)
+            pipe.pttl(key)
+            _, uses, ttl = await pipe.execute()
+        return max(ttl, 0) / 1000 if uses > rate else 0.0
+
+    async def reset(self, key: str):
+        await self.client.delete(f"cooldown:{key}")
+
+    async def close(self):
+        await self.client.aclose()
+
+
+def create_backend(name: str = COOLDOWN_CONFIG["backend"]) -> CooldownBackend:
+    """
+    Create the cooldown backend named by `COOLDOWN_BACKEND`: memory, postgres or redis.
+    Falls back to the in-memory backend if Redis support isn't installed.
+    """
+    if name == "postgres":
+        return PostgresCooldownBackend()
+    if name == "redis":
+        if redis is not None:
+            return RedisCooldownBackend()
+        logger.warning("redis isn't installed, falling back to in-memory cooldowns")
+    elif name != "memory":
+        logger.warning(f"Unknown cooldown backend {name}, using in-memory cooldowns")
+    return MemoryCooldownBackend()
+
+
+backend = create_backend()
+
+
+def shared_cooldown(
+    rate: int, per: float, type: commands.BucketType = commands.BucketType.default
+):
+    """
+    Drop-in replacement for `commands.cooldown` that keeps its windows in the configured
+    cooldown backend. Raises the same `commands.CommandOnCooldown` error.
+
+    Like built-in cooldowns, a use is only counted when the command is invoked and its
+    checks have passed, never by `can_run` or the help command. This takes the command's
+    before-invoke hook.
+    """
+    cooldown = commands.Cooldown(rate, per)
+
+    async def hit(*args):
+        # Called with (cog, ctx) for commands in a cog, (ctx) otherwise
+        ctx: commands.Context = args[-1]
+        bucket = type.get_key(ctx.message)
+        if isinstance(bucket, tuple):
+            bucket = ":".join(str(part) for part in bucket)
+        key = f"{ctx.command.qualified_name}:{type.name}:{bucket}"
+        retry_after = await backend.hit(key, rate, per)
+        if retry_after:
+            raise commands.CommandOnCooldown(cooldown, retry_after, type)
+
+    return commands.before_invoke(hit)
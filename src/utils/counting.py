@@ -0,0 +1,174 @@
+"""
+In-memory state for the counting game
+"""
+
+import asyncio
+
+from dotenv import load_dotenv
+from os import getenv
+from typing import Dict, Optional, Tuple
+
+from src.utils.database import DatabaseUtils
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+load_dotenv()
+
+# Write-behind durability for counting channels
+COUNTING_CONFIG = {
+    "flush_interval": float(getenv("COUNTING_FLUSH_INTERVAL", 5)),
+    "max_pending": int(getenv("COUNTING_MAX_PENDING", 50)),
+}
+
+
+class CountingRegistry:
+    """
+    Registry of counting channels and the next number each one expects.
+    Loaded once from the database so messages outside counting channels cost a dict lookup.
+
+    The in-memory count is authoritative. Changes are written behind by a background
+    flusher that coalesces them into one UPDATE every `flush_interval` seconds, or
+    sooner once a channel has `max_pending` un-persisted changes.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = COUNTING_CONFIG["flush_interval"],
+        max_pending: int = COUNTING_CONFIG["max_pending"],
+    ):
+        self.counts: Dict[int, int] = {}
+        self.pending: Dict[int, int] = {}
+        self.loaded = False
+        self.flush_interval = flush_interval
+        self.max_pending = max(1, max_pending)
+
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+
+    def __contains__(self, channel_id: int) -> bool:
+        return channel_id in self.counts
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+    def get(self, channel_id: int) -> Optional[int]:
+        """
+        Get the next expected number for a channel, or None if it isn't a counting channel.
+        """
+        return self.counts.get(channel_id)
+
+    def set(self, channel_id: int, count: int):
+        """
+        Set the next expected number for a channel and queue it for the next flush.
+        """
+        self.counts[channel_id] = count
+        pending = self.pending.get(channel_id, 0) + 1
+        self.pending[channel_id] = pending
+        if pending >= self.max_pending:
+            self._wakeup.set()
+
+    def advance(self, channel_id: int, number: int) -> Tuple[bool, int]:
+        """
+        Check a number against the channel's expected number and move the count on,
+        resetting it back to 1 on a wrong number.
+        Returns whether the number was correct and the number that was expected.
+
+        The read and the write happen without yielding to the event loop, so messages
+        racing in the same channel are applied one at a time in dispatch order while
+        other channels are never blocked.
+        """
+        expected = self.counts[channel_id]
+        correct = number == expected
+        self.set(channel_id, expected + 1 if correct else 1)
+        return correct, expected
+
+    def start(self):
+        """
+        Start the background flusher.
+        """
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def stop(self):
+        """
+        Stop the background flusher and persist everything that is still pending.
+        """
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush()
+
+    async def flush(self):
+        """
+        Write every pending count to the database in a single UPDATE.
+        Counts that fail to write stay pending for the next flush.
+        """
+        async with self._flush_lock:
+            if not self.pending:
+                return
+
+            batch, self.pending = self.pending, {}
+            channel_ids = list(batch)
+            counts = [self.counts[channel_id] for channel_id in channel_ids]
+            try:
+                await DatabaseUtils.execute(
+                    """
+                    UPDATE counting_channels AS c SET count = v.count
+                    FROM unnest(%s::bigint[], %s::integer[]) AS v(channel_id, count)
+                    WHERE c.channel_id = v.channel_id
+                    """,
+                    (channel_ids, counts),
+                )
+            except Exception:
+                for channel_id, changes in batch.items():
+                    self.pending[channel_id] = self.pending.get(channel_id, 0) + changes
+                raise
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush counting channels: {e}")
+
+    async def load(self):
+        """
+        Load every counting channel from the database.
+        """
+        rows = await DatabaseUtils.execute(
+            "SELECT channel_id, count FROM counting_channels", fetch="all"
+        )
+        self.counts = {channel_id: count for channel_id, count in rows}
+        self.loaded = True
+        logger.info(f"Loaded {len(self.counts)} counting channel(s)")
+
+    async def register(self, channel_id: int) -> int:
+        """
+        Register a counting channel, keeping its count if it already exists.
+        Returns the next expected number for the channel.
+        """
+        if channel_id in self.counts:
+            return self.counts[channel_id]
+
+        result = await DatabaseUtils.execute(
+            """
+            INSERT INTO counting_channels (channel_id, count) VALUES (%s, 1)
+            ON CONFLICT (channel_id) DO UPDATE SET channel_id = EXCLUDED.channel_id
+            RETURNING count
+            """,
+            (channel_id,),
+            fetch="one",
+        )
+        self.counts[channel_id] = result[0]
+        return result[0]
@@ -1,8 +1,17 @@
+import asyncio
+import functools
+import time
 import psycopg2
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 from os import getenv
-from contextlib import contextmanager
+from contextlib import asynccontextmanager, contextmanager
+from typing import Optional
+from psycopg2 import extensions
 from src.utils.logger import setup_logger
+from src.utils.errors import PoolTimeout, QueryFailed
 
 logger = setup_logger()
 load_dotenv()
@@ -16,15 +25,338 @@ DB_CONFIG = {
     "port": getenv("DB_PORT"),
 }
 
+# Connection pool configuration
+DB_POOL_CONFIG = {
+    "min_size": int(getenv("DB_POOL_MIN_SIZE", 1)),
+    "max_size": int(getenv("DB_POOL_MAX_SIZE", 10)),
+    "acquire_timeout": float(getenv("DB_POOL_TIMEOUT", 10)),
+    "max_idle": float(getenv("DB_POOL_MAX_IDLE", 300)),
+    "check_after": float(getenv("DB_POOL_CHECK_AFTER", 30)),
+}
+
+
+def _run_query(cursor, query, params=None, fetch=None):
+    """Execute a query on a cursor and fetch the result the way `fetch` asks for."""
+    cursor.execute(query, params)
+
+    if fetch == "one":
+        return cursor.fetchone()
+    elif fetch == "all":
+        return cursor.fetchall()
+    return None
+
+
+class PooledConnection:
+    """
+    A psycopg2 connection borrowed from a ConnectionPool.
+    Every blocking call is run on the pool's executor so the event loop never waits on Postgres.
+    """
+
+    def __init__(self, pool: "ConnectionPool", raw):
+        self.pool = pool
+        self.raw = raw
+        self.last_used = time.monotonic()
+
+    async def execute(self, query, params=None, fetch=None, commit=False):
+        """
+        Execute a query on this connection.
+
+        Args:
+            query (str): SQL query to execute
+            params (tuple, optional): Parameters for the query
+            fetch (str, optional): 'one', 'all', or None for fetchone(), fetchall(), or no fetch
+            commit (bool): Commit right after the query, in the same executor hop
+
+        Returns:
+            Query result if fetch is specified, None otherwise
+        """
+
+        def work():
+            with self.raw.cursor() as cursor:
+                result = _run_query(cursor, query, params, fetch)
+            if commit:
+                self.raw.commit()
+            return result
+
+        return await self.pool.run(work)
+
+    async def commit(self):
+        await self.pool.run(self.raw.commit)
+
+    async def rollback(self):
+        await self.pool.run(self.raw.rollback)
+
+
+class ConnectionPool:
+    """
+    Asynchronous pool of psycopg2 connections.
+
+    Connections are created lazily up to `max_size`, handed out most recently used first
+    and pinged with `SELECT 1` when they have been idle for longer than `check_after`
+    seconds. Idle connections above `min_size` are closed after `max_idle` seconds.
+    """
+
+    def __init__(
+        self,
+        config: dict,
+        min_size: int = 1,
+        max_size: int = 10,
+        acquire_timeout: float = 10.0,
+        max_idle: float = 300.0,
+        check_after: float = 30.0,
+    ):
+        self.config = config
+        self.min_size = min(min_size, max_size)
+        self.max_size = max_size
+        self.acquire_timeout = acquire_timeout
+        self.max_idle = max_idle
+        self.check_after = check_after
+
+        self._idle = deque()
+        self._size = 0
+        self._waiting = 0
+        self._slots = asyncio.Semaphore(max_size)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_size, thread_name_prefix="db-pool"
+        )
+        self._closed = False
+
+    @property
+    def stats(self) -> dict:
+        return {
+            "size": self._size,
+            "idle": len(self._idle),
+            "in_use": self._size - len(self._idle),
+            "waiting": self._waiting,
+        }
+
+    async def run(self, fn, *args, **kwargs):
+        """Run a blocking callable on the pool's executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(fn, *args, **kwargs)
+        )
+
+    async def open(self):
+        """Fill the pool up to `min_size` connections."""
+        while self._size < self.min_size:
+            self._idle.append(await self._connect())
+
+    async def close(self):
+        """Close every idle connection. Connections still in use are closed on release."""
+        self._closed = True
+        while self._idle:
+            self._discard(self._idle.pop())
+        self._executor.shutdown(wait=False)
+
+    async def acquire(self) -> PooledConnection:
+        if self._closed:
+            raise RuntimeError("Connection pool is closed")
+
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.acquire_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Timed out waiting for a database connection: {self.stats}")
+            raise PoolTimeout()
+        finally:
+            self._waiting -= 1
+
+        try:
+            while self._idle:
+                conn = self._idle.pop()
+                if await self._is_healthy(conn):
+                    return conn
+                self._discard(conn)
+            return await self._connect()
+        except BaseException:
+            self._slots.release()
+            raise
+
+    async def release(self, conn: PooledConnection):
+        try:
+            if self._closed or conn.raw.closed:
+                self._discard(conn)
+                return
+
+            status = conn.raw.get_transaction_status()
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                self._discard(conn)
+                return
+            if status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    await conn.rollback()
+                except psycopg2.Error:
+                    self._discard(conn)
+                    return
+
+            conn.last_used = time.monotonic()
+            self._idle.append(conn)
+            self._prune()
+        finally:
+            self._slots.release()
+
+    @asynccontextmanager
+    async def connection(self):
+        """
+        Context manager that borrows a connection from the pool.
+        Anything left uncommitted is rolled back when the connection is returned.
+        """
+        conn = await self.acquire()
+        try:
+            yield conn
+        finally:
+            await self.release(conn)
+
+    async def _connect(self) -> PooledConnection:
+        self._size += 1
+        try:
+            raw = await self.run(psycopg2.connect, **self.config)
+        except Exception as e:
+            self._size -= 1
+            logger.error(f"Failed to connect to database: {e}")
+            raise
+        return PooledConnection(self, raw)
+
+    async def _is_healthy(self, conn: PooledConnection) -> bool:
+        if conn.raw.closed:
+            return False
+        if time.monotonic() - conn.last_used < self.check_after:
+            return True
+
+        def ping():
+            with conn.raw.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            conn.raw.rollback()
+
+        try:
+            await self.run(ping)
+            return True
+        except psycopg2.Error as e:
+            logger.warning(f"Dropping broken pooled connection: {e}")
+            return False
+
+    def _prune(self):
+        """Close the oldest idle connections once they pass `max_idle`, down to `min_size`."""
+        now = time.monotonic()
+        while (
+            self._idle
+            and self._size > self.min_size
+            and now - self._idle[0].last_used > self.max_idle
+        ):
+            self._discard(self._idle.popleft())
+
+    def _discard(self, conn: PooledConnection):
+        self._size -= 1
+        if not conn.raw.closed:
+            try:
+                self._executor.submit(conn.raw.close)
+            except RuntimeError:
+                conn.raw.close()
+
 
 class DatabaseUtils:
     """Universal PostgreSQL database utility class."""
 
+    pool: Optional[ConnectionPool] = None
+
+    @staticmethod
+    def get_pool() -> ConnectionPool:
+        """
+        Get the shared connection pool, creating it on first use.
+        """
+        if DatabaseUtils.pool is None:
+            DatabaseUtils.pool = ConnectionPool(DB_CONFIG, **DB_POOL_CONFIG)
+        return DatabaseUtils.pool
+
+    @staticmethod
+    async def open_pool():
+        """
+        Warm the shared connection pool up to its minimum size.
+        A database that is down at startup is logged, not fatal.
+        """
+        try:
+            await DatabaseUtils.get_pool().open()
+            logger.info("Database connection pool opened")
+        except Exception as e:
+            logger.error(f"Failed to open database connection pool: {e}")
+
+    @staticmethod
+    async def close_pool():
+        """
+        Close the shared connection pool.
+        """
+        if DatabaseUtils.pool is not None:
+            await DatabaseUtils.pool.close()
+            DatabaseUtils.pool = None
+
+    @staticmethod
+    def connection():
+        """
+        Async context manager that borrows a pooled connection.
+
+        Usage:
+            async with DatabaseUtils.connection() as conn:
+                row = await conn.execute(query, params, fetch="one")
+        """
+        return DatabaseUtils.get_pool().connection()
+
+    @staticmethod
+    @asynccontextmanager
+    async def transaction():
+        """
+        Async context manager for a transaction on one pooled connection.
+        Commits when the block exits and rolls back if it raises.
+        Database errors are raised as QueryFailed, with the psycopg2 error as the cause.
+
+        Usage:
+            async with DatabaseUtils.transaction() as conn:
+                await conn.execute(query, params)
+                await conn.execute(other_query, other_params)
+        """
+        try:
+            async with DatabaseUtils.connection() as conn:
+                try:
+                    yield conn
+                    await conn.commit()
+                except Exception:
+                    await conn.rollback()
+                    raise
+        except psycopg2.Error as e:
+            logger.error(f"Database transaction failed: {e}")
+            raise QueryFailed() from e
+
+    @staticmethod
+    async def execute(query, params=None, fetch=None):
+        """
+        Awaitable counterpart of `execute_query` that runs on the connection pool.
+
+        Args:
+            query (str): SQL query to execute
+            params (tuple, optional): Parameters for the query
+            fetch (str, optional): 'one', 'all', or None for fetchone(), fetchall(), or no fetch
+
+        Returns:
+            Query result if fetch is specified, None otherwise
+
+        Raises:
+            QueryFailed: The query failed, with the psycopg2 error as the cause
+            PoolTimeout: No pooled connection freed up in time
+        """
+        try:
+            async with DatabaseUtils.connection() as conn:
+                return await conn.execute(query, params, fetch, commit=True)
+        except psycopg2.Error as e:
+            logger.error(f"Database operation failed: {e}")
+            raise QueryFailed() from e
+
     @staticmethod
     def get_connection():
         """
         Get a new database connection.
         Returns a psycopg2 connection object.
+
+        This is the blocking compatibility path, cogs should use `execute` / `connection`.
         """
         try:
             return psycopg2.connect(**DB_CONFIG)
@@ -91,13 +423,7 @@ class DatabaseUtils:
             Query result if fetch is specified, None otherwise
         """
         with DatabaseUtils.get_cursor_context() as cursor:
-            cursor.execute(query, params)
-
-            if fetch == "one":
-                return cursor.fetchone()
-            elif fetch == "all":
-                return cursor.fetchall()
-            return None
+            return _run_query(cursor, query, params, fetch)
 
     @staticmethod
     def setup_tables():
@@ -129,6 +455,123 @@ class DatabaseUtils:
                 maxbank BIGINT DEFAULT 25000
             )
             """,
+            # Net worth ranking, kept up to date by Postgres as balances change
+            """
+            ALTER TABLE bank ADD COLUMN IF NOT EXISTS net_worth BIGINT
+            GENERATED ALWAYS AS (wallet + bank) STORED
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS bank_net_worth_idx
+            ON bank (net_worth DESC, user_id)
+            """,
+            # Accounts per net worth range, rebuilt periodically (NetWorthRanks in
+            # src/utils/economy.py)
+            """
+            CREATE TABLE IF NOT EXISTS net_worth_ranks (
+                lower BIGINT PRIMARY KEY,
+                accounts BIGINT NOT NULL
+            )
+            """,
+            # The per-row bucket trigger these replace serialised every balance update
+            "DROP TRIGGER IF EXISTS bank_net_worth_buckets ON bank",
+            "DROP FUNCTION IF EXISTS bank_net_worth_buckets()",
+            "DROP TABLE IF EXISTS net_worth_buckets",
+            # Scheduled jobs table (temporary bans, jail releases)
+            """
+            CREATE TABLE IF NOT EXISTS scheduled_jobs (
+                id BIGSERIAL PRIMARY KEY,
+                kind TEXT NOT NULL,
+                due_at TIMESTAMPTZ NOT NULL,
+                payload JSONB NOT NULL DEFAULT '{}'
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS scheduled_jobs_due_at_idx
+            ON scheduled_jobs (due_at)
+            """,
+            """
+            ALTER TABLE scheduled_jobs
+            ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0
+            """,
+            # Append-only ledger of balance changes (see Ledger in src/utils/ledger.py).
+            # Deferred entries are wallet credits folded into bank later, by the
+            # transaction id that wrote them
+            """
+            CREATE TABLE IF NOT EXISTS ledger (
+                id BIGSERIAL PRIMARY KEY,
+                user_id BIGINT NOT NULL,
+                wallet_delta BIGINT NOT NULL DEFAULT 0,
+                bank_delta BIGINT NOT NULL DEFAULT 0,
+                reason TEXT NOT NULL,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                deferred BOOLEAN NOT NULL DEFAULT FALSE,
+                created_xid xid8 NOT NULL DEFAULT pg_current_xact_id()
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS ledger_user_idx ON ledger (user_id, id DESC)
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS ledger_deferred_user_idx
+            ON ledger (user_id, created_xid) WHERE deferred
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS ledger_deferred_xid_idx
+            ON ledger (created_xid) WHERE deferred
+            """,
+            # Deferred entries written by transactions from ledger_xmin on aren't in the
+            # row's wallet yet
+            """
+            ALTER TABLE bank ADD COLUMN IF NOT EXISTS ledger_xmin xid8 NOT NULL DEFAULT '0'
+            """,
+            """
+            CREATE OR REPLACE FUNCTION ledger_unsettled_wallet(
+                account BIGINT, since xid8, before xid8 DEFAULT NULL
+            ) RETURNS BIGINT AS $$
+                SELECT COALESCE(SUM(wallet_delta), 0) FROM ledger
+                WHERE user_id = account AND deferred AND created_xid >= since
+                    AND (before IS NULL OR created_xid < before)
+            $$ LANGUAGE sql STABLE
+            """,
+            # Every deferred entry from before compacted_xmin is folded into bank
+            """
+            CREATE TABLE IF NOT EXISTS ledger_compaction (
+                id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+                compacted_xmin xid8 NOT NULL DEFAULT '0'
+            )
+            """,
+            "INSERT INTO ledger_compaction DEFAULT VALUES ON CONFLICT DO NOTHING",
+            # Idempotency keys of wallet transfers (pay command)
+            """
+            CREATE TABLE IF NOT EXISTS transfers (
+                idempotency_key TEXT PRIMARY KEY,
+                sender_id BIGINT NOT NULL,
+                recipient_id BIGINT NOT NULL,
+                amount BIGINT NOT NULL,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+            """,
+            # Command cooldowns table (COOLDOWN_BACKEND=postgres)
+            """
+            CREATE TABLE IF NOT EXISTS cooldowns (
+                key TEXT PRIMARY KEY,
+                window_end TIMESTAMPTZ NOT NULL,
+                uses INTEGER NOT NULL DEFAULT 1
+            )
+            """,
+            """
+            CREATE INDEX IF NOT EXISTS cooldowns_window_end_idx
+            ON cooldowns (window_end)
+            """,
+            # Music player snapshots table (queues restored after restarts)
+            """
+            CREATE TABLE IF NOT EXISTS player_snapshots (
+                guild_id BIGINT PRIMARY KEY,
+                state JSONB NOT NULL,
+                position INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+            """,
         ]
 
         try:
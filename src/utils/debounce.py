@@ -0,0 +1,56 @@
+"""
+Coalescing of rapid repeated actions into a single operation
+"""
+
+import asyncio
+
+from typing import Awaitable, Callable, Dict, Hashable
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+
+Action = Callable[[int], Awaitable[None]]
+
+
+class Debouncer:
+    """
+    Runs an action once `delay` seconds after it was first requested, no matter how
+    many times it was requested in between. The action is called with the number of
+    requests it absorbed, so toggles can apply only an odd count and steps can add up.
+    """
+
+    def __init__(self, delay: float = 0.5):
+        self.delay = delay
+        self._counts: Dict[Hashable, int] = {}
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+
+    def submit(self, key: Hashable, action: Action):
+        """
+        Request an action. Only the first request's `action` runs for a burst.
+        """
+        if key in self._counts:
+            self._counts[key] += 1
+            return
+        self._counts[key] = 1
+        self._tasks[key] = asyncio.create_task(self._run(key, action))
+
+    async def _run(self, key: Hashable, action: Action):
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            count = self._counts.pop(key, 0)
+            self._tasks.pop(key, None)
+
+        try:
+            await action(count)
+        except Exception as e:
+            logger.warning(f"Debounced action {key} failed: {e}")
+
+    async def stop(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._counts.clear()
@@ -0,0 +1,138 @@
+"""
+On-disk cache backed by SQLite
+"""
+
+import os
+import sqlite3
+import threading
+import time
+
+from typing import Optional
+
+
+class DiskLRUCache:
+    """
+    Least-recently-used cache of text values stored in a SQLite file, so entries
+    survive restarts.
+
+    The cache is bounded by the total size of its values with `maxbytes`; the least
+    recently read entries are evicted first. Entries can expire after a per-entry `ttl`.
+    Every method blocks on disk I/O, so call them from a thread pool rather than the
+    event loop.
+    """
+
+    def __init__(self, path: str, maxbytes: int = 64 * 1024 * 1024):
+        self.path = path
+        self.maxbytes = maxbytes
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    expires REAL,
+                    last_used REAL NOT NULL
+                )
+                """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS entries_last_used_idx ON entries (last_used)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def get(self, key: str, default=None):
+        """
+        Get a cached value, marking it as recently used.
+        Returns `default` (and counts a miss) if the key isn't cached or has expired.
+        """
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT value, expires FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or (row[1] is not None and row[1] <= now):
+                if row is not None:
+                    conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                    conn.commit()
+                self.misses += 1
+                return default
+
+            conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (now, key))
+            conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, value: str, ttl: Optional[float] = None):
+        """
+        Cache a value, evicting the least recently used entries past `maxbytes`.
+        """
+        size = len(value.encode())
+        if size > self.maxbytes:
+            return
+        now = time.time()
+        expires = now + ttl if ttl is not None else None
+
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO entries (key, value, size, expires, last_used)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (key, value, size, expires, now),
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.maxbytes:
+            return
+
+        excess = total - self.maxbytes
+        freed = 0
+        evicted = []
+        for key, size in conn.execute(
+            "SELECT key, size FROM entries ORDER BY last_used"
+        ):
+            evicted.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany("DELETE FROM entries WHERE key = ?", evicted)
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @property
+    def stats(self) -> dict:
+        with self._lock:
+            size, total = (
+                self._connect()
+                .execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries")
+                .fetchone()
+            )
+        lookups = self.hits + self.misses
+        return {
+            "size": size,
+            "bytes": total,
+            "maxbytes": self.maxbytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,474 @@
+"""
+Balance operations for the economy
+"""
+
+import asyncio
+
+from contextlib import asynccontextmanager
+from dotenv import load_dotenv
+from os import getenv
+from typing import Dict, List, NamedTuple, Optional
+
+from src.utils.database import DatabaseUtils, PooledConnection
+from src.utils.errors import AccountNotFound, InvalidFunds
+from src.utils.ledger import Ledger
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+load_dotenv()
+
+DEFAULT_WALLET = 0
+DEFAULT_BANK = 100
+DEFAULT_MAXBANK = 25000
+
+# Leaderboard rank buckets configuration
+RANKS_CONFIG = {
+    "refresh_interval": float(getenv("LEADERBOARD_REFRESH_INTERVAL", 300)),
+    "buckets": int(getenv("LEADERBOARD_BUCKETS", 1024)),
+}
+
+
+class Balance(NamedTuple):
+    wallet: int
+    bank: int
+    maxbank: int
+
+
+class Transfer(NamedTuple):
+    sender: Balance
+    recipient: Balance
+    # True if the idempotency key was already used and no money moved this time
+    replayed: bool = False
+
+
+class RankedAccount(NamedTuple):
+    user_id: int
+    net_worth: int
+
+
+class EconomyTransaction:
+    """
+    A set of bank rows locked with SELECT ... FOR UPDATE on one connection.
+    Every change made through it commits or rolls back together.
+    """
+
+    def __init__(
+        self,
+        service: "EconomyService",
+        conn: PooledConnection,
+        accounts: Dict[int, Balance],
+    ):
+        self.service = service
+        self.conn = conn
+        self.accounts = accounts
+
+    def balance(self, user_id: int) -> Balance:
+        """
+        Get the locked balance of a user in this transaction.
+        """
+        try:
+            return self.accounts[user_id]
+        except KeyError:
+            raise RuntimeError(f"User {user_id} is not locked by this transaction")
+
+    async def update(
+        self, user_id: int, wallet: int = 0, bank: int = 0, reason: str = "adjust"
+    ) -> Balance:
+        """
+        Add to a locked user's wallet and bank.
+        Raises InvalidFunds, rolling back the whole transaction, if the balance would break its limits.
+        """
+        current = self.balance(user_id)
+        if (wallet < 0 and current.wallet + wallet < 0) or (
+            bank < 0 and current.bank + bank < 0
+        ):
+            raise InvalidFunds()
+        if bank > 0 and current.bank + bank > current.maxbank:
+            raise InvalidFunds()
+
+        balance = await self.service.update_balance(
+            user_id, wallet=wallet, bank=bank, conn=self.conn, reason=reason
+        )
+        self.accounts[user_id] = balance
+        return balance
+
+
+class NetWorthRanks:
+    """
+    Account counts per net worth range in the `net_worth_ranks` table, used to rank
+    users without counting every richer account.
+
+    The ranges are quantiles of the current net worths, so each one holds about
+    1/`buckets` of the accounts however the money is spread out. The table is rebuilt
+    every `refresh_interval` seconds instead of on every balance change, so writes never
+    touch it and ranks are approximate between refreshes.
+    """
+
+    def __init__(
+        self,
+        refresh_interval: float = RANKS_CONFIG["refresh_interval"],
+        buckets: int = RANKS_CONFIG["buckets"],
+    ):
+        self.refresh_interval = refresh_interval
+        self.buckets = max(1, buckets)
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def refresh(self) -> int:
+        """
+        Rebuild the ranges from the bank table. Returns the number of ranges.
+        """
+        fractions = [bucket / self.buckets for bucket in range(self.buckets)]
+        async with DatabaseUtils.transaction() as conn:
+            # Readers keep seeing the old ranges until this commits
+            await conn.execute("LOCK TABLE net_worth_ranks IN EXCLUSIVE MODE")
+            await conn.execute("DELETE FROM net_worth_ranks")
+            await conn.execute(
+                """
+                WITH bounds AS (
+                    SELECT ARRAY(
+                        SELECT DISTINCT lower FROM unnest((
+                            SELECT percentile_disc(%s::float8[])
+                                WITHIN GROUP (ORDER BY net_worth)
+                            FROM bank
+                        )) AS lower
+                        ORDER BY lower
+                    ) AS lowers
+                )
+                INSERT INTO net_worth_ranks (lower, accounts)
+                SELECT lowers[width_bucket(net_worth, lowers)], COUNT(*)
+                FROM bank, bounds
+                GROUP BY 1
+                """,
+                (fractions,),
+            )
+            data = await conn.execute(
+                "SELECT COUNT(*) FROM net_worth_ranks", fetch="one"
+            )
+        return int(data[0])
+
+    async def _refresh_loop(self):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.error(f"Failed to refresh the leaderboard ranks: {e}")
+            await asyncio.sleep(self.refresh_interval)
+
+
+class EconomyService:
+    """Service layer for every read and write on the bank table."""
+
+    def __init__(self):
+        self.ledger = Ledger()
+        self.ranks = NetWorthRanks()
+
+    @staticmethod
+    async def _execute(query, params=None, fetch=None, conn=None):
+        if conn is not None:
+            return await conn.execute(query, params, fetch)
+        return await DatabaseUtils.execute(query, params, fetch)
+
+    async def create_account(
+        self, user_id: int, conn: Optional[PooledConnection] = None
+    ):
+        """
+        Create an account with the default balance if the user doesn't have one.
+        """
+        await self._execute(
+            """
+            INSERT INTO bank (user_id, wallet, bank, maxbank) VALUES (%s, %s, %s, %s)
+            ON CONFLICT (user_id) DO NOTHING
+            """,
+            (user_id, DEFAULT_WALLET, DEFAULT_BANK, DEFAULT_MAXBANK),
+            conn=conn,
+        )
+
+    async def get_balance(self, user_id: int) -> Balance:
+        """
+        Get a user's balance, creating their account if needed.
+        Includes wallet credits that haven't been folded into the bank row yet.
+        """
+        query = """
+            SELECT wallet + ledger_unsettled_wallet(user_id, ledger_xmin), bank, maxbank
+            FROM bank WHERE user_id = %s
+        """
+        async with self.ledger.reading():
+            data = await self._execute(query, (user_id,), fetch="one")
+            if data is None:
+                # Credits can be written before the account exists
+                await self.create_account(user_id)
+                data = await self._execute(query, (user_id,), fetch="one")
+            pending = self.ledger.pending_wallet.get(user_id, 0)
+        wallet, bank, maxbank = data
+        return Balance(int(wallet) + pending, bank, maxbank)
+
+    async def update_balance(
+        self,
+        user_id: int,
+        wallet: int = 0,
+        bank: int = 0,
+        conn: Optional[PooledConnection] = None,
+        reason: str = "adjust",
+    ) -> Balance:
+        """
+        Add to a user's wallet and bank in a single conditional UPDATE, recorded in the
+        ledger as `reason`. The user's unsettled wallet credits are folded into the row
+        by the same UPDATE, so the checks see them.
+        The change only applies if the wallet and bank stay non-negative and the bank
+        stays within maxbank, otherwise InvalidFunds is raised and nothing changes.
+        Returns the updated balance.
+
+        Outside a transaction, wallet credits are only buffered for the ledger, and a
+        wallet debit writes the user's buffered credits first if they have any.
+        Inside one, the balance doesn't include credits buffered since it started.
+        """
+        if conn is None and wallet > 0 and bank == 0:
+            self.ledger.credit(user_id, wallet, reason)
+            return await self.get_balance(user_id)
+        if conn is None and wallet < 0 and user_id in self.ledger.pending_wallet:
+            await self.ledger.flush()
+
+        query = """
+            WITH horizon AS (
+                SELECT pg_snapshot_xmin(pg_current_snapshot()) AS xmin
+            ), updated AS (
+                UPDATE bank SET
+                    wallet = wallet + %(wallet)s
+                        + ledger_unsettled_wallet(user_id, ledger_xmin, horizon.xmin),
+                    bank = bank + %(bank)s,
+                    ledger_xmin = GREATEST(ledger_xmin, horizon.xmin)
+                FROM horizon
+                WHERE user_id = %(user_id)s
+                    AND (%(wallet)s >= 0 OR wallet + %(wallet)s
+                        + ledger_unsettled_wallet(user_id, ledger_xmin, horizon.xmin) >= 0)
+                    AND (%(bank)s >= 0 OR bank + %(bank)s >= 0)
+                    AND (%(bank)s <= 0 OR bank + %(bank)s <= maxbank)
+                RETURNING user_id, wallet, bank, maxbank, ledger_xmin
+            ), logged AS (
+                INSERT INTO ledger (user_id, wallet_delta, bank_delta, reason)
+                SELECT user_id, %(wallet)s, %(bank)s, %(reason)s FROM updated
+            )
+            SELECT TRUE, wallet + ledger_unsettled_wallet(user_id, ledger_xmin),
+                bank, maxbank
+            FROM updated
+            UNION ALL
+            SELECT FALSE, wallet + ledger_unsettled_wallet(user_id, ledger_xmin),
+                bank, maxbank
+            FROM bank
+            WHERE user_id = %(user_id)s AND NOT EXISTS (SELECT 1 FROM updated)
+        """
+        params = {"user_id": user_id, "wallet": wallet, "bank": bank, "reason": reason}
+        if conn is not None:
+            data = await conn.execute(query, params, fetch="one")
+            pending = 0
+        else:
+            async with self.ledger.reading():
+                data = await DatabaseUtils.execute(query, params, fetch="one")
+                pending = self.ledger.pending_wallet.get(user_id, 0)
+
+        if data is None:
+            await self.create_account(user_id, conn=conn)
+            raise AccountNotFound()
+        if not data[0]:
+            raise InvalidFunds()
+        return Balance(int(data[1]) + pending, data[2], data[3])
+
+    async def withdraw(self, user_id: int, amount: int) -> Balance:
+        """
+        Move money from a user's bank into their wallet.
+        """
+        return await self.update_balance(
+            user_id, wallet=amount, bank=-amount, reason="withdraw"
+        )
+
+    async def deposit(self, user_id: int, amount: int) -> Balance:
+        """
+        Move money from a user's wallet into their bank.
+        """
+        return await self.update_balance(
+            user_id, wallet=-amount, bank=amount, reason="deposit"
+        )
+
+    @asynccontextmanager
+    async def transaction(self, *user_ids: int):
+        """
+        Context manager that locks the accounts of the given users for one transaction.
+
+        Missing accounts are created first and rows are always locked in user_id order.
+        Nothing else in the economy locks more than one bank row, or locks anything
+        besides bank rows before them, so transactions can't deadlock with each other
+        or with the rest. Buffered credits of the locked users are written first, so
+        checks see their full balances.
+
+        Usage:
+            async with service.transaction(sender_id, recipient_id) as txn:
+                await txn.update(sender_id, wallet=-amount)
+                await txn.update(recipient_id, wallet=amount)
+        """
+        ordered = sorted(set(user_ids))
+        if any(user_id in self.ledger.pending_wallet for user_id in ordered):
+            await self.ledger.flush()
+        async with DatabaseUtils.transaction() as conn:
+            await conn.execute(
+                """
+                INSERT INTO bank (user_id, wallet, bank, maxbank)
+                SELECT user_id, %s, %s, %s FROM unnest(%s::bigint[]) AS user_id
+                ORDER BY user_id
+                ON CONFLICT (user_id) DO NOTHING
+                """,
+                (DEFAULT_WALLET, DEFAULT_BANK, DEFAULT_MAXBANK, ordered),
+            )
+            rows = await conn.execute(
+                """
+                SELECT user_id, wallet, bank, maxbank FROM bank
+                WHERE user_id = ANY(%s::bigint[])
+                ORDER BY user_id
+                FOR UPDATE
+                """,
+                (ordered,),
+                fetch="all",
+            )
+            accounts = {row[0]: Balance(*row[1:]) for row in rows}
+            for row in await self.ledger.settle(conn, ordered):
+                accounts[row[0]] = Balance(*row[1:])
+            yield EconomyTransaction(self, conn, accounts)
+
+    async def transfer(
+        self,
+        sender_id: int,
+        recipient_id: int,
+        amount: int,
+        idempotency_key: Optional[str] = None,
+    ) -> Transfer:
+        """
+        Move money from one user's wallet into another's in a single transaction.
+
+        With an `idempotency_key`, the key is recorded in the same transaction, so a
+        retried request with the same key moves nothing and returns the current
+        balances with `replayed` set. A transfer that fails leaves its key unused.
+        """
+        async with self.transaction(sender_id, recipient_id) as txn:
+            if idempotency_key is not None:
+                # Concurrent retries wait here on the key until the first one finishes
+                claimed = await txn.conn.execute(
+                    """
+                    INSERT INTO transfers (idempotency_key, sender_id, recipient_id, amount)
+                    VALUES (%s, %s, %s, %s)
+                    ON CONFLICT (idempotency_key) DO NOTHING
+                    RETURNING 1
+                    """,
+                    (idempotency_key, sender_id, recipient_id, amount),
+                    fetch="one",
+                )
+                if claimed is None:
+                    return Transfer(
+                        txn.balance(sender_id), txn.balance(recipient_id), True
+                    )
+
+            sender = await txn.update(
+                sender_id, wallet=-amount, reason=f"pay to {recipient_id}"
+            )
+            recipient = await txn.update(
+                recipient_id, wallet=amount, reason=f"pay from {sender_id}"
+            )
+        return Transfer(sender, recipient)
+
+    async def leaderboard(
+        self, limit: int, user_ids: Optional[List[int]] = None
+    ) -> List[RankedAccount]:
+        """
+        Get the accounts with the highest net worth, optionally only among `user_ids`.
+        Reads the top of the net worth index instead of sorting the table, so wallet
+        credits count once the ledger has folded them into the bank table.
+        """
+        if user_ids is None:
+            rows = await self._execute(
+                """
+                SELECT user_id, net_worth FROM bank
+                ORDER BY net_worth DESC, user_id LIMIT %s
+                """,
+                (limit,),
+                fetch="all",
+            )
+        else:
+            rows = await self._execute(
+                """
+                SELECT user_id, net_worth FROM bank WHERE user_id = ANY(%s::bigint[])
+                ORDER BY net_worth DESC, user_id LIMIT %s
+                """,
+                (user_ids, limit),
+                fetch="all",
+            )
+        return [RankedAccount(*row) for row in rows]
+
+    async def rank(
+        self, user_id: int, user_ids: Optional[List[int]] = None
+    ) -> Optional[int]:
+        """
+        Get a user's position on the leaderboard, or None if they have no account.
+        Users with the same net worth share a position.
+
+        Globally, the accounts in richer ranges are summed from net_worth_ranks and only
+        the accounts between the user and the next range are counted from the index, so
+        the cost stays around one range's worth of accounts.
+        """
+        if user_ids is None:
+            query = """
+                SELECT 1 + COALESCE(above.accounts, 0)
+                    + (SELECT COUNT(*) FROM bank other
+                        WHERE other.net_worth > me.net_worth
+                            AND (above.lower IS NULL OR other.net_worth < above.lower))
+                FROM bank me, LATERAL (
+                    SELECT MIN(lower) AS lower, SUM(accounts) AS accounts
+                    FROM net_worth_ranks WHERE lower > me.net_worth
+                ) above
+                WHERE me.user_id = %(user_id)s
+            """
+        else:
+            query = """
+                SELECT 1
+                    + (SELECT COUNT(*) FROM bank other
+                        WHERE other.user_id = ANY(%(user_ids)s::bigint[])
+                            AND other.net_worth > me.net_worth)
+                FROM bank me WHERE me.user_id = %(user_id)s
+            """
+        data = await self._execute(
+            query, {"user_id": user_id, "user_ids": user_ids}, fetch="one"
+        )
+        return int(data[0]) if data else None
+
+    async def account_count(self, user_ids: Optional[List[int]] = None) -> int:
+        """
+        Count the accounts on the leaderboard. The global count is as of the last
+        refresh of the net worth ranges.
+        """
+        if user_ids is None:
+            data = await self._execute(
+                """
+                SELECT COALESCE(
+                    (SELECT SUM(accounts) FROM net_worth_ranks),
+                    (SELECT COUNT(*) FROM bank)
+                )
+                """,
+                fetch="one",
+            )
+        else:
+            data = await self._execute(
+                "SELECT COUNT(*) FROM bank WHERE user_id = ANY(%s::bigint[])",
+                (user_ids,),
+                fetch="one",
+            )
+        return int(data[0])
@@ -0,0 +1,294 @@
+"""
+Economy configuration compiled into ready-to-sample tables, reloadable at runtime
+"""
+
+import asyncio
+import json
+import os
+import random
+import string
+
+from dotenv import load_dotenv
+from os import getenv
+from typing import Any, Dict, NamedTuple, Optional, Sequence, Tuple
+
+from src.utils.errors import InvalidEconomyConfig
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+load_dotenv()
+
+# Economy config file configuration
+ECONOMY_CONFIG = {
+    "path": getenv("ECONOMY_CONFIG_PATH", "./src/json/economy.json"),
+    "poll_interval": float(getenv("ECONOMY_CONFIG_POLL_INTERVAL", 5)),
+}
+
+# Defaults for the optional "beg" section
+BEG_DEFAULTS = {
+    "min_amount": 1,
+    "max_amount": 100,
+    "success_rate": 0.7,
+    # Chance of each quarter of the amount range, lowest first
+    "amount_weights": [40, 30, 20, 10],
+}
+
+
+class AliasTable:
+    """
+    Weighted choice between `len(weights)` outcomes in constant time (Vose's alias
+    method). Built once; sampling draws one index and one float.
+    """
+
+    __slots__ = ("_probability", "_alias")
+
+    def __init__(self, weights: Sequence[float]):
+        count = len(weights)
+        total = float(sum(weights))
+        if count == 0 or total <= 0:
+            raise ValueError("An alias table needs at least one positive weight")
+
+        scaled = [weight * count / total for weight in weights]
+        probability = [1.0] * count
+        alias = list(range(count))
+        small = [i for i, weight in enumerate(scaled) if weight < 1]
+        large = [i for i, weight in enumerate(scaled) if weight >= 1]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            probability[less] = scaled[less]
+            alias[less] = more
+            scaled[more] += scaled[less] - 1
+            (small if scaled[more] < 1 else large).append(more)
+
+        self._probability = tuple(probability)
+        self._alias = tuple(alias)
+
+    def __len__(self) -> int:
+        return len(self._alias)
+
+    def sample(self, rng: random.Random = random) -> int:
+        index = rng.randrange(len(self._alias))
+        if rng.random() < self._probability[index]:
+            return index
+        return self._alias[index]
+
+
+class BegOutcome(NamedTuple):
+    celeb: str
+    message: str
+    # None when begging failed
+    amount: Optional[int]
+
+
+class BegTable(NamedTuple):
+    """
+    Everything `beg` samples from, computed once per config load.
+    """
+
+    celebs: Tuple[str, ...]
+    success_messages: Tuple[str, ...]
+    fail_messages: Tuple[str, ...]
+    success_rate: float
+    amount_ranges: Tuple[Tuple[int, int], ...]
+    amount_table: AliasTable
+
+    def roll(self, rng: random.Random = random) -> BegOutcome:
+        celeb = rng.choice(self.celebs)
+        if rng.random() >= self.success_rate:
+            return BegOutcome(celeb, rng.choice(self.fail_messages), None)
+
+        low, high = self.amount_ranges[self.amount_table.sample(rng)]
+        amount = rng.randint(low, high)
+        return BegOutcome(celeb, rng.choice(self.success_messages), amount)
+
+
+class CompiledEconomyConfig(NamedTuple):
+    beg: BegTable
+    # Modification time and size of the file this was compiled from
+    version: Tuple[float, int]
+
+
+def _messages(data: Dict[str, Any], section: str) -> Tuple[str, ...]:
+    values = data.get(section)
+    if not isinstance(values, dict) or not values:
+        raise InvalidEconomyConfig(f"⛔ | `{section}` must be a non-empty object")
+    for key, value in values.items():
+        if not isinstance(value, str) or not value.strip():
+            raise InvalidEconomyConfig(
+                f"⛔ | `{section}.{key}` must be a non-empty string"
+            )
+    return tuple(values.values())
+
+
+def _check_placeholders(section: str, messages: Tuple[str, ...], allowed: set):
+    for message in messages:
+        try:
+            fields = {
+                field for _, field, _, _ in string.Formatter().parse(message) if field
+            }
+        except ValueError as e:
+            raise InvalidEconomyConfig(f"⛔ | Bad message in `{section}`: {e}")
+        unknown = fields - allowed
+        if unknown:
+            raise InvalidEconomyConfig(
+                f"⛔ | Unknown placeholder {{{unknown.pop()}}} in `{section}`"
+            )
+
+
+def amount_ranges(min_amount: int, max_amount: int) -> Tuple[Tuple[int, int], ...]:
+    """
+    Split the amount range into quarters, each sharing its edges with its neighbours.
+    """
+    span = max_amount - min_amount
+    edges = [min_amount + quarter * span // 4 for quarter in range(4)] + [max_amount]
+    return tuple(zip(edges, edges[1:]))
+
+
+def compile_config(
+    data: Dict[str, Any], version: Tuple[float, int] = (0.0, 0)
+) -> CompiledEconomyConfig:
+    """
+    Validate a parsed economy.json and build its sampling tables.
+    Raises InvalidEconomyConfig describing the first problem found.
+    """
+    if not isinstance(data, dict):
+        raise InvalidEconomyConfig("⛔ | The economy config must be a JSON object")
+
+    celebs = _messages(data, "celebs")
+    success_messages = _messages(data, "beg_success")
+    fail_messages = _messages(data, "beg_failed")
+    _check_placeholders("beg_success", success_messages, {"money"})
+    _check_placeholders("beg_failed", fail_messages, set())
+
+    beg = data.get("beg", {})
+    if not isinstance(beg, dict):
+        raise InvalidEconomyConfig("⛔ | `beg` must be an object")
+    unknown = set(beg) - set(BEG_DEFAULTS)
+    if unknown:
+        raise InvalidEconomyConfig(f"⛔ | Unknown setting `beg.{unknown.pop()}`")
+    beg = {**BEG_DEFAULTS, **beg}
+
+    min_amount, max_amount = beg["min_amount"], beg["max_amount"]
+    if not all(type(amount) is int for amount in (min_amount, max_amount)):
+        raise InvalidEconomyConfig("⛔ | Beg amounts must be whole numbers")
+    if not 0 <= min_amount <= max_amount:
+        raise InvalidEconomyConfig(
+            "⛔ | Beg amounts must satisfy 0 <= min_amount <= max_amount"
+        )
+
+    success_rate = beg["success_rate"]
+    if isinstance(success_rate, bool) or not isinstance(success_rate, (int, float)):
+        raise InvalidEconomyConfig("⛔ | `beg.success_rate` must be a number")
+    if not 0 <= success_rate <= 1:
+        raise InvalidEconomyConfig("⛔ | `beg.success_rate` must be between 0 and 1")
+
+    weights = beg["amount_weights"]
+    if (
+        not isinstance(weights, list)
+        or len(weights) != 4
+        or any(
+            isinstance(weight, bool)
+            or not isinstance(weight, (int, float))
+            or weight < 0
+            for weight in weights
+        )
+        or not sum(weights)
+    ):
+        raise InvalidEconomyConfig(
+            "⛔ | `beg.amount_weights` must be 4 non-negative numbers, not all 0"
+        )
+
+    table = BegTable(
+        celebs=celebs,
+        success_messages=success_messages,
+        fail_messages=fail_messages,
+        success_rate=float(success_rate),
+        amount_ranges=amount_ranges(min_amount, max_amount),
+        amount_table=AliasTable(weights),
+    )
+    return CompiledEconomyConfig(beg=table, version=version)
+
+
+class EconomyConfigLoader:
+    """
+    Holds the compiled economy config and swaps in a new one when the file changes.
+
+    Readers take `current` once per command and keep using that object, so a reload
+    never shows them half of an old config and half of a new one. A file that fails to
+    parse or validate is logged and the previous config stays in place. The file is
+    checked for changes every `poll_interval` seconds by its modification time and size.
+    """
+
+    def __init__(
+        self,
+        path: str = ECONOMY_CONFIG["path"],
+        poll_interval: float = ECONOMY_CONFIG["poll_interval"],
+    ):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.current: Optional[CompiledEconomyConfig] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def _version(self) -> Tuple[float, int]:
+        stat = os.stat(self.path)
+        return (stat.st_mtime, stat.st_size)
+
+    def load(self) -> CompiledEconomyConfig:
+        """
+        Read, validate and swap in the config file.
+        Raises InvalidEconomyConfig if it can't be used; the current config is kept.
+        """
+        try:
+            version = self._version()
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            raise InvalidEconomyConfig(f"⛔ | `{self.path}` doesn't exist")
+        except json.JSONDecodeError as e:
+            raise InvalidEconomyConfig(f"⛔ | `{self.path}` isn't valid JSON: {e}")
+
+        compiled = compile_config(data, version)
+        self.current = compiled
+        return compiled
+
+    def start(self):
+        try:
+            self.load()
+        except InvalidEconomyConfig as e:
+            logger.error(f"Economy config couldn't be loaded: {e}")
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._watch_loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def changed(self) -> bool:
+        try:
+            version = self._version()
+        except OSError:
+            return False
+        return self.current is None or version != self.current.version
+
+    async def _watch_loop(self):
+        failed_version = None
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if not self.changed():
+                continue
+            version = None
+            try:
+                version = self._version()
+                if version == failed_version:
+                    continue
+                self.load()
+                failed_version = None
+                logger.info("Economy config reloaded")
+            except (InvalidEconomyConfig, OSError) as e:
+                failed_version = version
+                logger.error(f"Economy config change ignored: {e}")
@@ -19,6 +19,34 @@ class EconomyError(WeeabooError):
     pass
 
 
+class DatabaseError(WeeabooError):
+    """Raised when a database related error happens"""
+
+    pass
+
+
+class PoolTimeout(DatabaseError):
+    """Raised when no pooled database connection frees up in time"""
+
+    def __init__(
+        self,
+        message="⏳ | The database is busy right now, please try again in a moment.",
+        *args
+    ):
+        super().__init__(message, *args)
+
+
+class QueryFailed(DatabaseError):
+    """Raised when a database query or transaction fails"""
+
+    def __init__(
+        self,
+        message="⛔ | Something went wrong talking to the database, please try again later.",
+        *args
+    ):
+        super().__init__(message, *args)
+
+
 class PlayerIsNotAvailable(MusicError):
     """Raised when the Lavalink Player is Not connected to a Voice Channel"""
 
@@ -49,3 +77,10 @@ class AccountNotFound(EconomyError):
         *args
     ):
         super().__init__(message, *args)
+
+
+class InvalidEconomyConfig(EconomyError):
+    """Raised when the economy config file can't be loaded or fails validation"""
+
+    def __init__(self, message="⛔ | The economy config is invalid", *args):
+        super().__init__(message, *args)
@@ -0,0 +1,89 @@
+"""
+Disconnects music players that have been idle for too long
+"""
+
+import asyncio
+import time
+
+from typing import Dict, Optional
+
+import wavelink
+
+from discord.ext import commands
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+class IdleManager:
+    """
+    Tracks when each guild's player went idle and disconnects it once it stays idle for
+    `timeout` seconds.
+
+    Arming and cancelling a timer is a dict write. A single task sweeps every guild each
+    `interval` seconds, and re-checks that a player is still idle before disconnecting it.
+    """
+
+    def __init__(self, bot: commands.Bot, timeout: float = 120, interval: float = 10):
+        self.bot = bot
+        self.timeout = timeout
+        self.interval = interval
+        self.deadlines: Dict[int, float] = {}
+
+        self._sweeper: Optional[asyncio.Task] = None
+
+    def arm(self, guild_id: int):
+        """
+        Start the idle timer for a guild, keeping an earlier deadline if one is armed.
+        """
+        self.deadlines.setdefault(guild_id, time.monotonic() + self.timeout)
+
+    def cancel(self, guild_id: int):
+        """
+        Cancel the idle timer for a guild.
+        """
+        self.deadlines.pop(guild_id, None)
+
+    def start(self):
+        if self._sweeper is None or self._sweeper.done():
+            self._sweeper = asyncio.create_task(self._sweep_loop())
+
+    async def stop(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+    async def sweep(self):
+        """
+        Disconnect every player whose idle timer ran out.
+        """
+        now = time.monotonic()
+        expired = [
+            guild_id for guild_id, deadline in self.deadlines.items() if deadline <= now
+        ]
+        for guild_id in expired:
+            del self.deadlines[guild_id]
+
+            guild = self.bot.get_guild(guild_id)
+            player = guild.voice_client if guild else None
+            if not isinstance(player, wavelink.Player):
+                continue
+            if player.playing or not player.queue.is_empty:
+                continue
+
+            try:
+                await player.disconnect()
+            except Exception as e:
+                logger.warning(f"Failed to disconnect idle player in {guild_id}: {e}")
+
+    async def _sweep_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                logger.error(f"Idle player sweep failed: {e}")
@@ -0,0 +1,177 @@
+"""
+Background ingestion of large playlists into a player's queue
+"""
+
+import asyncio
+import time
+
+from dotenv import load_dotenv
+from os import getenv
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import wavelink
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+load_dotenv()
+
+# Playlist ingestion configuration
+INGEST_CONFIG = {
+    "max_queue": int(getenv("MUSIC_MAX_QUEUE", 2000)),
+    "batch_size": int(getenv("MUSIC_INGEST_BATCH", 100)),
+}
+
+ProgressCallback = Callable[["IngestJob", bool], Awaitable[None]]
+
+
+class IngestJob:
+    """
+    Progress of one playlist being added to a queue.
+    """
+
+    def __init__(self, name: str, total: int):
+        self.name = name
+        self.total = total
+        self.added = 0
+        self.duplicates = 0
+        self.truncated = 0
+        self.done = False
+
+    @property
+    def processed(self) -> int:
+        return self.added + self.duplicates + self.truncated
+
+
+class PlaylistIngestor:
+    """
+    Appends playlists to queues in batches of `batch_size`, yielding to the event loop
+    between batches, so playback can start on the first track right away.
+
+    Queues are capped at `max_queue` tracks; whatever doesn't fit is counted as
+    truncated. With `dedup`, tracks already queued, playing or earlier in the same
+    playlist are left out. Each guild has at most one ingestion running, and starting a
+    new one waits for the previous one to finish so playlists keep their order.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = INGEST_CONFIG["max_queue"],
+        batch_size: int = INGEST_CONFIG["batch_size"],
+        progress_interval: float = 2.0,
+    ):
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.progress_interval = progress_interval
+        self._tasks: Dict[int, asyncio.Task] = {}
+
+    def space(self, player: wavelink.Player) -> int:
+        return max(0, self.max_queue - len(player.queue))
+
+    @staticmethod
+    def track_key(track: wavelink.Playable) -> str:
+        return f"{track.source}:{track.identifier}"
+
+    def is_queued(self, player: wavelink.Player, track: wavelink.Playable) -> bool:
+        key = self.track_key(track)
+        if player.current and self.track_key(player.current) == key:
+            return True
+        return any(self.track_key(queued) == key for queued in player.queue)
+
+    def start(
+        self,
+        player: wavelink.Player,
+        name: str,
+        tracks: List[wavelink.Playable],
+        dedup: bool = False,
+        on_progress: Optional[ProgressCallback] = None,
+        on_batch: Optional[Callable[[], None]] = None,
+    ) -> IngestJob:
+        """
+        Start adding tracks to a player's queue in the background.
+        `on_progress` is awaited at most every `progress_interval` seconds and once at the end.
+        """
+        job = IngestJob(name, len(tracks))
+        guild_id = player.guild.id
+        previous = self._tasks.get(guild_id)
+        task = asyncio.create_task(
+            self._ingest(previous, player, job, tracks, dedup, on_progress, on_batch)
+        )
+        self._tasks[guild_id] = task
+        task.add_done_callback(lambda _: self._forget(guild_id, task))
+        return job
+
+    def cancel(self, guild_id: int):
+        task = self._tasks.pop(guild_id, None)
+        if task is not None:
+            task.cancel()
+
+    async def stop(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _ingest(
+        self,
+        previous: Optional[asyncio.Task],
+        player: wavelink.Player,
+        job: IngestJob,
+        tracks: List[wavelink.Playable],
+        dedup: bool,
+        on_progress: Optional[ProgressCallback],
+        on_batch: Optional[Callable[[], None]],
+    ):
+        if previous is not None and not previous.done():
+            await asyncio.gather(previous, return_exceptions=True)
+
+        seen = set()
+        if dedup:
+            seen.update(self.track_key(track) for track in player.queue)
+            if player.current:
+                seen.add(self.track_key(player.current))
+
+        last_progress = time.monotonic()
+        for start in range(0, len(tracks), self.batch_size):
+            end = start + self.batch_size
+            batch = []
+            for track in tracks[start:end]:
+                if dedup:
+                    key = self.track_key(track)
+                    if key in seen:
+                        job.duplicates += 1
+                        continue
+                    seen.add(key)
+                batch.append(track)
+
+            space = self.space(player)
+            job.truncated += max(0, len(batch) - space)
+            batch = batch[:space]
+            if batch:
+                player.queue.put(batch)
+                job.added += len(batch)
+                if on_batch is not None:
+                    on_batch()
+
+            if on_progress is not None and (
+                time.monotonic() - last_progress >= self.progress_interval
+            ):
+                last_progress = time.monotonic()
+                await self._report(on_progress, job, False)
+            await asyncio.sleep(0)
+
+        job.done = True
+        if on_progress is not None:
+            await self._report(on_progress, job, True)
+
+    @staticmethod
+    async def _report(on_progress: ProgressCallback, job: IngestJob, done: bool):
+        try:
+            await on_progress(job, done)
+        except Exception as e:
+            logger.warning(f"Failed to report playlist progress: {e}")
+
+    def _forget(self, guild_id: int, task: asyncio.Task):
+        if self._tasks.get(guild_id) is task:
+            del self._tasks[guild_id]
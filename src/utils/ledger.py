@@ -0,0 +1,297 @@
+"""
+Append-only ledger of balance changes, written in batches and folded into the bank table
+"""
+
+import asyncio
+
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from dotenv import load_dotenv
+from os import getenv
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from src.utils.database import DatabaseUtils, PooledConnection
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+load_dotenv()
+
+# Ledger write-behind and compaction configuration
+LEDGER_CONFIG = {
+    "flush_interval": float(getenv("LEDGER_FLUSH_INTERVAL", 2)),
+    "max_pending": int(getenv("LEDGER_MAX_PENDING", 500)),
+    "compact_interval": float(getenv("LEDGER_COMPACT_INTERVAL", 60)),
+    "compact_batch": int(getenv("LEDGER_COMPACT_BATCH", 500)),
+}
+
+
+class LedgerEntry(NamedTuple):
+    user_id: int
+    wallet_delta: int
+    bank_delta: int
+    reason: str
+    created_at: datetime
+
+
+class Ledger:
+    """
+    Every balance change is recorded in the `ledger` table, which is only ever appended
+    to, and the bank table holds the balances its entries add up to.
+
+    Wallet credits (money the user can't lose by receiving, like begging) don't touch
+    the bank row at all: they are buffered in memory and appended as deferred entries in
+    one INSERT every `flush_interval` seconds, or sooner once `max_pending` entries are
+    waiting. A deferred entry is folded into the bank row by the next change to that
+    row, or by the compaction job every `compact_interval` seconds.
+
+    Instead of marking entries, each bank row keeps a watermark, `ledger_xmin`: the
+    deferred entries written by transactions from it on aren't in the row yet. Folding
+    only takes entries from transactions older than every transaction still running
+    (the snapshot's xmin) and moves the watermark there, so an entry that commits late
+    is never skipped and never folded twice. A balance is the bank row plus its
+    unsettled and buffered credits.
+
+    Every other change updates the bank row at once, folding its unsettled credits in
+    the same statement, and is appended already applied.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = LEDGER_CONFIG["flush_interval"],
+        max_pending: int = LEDGER_CONFIG["max_pending"],
+        compact_interval: float = LEDGER_CONFIG["compact_interval"],
+        compact_batch: int = LEDGER_CONFIG["compact_batch"],
+    ):
+        self.flush_interval = flush_interval
+        self.max_pending = max(1, max_pending)
+        self.compact_interval = compact_interval
+        self.compact_batch = compact_batch
+
+        self.pending: List[LedgerEntry] = []
+        # Buffered wallet credits per user, added to balances read from the database
+        self.pending_wallet: Dict[int, int] = {}
+
+        # Reads in `reading()` and flushes never overlap, see `reading()`
+        self._readers = 0
+        self._no_readers = asyncio.Event()
+        self._no_readers.set()
+        self._not_flushing = asyncio.Event()
+        self._not_flushing.set()
+
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._flusher: Optional[asyncio.Task] = None
+        self._compactor: Optional[asyncio.Task] = None
+
+    def credit(self, user_id: int, amount: int, reason: str):
+        """
+        Queue a wallet credit for the next flush.
+        """
+        self.pending.append(
+            LedgerEntry(user_id, amount, 0, reason, datetime.now(timezone.utc))
+        )
+        self.pending_wallet[user_id] = self.pending_wallet.get(user_id, 0) + amount
+        if len(self.pending) >= self.max_pending:
+            self._wakeup.set()
+
+    @asynccontextmanager
+    async def reading(self):
+        """
+        Async context manager for reads that add `pending_wallet` to what they read
+        from the ledger. No flush runs while one is open, so a buffered credit is
+        counted either from the database or from memory, never both or neither.
+        """
+        while not self._not_flushing.is_set():
+            await self._not_flushing.wait()
+        self._readers += 1
+        self._no_readers.clear()
+        try:
+            yield
+        finally:
+            self._readers -= 1
+            if not self._readers:
+                self._no_readers.set()
+
+    def start(self):
+        """
+        Start the background flusher and compaction job.
+        """
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+        if self._compactor is None or self._compactor.done():
+            self._compactor = asyncio.create_task(self._compact_loop())
+
+    async def stop(self):
+        """
+        Stop the background tasks and write every buffered entry.
+        """
+        for task in (self._flusher, self._compactor):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._flusher = self._compactor = None
+        await self.flush()
+
+    async def flush(self):
+        """
+        Append every buffered entry to the ledger in a single INSERT.
+        Entries that fail to write stay buffered for the next flush.
+        """
+        async with self._flush_lock:
+            if not self.pending:
+                return
+
+            # New reads wait for the flush, which waits for the reads already running
+            self._not_flushing.clear()
+            try:
+                while self._readers:
+                    await self._no_readers.wait()
+
+                batch, self.pending = self.pending, []
+                try:
+                    await DatabaseUtils.execute(
+                        """
+                        INSERT INTO ledger (
+                            user_id, wallet_delta, bank_delta, reason, created_at, deferred
+                        )
+                        SELECT *, TRUE FROM unnest(
+                            %s::bigint[], %s::bigint[], %s::bigint[], %s::text[],
+                            %s::timestamptz[]
+                        )
+                        """,
+                        [list(column) for column in zip(*batch)],
+                    )
+                except Exception:
+                    self.pending = batch + self.pending
+                    raise
+
+                for entry in batch:
+                    remaining = self.pending_wallet[entry.user_id] - entry.wallet_delta
+                    if remaining:
+                        self.pending_wallet[entry.user_id] = remaining
+                    else:
+                        del self.pending_wallet[entry.user_id]
+            finally:
+                self._not_flushing.set()
+
+    @staticmethod
+    async def settle(conn: PooledConnection, user_ids: Sequence[int]) -> List[tuple]:
+        """
+        Fold the unsettled entries of users whose bank rows `conn` has locked into
+        those rows. Returns their (user_id, wallet, bank, maxbank) rows.
+
+        The rows must be locked by an earlier statement, so this one's snapshot already
+        sees the watermarks any concurrent fold left behind.
+        """
+        return await conn.execute(
+            """
+            WITH horizon AS (
+                SELECT pg_snapshot_xmin(pg_current_snapshot()) AS xmin
+            )
+            UPDATE bank SET
+                wallet = wallet
+                    + ledger_unsettled_wallet(user_id, ledger_xmin, horizon.xmin),
+                ledger_xmin = GREATEST(ledger_xmin, horizon.xmin)
+            FROM horizon
+            WHERE user_id = ANY(%s::bigint[])
+            RETURNING user_id, wallet, bank, maxbank
+            """,
+            (list(user_ids),),
+            fetch="all",
+        )
+
+    async def compact(self) -> int:
+        """
+        Fold every unsettled entry written since the last compaction into the bank
+        table, `compact_batch` users per transaction. Returns the number of users whose
+        balances were folded.
+        """
+        horizon, user_ids = await DatabaseUtils.execute(
+            """
+            WITH horizon AS (
+                SELECT pg_snapshot_xmin(pg_current_snapshot()) AS xmin
+            )
+            SELECT horizon.xmin, ARRAY(
+                SELECT DISTINCT user_id FROM ledger, ledger_compaction
+                WHERE deferred AND created_xid >= ledger_compaction.compacted_xmin
+                    AND created_xid < horizon.xmin
+                ORDER BY user_id
+            )
+            FROM horizon
+            """,
+            fetch="one",
+        )
+        for start in range(0, len(user_ids), self.compact_batch):
+            end = start + self.compact_batch
+            batch = user_ids[start:end]
+            async with DatabaseUtils.transaction() as conn:
+                # Credited users may not have an account yet
+                await conn.execute(
+                    """
+                    INSERT INTO bank (user_id)
+                    SELECT user_id FROM unnest(%s::bigint[]) AS user_id
+                    ORDER BY user_id
+                    ON CONFLICT (user_id) DO NOTHING
+                    """,
+                    (batch,),
+                )
+                await conn.execute(
+                    """
+                    SELECT 1 FROM bank WHERE user_id = ANY(%s::bigint[])
+                    ORDER BY user_id
+                    FOR UPDATE
+                    """,
+                    (batch,),
+                    fetch="all",
+                )
+                await self.settle(conn, batch)
+
+        await DatabaseUtils.execute(
+            """
+            UPDATE ledger_compaction
+            SET compacted_xmin = GREATEST(compacted_xmin, %s::xid8)
+            """,
+            (horizon,),
+        )
+        return len(user_ids)
+
+    async def history(self, user_id: int, limit: int) -> List[LedgerEntry]:
+        """
+        Get a user's most recent ledger entries, newest first, buffered ones included.
+        """
+        async with self.reading():
+            rows = await DatabaseUtils.execute(
+                """
+                SELECT user_id, wallet_delta, bank_delta, reason, created_at FROM ledger
+                WHERE user_id = %s ORDER BY id DESC LIMIT %s
+                """,
+                (user_id, limit),
+                fetch="all",
+            )
+            buffered = [entry for entry in self.pending if entry.user_id == user_id]
+        entries = buffered[::-1] + [LedgerEntry(*row) for row in rows]
+        return entries[:limit]
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Failed to flush the ledger: {e}")
+
+    async def _compact_loop(self):
+        while True:
+            await asyncio.sleep(self.compact_interval)
+            try:
+                await self.compact()
+            except Exception as e:
+                logger.error(f"Failed to compact the ledger: {e}")
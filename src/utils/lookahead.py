@@ -0,0 +1,125 @@
+"""
+Background validation of the tracks a music player is about to reach
+"""
+
+import asyncio
+
+from typing import Callable, Dict, Optional
+
+import wavelink
+
+from src.utils.cache import LRUCache, MISSING
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+class TrackLookahead:
+    """
+    Checks the next `depth` queued tracks of a player ahead of time and drops the ones
+    Lavalink can no longer load (removed or private videos, expired links), so a dead
+    track never stalls the transition when it is reached.
+
+    A check reloads the track's URI through Lavalink. Results are remembered by the
+    track's encoded form for `ttl` seconds, so each track is checked at most once in that
+    window no matter how many guilds queue it. Checks that fail because of the node
+    rather than the track are retried after `retry_ttl` seconds. `on_drop` is called
+    with the player whenever a track is taken out of its queue.
+    """
+
+    def __init__(
+        self,
+        depth: int = 3,
+        ttl: float = 1800,
+        retry_ttl: float = 60,
+        maxsize: int = 50_000,
+        on_drop: Optional[Callable[[wavelink.Player], None]] = None,
+    ):
+        self.depth = depth
+        self.retry_ttl = retry_ttl
+        self.checked = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.skipped = 0
+        self.on_drop = on_drop
+
+        self._tasks: Dict[int, asyncio.Task] = {}
+
+    def needs_check(self, track: wavelink.Playable) -> bool:
+        if track.is_stream or not track.uri:
+            return False
+        return self.checked.get(track.encoded, MISSING) is MISSING
+
+    def schedule(self, player: wavelink.Player):
+        """
+        Start checking the upcoming tracks of a player, unless a check is already running.
+        """
+        guild_id = player.guild.id
+        task = self._tasks.get(guild_id)
+        if task is not None and not task.done():
+            return
+        task = asyncio.create_task(self._run(player))
+        self._tasks[guild_id] = task
+        task.add_done_callback(lambda _: self._forget(guild_id, task))
+
+    def cancel(self, guild_id: int):
+        task = self._tasks.pop(guild_id, None)
+        if task is not None:
+            task.cancel()
+
+    async def stop(self):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def resolve(self, track: wavelink.Playable) -> Optional[bool]:
+        """
+        Whether Lavalink can still load a track, or None if that couldn't be determined.
+        """
+        try:
+            result = await wavelink.Pool.fetch_tracks(track.uri)
+        except wavelink.LavalinkLoadException:
+            return False
+        except Exception as e:
+            logger.warning(f"Failed to check track {track.identifier}: {e}")
+            return None
+        return bool(result)
+
+    async def _run(self, player: wavelink.Player):
+        while player.connected:
+            upcoming = [
+                track for track in player.queue[: self.depth] if self.needs_check(track)
+            ]
+            if not upcoming:
+                return
+
+            track = upcoming[0]
+            alive = await self.resolve(track)
+            if alive is None:
+                self.checked.put(track.encoded, True, ttl=self.retry_ttl)
+            elif alive:
+                self.checked.put(track.encoded, True)
+            else:
+                self.checked.put(track.encoded, False)
+                self._drop(player, track)
+
+    def _drop(self, player: wavelink.Player, track: wavelink.Playable):
+        if not player.queue.remove(track):
+            # The track was played or removed while it was being checked
+            return
+        self.skipped += 1
+        if self.on_drop is not None:
+            self.on_drop(player)
+        logger.info(
+            f"Skipped unavailable track {track.identifier} in {player.guild.id}"
+        )
+
+    def _forget(self, guild_id: int, task: asyncio.Task):
+        if self._tasks.get(guild_id) is task:
+            del self._tasks[guild_id]
+
+    def is_dead(self, track: wavelink.Playable) -> bool:
+        """
+        Whether a track is already known to be unavailable.
+        """
+        return self.checked.get(track.encoded, MISSING) is False
@@ -0,0 +1,164 @@
+"""
+Lyrics lookups through Genius, cached on disk and run off the event loop
+"""
+
+import asyncio
+import re
+
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+from os import getenv
+from typing import Dict, List, Optional
+
+import lyricsgenius
+
+from src.utils.cache import MISSING
+from src.utils.disk_cache import DiskLRUCache
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+load_dotenv()
+
+# Lyrics configuration
+LYRICS_CONFIG = {
+    "token": getenv("GENIUS_TOKEN"),
+    "cache_path": getenv("LYRICS_CACHE_PATH", "./cache/lyrics.sqlite3"),
+    "cache_mb": float(getenv("LYRICS_CACHE_MB", 64)),
+    "negative_ttl": float(getenv("LYRICS_CACHE_NEGATIVE_TTL", 24 * 3600)),
+}
+
+# Decorations video titles carry that aren't part of the song's name
+TITLE_NOISE = re.compile(
+    r"\s*[\(\[][^\)\]]*\b(official|video|audio|lyrics?|visualizer|remaster(ed)?|hd|4k|mv)\b[^\)\]]*[\)\]]"
+    r"|\s*[\(\[]\s*(feat|ft)\.?\s[^\)\]]*[\)\]]"
+    r"|\s+-\s+((\d{4}\s+)?(digital(ly)?\s+)?remaster(ed)?\b.*|radio edit|single version)$"
+    r"|\s*\b(feat|ft)\.?\s((?!\s-\s).)*",
+    re.IGNORECASE,
+)
+ARTIST_NOISE = re.compile(r"\s*(-\s*topic|vevo|official)$", re.IGNORECASE)
+# Channels that only upload other artists' songs under the artist's name
+ARTIST_CHANNEL = re.compile(r"(-\s*topic|vevo)$", re.IGNORECASE)
+
+
+def split_lyrics(lyrics: str, limit: int = 1500) -> List[str]:
+    """
+    Split lyrics into pages of at most `limit` characters, breaking between lines.
+    """
+    pages = []
+    page = ""
+    for line in lyrics.splitlines():
+        while len(line) > limit:
+            if page:
+                pages.append(page)
+                page = ""
+            pages.append(line[:limit])
+            line = line[limit:]
+        candidate = f"{page}\n{line}" if page else line
+        if len(candidate) > limit:
+            pages.append(page)
+            page = line
+        else:
+            page = candidate
+    if page.strip():
+        pages.append(page)
+    return pages
+
+
+class LyricsService:
+    """
+    Looks up lyrics on Genius.
+
+    The Genius client is blocking, so lookups run on a small thread pool of their own
+    and never on the event loop. Results are cached on disk under a normalized
+    "artist|title" key; songs Genius doesn't know are cached for `negative_ttl` seconds
+    so they aren't looked up on every request. Identical lookups in flight share a
+    single request.
+    """
+
+    def __init__(
+        self,
+        token: Optional[str] = LYRICS_CONFIG["token"],
+        cache_path: str = LYRICS_CONFIG["cache_path"],
+        cache_mb: float = LYRICS_CONFIG["cache_mb"],
+        negative_ttl: float = LYRICS_CONFIG["negative_ttl"],
+        workers: int = 2,
+    ):
+        self.genius = (
+            lyricsgenius.Genius(token, timeout=10, retries=1, verbose=False)
+            if token
+            else None
+        )
+        self.cache = DiskLRUCache(cache_path, maxbytes=int(cache_mb * 1024 * 1024))
+        self.negative_ttl = negative_ttl
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="lyrics"
+        )
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @property
+    def available(self) -> bool:
+        return self.genius is not None
+
+    @staticmethod
+    def normalize(title: str, artist: str) -> str:
+        def clean(text: str) -> str:
+            return " ".join(text.casefold().split())
+
+        title = TITLE_NOISE.sub("", title)
+        channel = ARTIST_NOISE.sub("", artist)
+        # "Artist - Title" uploads name the artist in the title. Anything else before a
+        # dash is part of the title, like "Song - Part 2"
+        if " - " in title:
+            named, rest = title.split(" - ", 1)
+            named = TITLE_NOISE.sub("", named)
+            if clean(named) == clean(channel) or ARTIST_CHANNEL.search(artist.strip()):
+                channel, title = named, rest
+        return f"{clean(channel)}|{clean(title)}"
+
+    async def run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    async def fetch(self, title: str, artist: str) -> Optional[str]:
+        """
+        Get the lyrics of a song, or None if Genius doesn't have them.
+        """
+        key = self.normalize(title, artist)
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            lyrics = await self.run(self._lookup, key)
+            future.set_result(lyrics)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+        return lyrics
+
+    def _lookup(self, key: str) -> Optional[str]:
+        cached = self.cache.get(key, MISSING)
+        if cached is not MISSING:
+            return cached or None
+
+        artist, title = key.split("|", 1)
+        song = self.genius.search_song(title, artist, get_full_info=False)
+        lyrics = song.lyrics.strip() if song and song.lyrics else ""
+        if lyrics:
+            self.cache.put(key, lyrics)
+        else:
+            self.cache.put(key, "", ttl=self.negative_ttl)
+        return lyrics or None
+
+    async def close(self):
+        await self.run(self.cache.close)
+        self._executor.shutdown(wait=False, cancel_futures=True)
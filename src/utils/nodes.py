@@ -0,0 +1,261 @@
+"""
+Load-aware selection, draining and failover across several Lavalink nodes
+"""
+
+import asyncio
+import time
+
+from dotenv import load_dotenv
+from os import getenv
+from typing import Dict, List, Optional, Set
+
+import discord
+import wavelink
+
+from src.utils.logger import setup_logger
+from src.utils.player_state import PlayerSnapshot
+
+logger = setup_logger()
+load_dotenv()
+
+# Node balancer configuration
+NODE_CONFIG = {
+    "stats_interval": float(getenv("LAVALINK_STATS_INTERVAL", 30)),
+    "failover_grace": float(getenv("LAVALINK_FAILOVER_GRACE", 15)),
+}
+
+
+def parse_nodes(value: Optional[str]) -> List[dict]:
+    """
+    Parse `LAVALINK_NODES`, a comma separated list of `name=uri|password` entries.
+    The `name=` prefix is optional and defaults to the node's position in the list.
+    """
+    nodes = []
+    for index, entry in enumerate(
+        filter(None, map(str.strip, (value or "").split(",")))
+    ):
+        name, _, address = entry.rpartition("=")
+        uri, _, password = address.partition("|")
+        if not uri or not password:
+            logger.warning(f"Ignoring malformed Lavalink node entry: {entry}")
+            continue
+        nodes.append(
+            {"identifier": name or f"node-{index}", "uri": uri, "password": password}
+        )
+    return nodes
+
+
+def node_configs() -> List[dict]:
+    """
+    Lavalink nodes from `LAVALINK_NODES`, falling back to the single
+    `LAVALINK_URL` / `LAVALINK_PASSWORD` node.
+    """
+    nodes = parse_nodes(getenv("LAVALINK_NODES"))
+    if not nodes and getenv("LAVALINK_URL") and getenv("LAVALINK_PASSWORD"):
+        nodes.append(
+            {
+                "identifier": "main",
+                "uri": getenv("LAVALINK_URL"),
+                "password": getenv("LAVALINK_PASSWORD"),
+            }
+        )
+    return nodes
+
+
+class NodeBalancer:
+    """
+    Picks the least loaded Lavalink node for each new player.
+
+    Every `stats_interval` seconds the stats of each connected node are polled and
+    turned into a penalty score: the number of players, plus a CPU penalty that grows
+    exponentially with load, plus a penalty for missing or nulled audio frames when the
+    node reports them. Drained nodes keep their players but get no new ones, and
+    players on a node that stays disconnected for `failover_grace` seconds are moved to
+    another node with their queue and position.
+    """
+
+    def __init__(
+        self,
+        client: discord.Client,
+        stats_interval: float = NODE_CONFIG["stats_interval"],
+        failover_grace: float = NODE_CONFIG["failover_grace"],
+    ):
+        self.client = client
+        self.stats_interval = stats_interval
+        self.failover_grace = failover_grace
+
+        self.penalties: Dict[str, float] = {}
+        self.stats: Dict[str, wavelink.StatsResponsePayload] = {}
+        self.drained: Set[str] = set()
+        self.down_since: Dict[str, float] = {}
+
+        self._monitor: Optional[asyncio.Task] = None
+        self._migrating: Dict[int, asyncio.Task] = {}
+
+    @staticmethod
+    def penalty(stats: wavelink.StatsResponsePayload) -> float:
+        score = stats.players
+        score += 1.05 ** (100 * stats.cpu.system_load) * 10 - 10
+        if stats.frames is not None and stats.frames.sent >= 0:
+            # Frame counts are per minute, 3000 frames being a full minute of audio
+            score += 1.03 ** (500 * max(stats.frames.deficit, 0) / 3000) * 600 - 600
+            score += (1.03 ** (500 * stats.frames.nulled / 3000) * 300 - 300) * 2
+        return score
+
+    def available(self) -> List[wavelink.Node]:
+        return [
+            node
+            for node in wavelink.Pool.nodes.values()
+            if node.status is wavelink.NodeStatus.CONNECTED
+            and node.identifier not in self.drained
+        ]
+
+    def score(self, node: wavelink.Node) -> float:
+        # Players connected since the last poll are counted straight away
+        known = self.stats.get(node.identifier)
+        base = self.penalties.get(node.identifier, 0.0)
+        return base - (known.players if known else 0) + len(node.players)
+
+    def best_node(self) -> Optional[wavelink.Node]:
+        """
+        The connected, undrained node with the lowest penalty score.
+        """
+        nodes = self.available()
+        if not nodes:
+            return None
+        return min(nodes, key=self.score)
+
+    async def drain(self, identifier: str, migrate: bool = False) -> int:
+        """
+        Stop sending new players to a node, optionally moving its current ones off.
+        Returns the number of players being migrated.
+        """
+        self.drained.add(identifier)
+        if not migrate:
+            return 0
+        return self.migrate_from(identifier)
+
+    def undrain(self, identifier: str):
+        self.drained.discard(identifier)
+
+    def start(self):
+        if self._monitor is None or self._monitor.done():
+            self._monitor = asyncio.create_task(self._monitor_loop())
+
+    async def stop(self):
+        tasks = [task for task in (self._monitor, *self._migrating.values()) if task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._monitor = None
+        self._migrating.clear()
+
+    async def poll(self):
+        """
+        Refresh the stats and penalty of every node and fail over dead ones.
+        """
+        now = time.monotonic()
+        for identifier, node in wavelink.Pool.nodes.items():
+            if node.status is not wavelink.NodeStatus.CONNECTED:
+                self.penalties.pop(identifier, None)
+                self.stats.pop(identifier, None)
+                since = self.down_since.setdefault(identifier, now)
+                if node.players and now - since >= self.failover_grace:
+                    self.migrate_from(identifier)
+                continue
+
+            self.down_since.pop(identifier, None)
+            try:
+                stats = await node.fetch_stats()
+            except Exception as e:
+                logger.warning(f"Failed to fetch stats for node {identifier}: {e}")
+                continue
+            self.stats[identifier] = stats
+            self.penalties[identifier] = self.penalty(stats)
+
+    def migrate_from(self, identifier: str, exclude_source: bool = True) -> int:
+        """
+        Start moving every player on a node to the best other node.
+        With `exclude_source=False` players may be rebuilt on the same node, which is
+        how players that a restarted node forgot about are recovered.
+        """
+        node = wavelink.Pool.nodes.get(identifier)
+        if node is None:
+            return 0
+
+        players = [
+            p for p in node.players.values() if p.guild.id not in self._migrating
+        ]
+        for player in players:
+            task = asyncio.create_task(
+                self.migrate(player, exclude_source=exclude_source)
+            )
+            self._migrating[player.guild.id] = task
+            task.add_done_callback(
+                lambda _, guild_id=player.guild.id: self._migrating.pop(guild_id, None)
+            )
+        return len(players)
+
+    async def migrate(
+        self,
+        player: wavelink.Player,
+        snapshot: Optional[PlayerSnapshot] = None,
+        exclude_source: bool = True,
+    ) -> Optional[wavelink.Player]:
+        """
+        Move a player to the best other node, keeping its queue and position.
+        """
+        if snapshot is None:
+            if player.channel is None:
+                return None
+            snapshot = PlayerSnapshot.capture(player)
+
+        source = player.node.identifier
+        target = self.best_node()
+        if target is None or (exclude_source and target.identifier == source):
+            logger.warning(f"No node to migrate player {snapshot.guild_id} to")
+            return None
+
+        guild = player.guild
+        try:
+            await player.disconnect()
+        except Exception:
+            # The old node is usually unreachable, the voice state is reset below
+            pass
+        await guild.change_voice_state(channel=None)
+
+        try:
+            new_player = await snapshot.reconnect(self.client, cls=BalancedPlayer)
+        except Exception as e:
+            logger.error(f"Failed to migrate player {snapshot.guild_id}: {e}")
+            return None
+
+        if new_player is not None:
+            logger.info(
+                f"Migrated player {snapshot.guild_id} from {source} to {new_player.node.identifier}"
+            )
+        return new_player
+
+    async def _monitor_loop(self):
+        while True:
+            try:
+                await self.poll()
+            except Exception as e:
+                logger.error(f"Lavalink node poll failed: {e}")
+            await asyncio.sleep(self.stats_interval)
+
+
+class BalancedPlayer(wavelink.Player):
+    """
+    Player that connects to the node picked by the active `NodeBalancer`.
+    """
+
+    balancer: Optional[NodeBalancer] = None
+
+    def __init__(
+        self, client=discord.utils.MISSING, channel=discord.utils.MISSING, *, nodes=None
+    ):
+        if nodes is None and self.balancer is not None:
+            best = self.balancer.best_node()
+            nodes = [best] if best else None
+        super().__init__(client, channel, nodes=nodes)
@@ -0,0 +1,200 @@
+"""
+One live now-playing message per guild, edited in place as the player changes
+"""
+
+import asyncio
+
+from collections import defaultdict
+from typing import Dict, Optional
+
+import discord
+import wavelink
+
+from discord.ext import commands
+from src.utils.embeds import EmbedUtils
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+
+
+def format_duration(milliseconds: int) -> str:
+    total_seconds = int(milliseconds // 1000)
+    hours = total_seconds // 3600
+    minutes = (total_seconds % 3600) // 60
+    seconds = total_seconds % 60
+    if hours > 0:
+        return f"{hours:01}:{minutes:02}:{seconds:02}"
+    return f"{minutes:02}:{seconds:02}"
+
+
+def progress_bar(position: int, duration: int, length: int = 15) -> str:
+    progress = position / duration if duration else 0
+    pos = min(int(progress * length), length - 1)
+    return "━" * pos + "●" + "─" * (length - pos - 1)
+
+
+class NowPlayingBoard:
+    """
+    Keeps a single now-playing message per guild in the player's home channel.
+
+    Updates are coalesced: a guild's message is edited `debounce` seconds after the
+    first change, with whatever the player looks like by then, so a burst of skips
+    costs one edit. Every `progress_interval` seconds the messages of playing guilds
+    are refreshed to move their progress bar.
+    """
+
+    def __init__(
+        self,
+        bot: commands.Bot,
+        debounce: float = 1.0,
+        progress_interval: float = 15.0,
+    ):
+        self.bot = bot
+        self.debounce = debounce
+        self.progress_interval = progress_interval
+        self.messages: Dict[int, discord.Message] = {}
+
+        self._pending: Dict[int, asyncio.Task] = {}
+        self._locks: Dict[int, asyncio.Lock] = defaultdict(asyncio.Lock)
+        self._ticker: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def render(player: wavelink.Player) -> discord.Embed:
+        track = player.current
+        if track is None:
+            return EmbedUtils.create_embed(
+                title="Now Playing", description="⏹️ | Nothing is playing right now"
+            )
+
+        if track.length and not track.is_stream:
+            bar = progress_bar(player.position, track.length)
+            duration = f"{format_duration(player.position)} {bar} {format_duration(track.length)}"
+        else:
+            duration = "🔴|LIVE"
+
+        description = f"🔊 | [**{track.title}** by `{track.author}`]({track.uri})"
+        if player.paused:
+            description = description.replace("🔊", "⏸️", 1)
+        description += f"\n\n{duration}"
+        if track.recommended:
+            description += f"\n\n`This track was recommended via {track.source}`"
+
+        embed = EmbedUtils.create_embed(title="Now Playing", description=description)
+        if track.artwork:
+            embed.set_image(url=track.artwork)
+        if track.album.name:
+            embed.add_field(name="Album", value=track.album.name)
+        if player.queue.mode != wavelink.QueueMode.normal:
+            embed.add_field(name="Loop", value=player.queue.mode.name)
+        embed.add_field(name="Up Next", value=f"{len(player.queue)} track(s)")
+        return embed
+
+    def update(self, player: wavelink.Player):
+        """
+        Schedule an edit of the guild's message, merged with any edit already pending.
+        """
+        guild_id = player.guild.id
+        if guild_id not in self._pending:
+            self._pending[guild_id] = asyncio.create_task(self._publish_later(guild_id))
+
+    async def resend(self, player: wavelink.Player) -> Optional[discord.Message]:
+        """
+        Replace the guild's message with a new one at the bottom of the home channel.
+        """
+        guild_id = player.guild.id
+        self._cancel_pending(guild_id)
+        await self._delete(self.messages.pop(guild_id, None))
+        return await self.publish(player)
+
+    async def clear(self, guild_id: int):
+        """
+        Stop tracking a guild and delete its message.
+        """
+        self._cancel_pending(guild_id)
+        await self._delete(self.messages.pop(guild_id, None))
+        self._locks.pop(guild_id, None)
+
+    async def publish(self, player: wavelink.Player) -> Optional[discord.Message]:
+        """
+        Edit the guild's message right away, sending one if there is none yet.
+        """
+        home = getattr(player, "home", None)
+        if home is None:
+            return None
+
+        guild_id = player.guild.id
+        async with self._locks[guild_id]:
+            embed = self.render(player)
+            message = self.messages.get(guild_id)
+            if message is not None and message.channel.id == home.id:
+                try:
+                    await message.edit(embed=embed)
+                    return message
+                except discord.NotFound:
+                    pass
+                except discord.HTTPException as e:
+                    logger.warning(
+                        f"Failed to edit now playing message in {guild_id}: {e}"
+                    )
+                    return message
+            else:
+                await self._delete(message)
+
+            try:
+                message = await home.send(embed=embed)
+            except discord.HTTPException as e:
+                logger.warning(f"Failed to send now playing message in {guild_id}: {e}")
+                self.messages.pop(guild_id, None)
+                return None
+            self.messages[guild_id] = message
+            return message
+
+    def start(self):
+        if self._ticker is None or self._ticker.done():
+            self._ticker = asyncio.create_task(self._tick_loop())
+
+    async def stop(self):
+        tasks = [task for task in (self._ticker, *self._pending.values()) if task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._ticker = None
+        self._pending.clear()
+
+    def _cancel_pending(self, guild_id: int):
+        task = self._pending.pop(guild_id, None)
+        if task is not None:
+            task.cancel()
+
+    async def _delete(self, message: Optional[discord.Message]):
+        if message is None:
+            return
+        try:
+            await message.delete()
+        except discord.HTTPException:
+            pass
+
+    async def _publish_later(self, guild_id: int):
+        try:
+            await asyncio.sleep(self.debounce)
+        finally:
+            if self._pending.get(guild_id) is asyncio.current_task():
+                del self._pending[guild_id]
+
+        guild = self.bot.get_guild(guild_id)
+        player = guild.voice_client if guild else None
+        if isinstance(player, wavelink.Player):
+            await self.publish(player)
+
+    async def _tick_loop(self):
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            for guild_id in list(self.messages):
+                guild = self.bot.get_guild(guild_id)
+                player = guild.voice_client if guild else None
+                if not isinstance(player, wavelink.Player):
+                    # The player went away, leave its last message as it is
+                    self.messages.pop(guild_id, None)
+                    self._locks.pop(guild_id, None)
+                elif player.playing and not player.paused:
+                    self.update(player)
@@ -0,0 +1,109 @@
+"""
+Bulk permission overwrite rollout used by the moderation setup commands
+"""
+
+import asyncio
+import time
+
+from typing import List, Optional, Tuple, Union
+
+import discord
+
+from src.utils.embeds import EmbedUtils
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+
+OverwriteTarget = Union[discord.Role, discord.Member]
+
+
+class OverwriteRollout:
+    """
+    Applies a planned set of permission overwrites across many channels.
+
+    Only overwrites that differ from what the channel already has are planned, so running
+    the same rollout again after an interruption resumes where it stopped. Each channel is
+    its own rate-limit bucket for overwrite edits, so channels are worked on concurrently
+    (bounded by `concurrency`) and discord.py waits out any bucket that runs dry.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 5,
+        status_message: Optional[discord.Message] = None,
+        progress_interval: float = 2.0,
+        reason: Optional[str] = None,
+    ):
+        self.concurrency = concurrency
+        self.reason = reason
+        self.status_message = status_message
+        self.progress_interval = progress_interval
+
+        self.plan: List[
+            Tuple[
+                discord.abc.GuildChannel, OverwriteTarget, discord.PermissionOverwrite
+            ]
+        ] = []
+        self.skipped = 0
+        self.applied = 0
+        self.failed = 0
+        self._last_progress = 0.0
+
+    def __len__(self) -> int:
+        return len(self.plan)
+
+    def add(
+        self,
+        channel: discord.abc.GuildChannel,
+        target: OverwriteTarget,
+        overwrite: discord.PermissionOverwrite,
+    ):
+        """
+        Plan an overwrite, skipping it if the channel already has it.
+        """
+        if channel.overwrites_for(target) == overwrite:
+            self.skipped += 1
+            return
+        self.plan.append((channel, target, overwrite))
+
+    async def run(self):
+        """
+        Apply every planned overwrite and report progress on the status message.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def apply(channel, target, overwrite):
+            async with semaphore:
+                try:
+                    await channel.set_permissions(
+                        target, overwrite=overwrite, reason=self.reason
+                    )
+                    self.applied += 1
+                except discord.HTTPException as e:
+                    self.failed += 1
+                    logger.warning(f"Failed to set overwrite on {channel}: {e}")
+            await self.report_progress()
+
+        await asyncio.gather(*(apply(*planned) for planned in self.plan))
+        await self.report_progress(force=True)
+
+    async def report_progress(self, force: bool = False):
+        """
+        Edit the status message, at most once every `progress_interval` seconds.
+        """
+        now = time.monotonic()
+        if self.status_message is None or (
+            not force and now - self._last_progress < self.progress_interval
+        ):
+            return
+        self._last_progress = now
+
+        done = self.applied + self.failed
+        embed = EmbedUtils.create_embed(
+            title="Setting up permissions...",
+            description=f"🔧 | Updated {done}/{len(self.plan)} channel(s)",
+        )
+        try:
+            await self.status_message.edit(embed=embed)
+        except discord.HTTPException:
+            pass
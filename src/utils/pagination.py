@@ -0,0 +1,132 @@
+"""
+Paginated embed views that render their pages on demand
+"""
+
+import math
+
+from typing import Optional
+
+import discord
+
+from discord.ext import commands
+
+from src.utils.embeds import EmbedUtils
+
+
+class JumpToPageModal(discord.ui.Modal, title="Jump to page"):
+    page = discord.ui.TextInput(label="Page", placeholder="1", max_length=6)
+
+    def __init__(self, view: "PaginatedView"):
+        super().__init__()
+        self.view = view
+
+    async def on_submit(self, interaction: discord.Interaction):
+        try:
+            page = int(self.page.value) - 1
+        except ValueError:
+            warning_embed = EmbedUtils.warning_embed(
+                description="⚠️ | That's not a page number!"
+            )
+            await interaction.response.send_message(embed=warning_embed, ephemeral=True)
+            return
+        await self.view.show_page(interaction, page)
+
+
+class PaginatedView(discord.ui.View):
+    """
+    Base view for paging through a list of items, `per_page` at a time.
+
+    Subclasses implement `item_count` and `render`. Only the page being shown is
+    rendered, and the page number is clamped on every render so the view stays valid
+    while the underlying list grows or shrinks. The view does not need the command
+    that sent it to wait on it: it disables its buttons by itself when it times out.
+    """
+
+    def __init__(self, per_page: int = 10, timeout: Optional[float] = 300):
+        super().__init__(timeout=timeout)
+        self.per_page = per_page
+        self.current_page = 0
+        self.message: Optional[discord.Message] = None
+
+    def item_count(self) -> int:
+        raise NotImplementedError
+
+    def render(self, page: int) -> discord.Embed:
+        """
+        Build the embed for a page. `page` is always a valid page number.
+        """
+        raise NotImplementedError
+
+    @property
+    def page_count(self) -> int:
+        return max(1, math.ceil(self.item_count() / self.per_page))
+
+    def page_bounds(self, page: int) -> slice:
+        return slice(page * self.per_page, (page + 1) * self.per_page)
+
+    def render_current(self) -> discord.Embed:
+        self.current_page = min(max(self.current_page, 0), self.page_count - 1)
+        self.update_buttons()
+        return self.render(self.current_page)
+
+    def update_buttons(self):
+        # Later pages can appear while the view is open, so only the way back is disabled
+        self.first_page.disabled = self.previous_page.disabled = self.current_page <= 0
+
+    async def send(self, ctx: commands.Context) -> discord.Message:
+        self.message = await ctx.send(embed=self.render_current(), view=self)
+        return self.message
+
+    async def respond(
+        self, interaction: discord.Interaction, ephemeral: bool = True
+    ) -> discord.Message:
+        await interaction.response.send_message(
+            embed=self.render_current(), view=self, ephemeral=ephemeral
+        )
+        self.message = await interaction.original_response()
+        return self.message
+
+    async def show_page(self, interaction: discord.Interaction, page: int):
+        self.current_page = page
+        embed = self.render_current()
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    async def on_timeout(self):
+        if self.message is None:
+            return
+        for item in self.children:
+            item.disabled = True
+        try:
+            await self.message.edit(view=self)
+        except discord.HTTPException:
+            pass
+
+    @discord.ui.button(label="⏮️", style=discord.ButtonStyle.grey)
+    async def first_page(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ):
+        await self.show_page(interaction, 0)
+
+    @discord.ui.button(label="◀️", style=discord.ButtonStyle.grey)
+    async def previous_page(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ):
+        await self.show_page(interaction, self.current_page - 1)
+
+    @discord.ui.button(label="▶️", style=discord.ButtonStyle.grey)
+    async def next_page(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ):
+        await self.show_page(interaction, self.current_page + 1)
+
+    @discord.ui.button(label="⏭️", style=discord.ButtonStyle.grey)
+    async def last_page(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ):
+        await self.show_page(interaction, self.page_count - 1)
+
+    @discord.ui.button(label="🔢", style=discord.ButtonStyle.grey)
+    async def jump_to_page(
+        self, interaction: discord.Interaction, button: discord.ui.Button
+    ):
+        await interaction.response.send_modal(JumpToPageModal(self))
@@ -0,0 +1,331 @@
+"""
+Snapshots of a music player's state that can be restored onto a new player
+"""
+
+import asyncio
+import json
+
+from dotenv import load_dotenv
+from os import getenv
+from typing import Dict, List, Optional, Set
+
+import discord
+import wavelink
+
+from src.utils.database import DatabaseUtils
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+load_dotenv()
+
+# Player snapshot configuration
+PLAYER_STATE_CONFIG = {
+    "interval": float(getenv("PLAYER_SNAPSHOT_INTERVAL", 15)),
+    "max_age": float(getenv("PLAYER_SNAPSHOT_MAX_AGE", 3600)),
+}
+
+
+class PlayerSnapshot:
+    """
+    Everything needed to rebuild a guild's player: the current track and position,
+    the queue, loop mode, volume and the channels it was bound to.
+    Tracks are kept as their raw Lavalink payloads.
+    """
+
+    def __init__(
+        self,
+        guild_id: int,
+        channel_id: int,
+        home_id: Optional[int],
+        current: Optional[dict],
+        position: int,
+        queue: List[dict],
+        mode: str,
+        volume: int,
+        paused: bool,
+    ):
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.home_id = home_id
+        self.current = current
+        self.position = position
+        self.queue = queue
+        self.mode = mode
+        self.volume = volume
+        self.paused = paused
+
+    def __repr__(self) -> str:
+        return f"PlayerSnapshot(guild_id={self.guild_id}, queue={len(self.queue)})"
+
+    @classmethod
+    def capture(cls, player: wavelink.Player) -> "PlayerSnapshot":
+        home = getattr(player, "home", None)
+        return cls(
+            guild_id=player.guild.id,
+            channel_id=player.channel.id,
+            home_id=home.id if home else None,
+            current=player.current.raw_data if player.current else None,
+            position=int(player.position),
+            queue=[track.raw_data for track in player.queue],
+            mode=player.queue.mode.name,
+            volume=player.volume,
+            paused=player.paused,
+        )
+
+    def to_dict(self) -> dict:
+        """
+        Everything but the position, which is stored separately as it changes constantly.
+        """
+        return {
+            "guild_id": self.guild_id,
+            "channel_id": self.channel_id,
+            "home_id": self.home_id,
+            "current": self.current,
+            "queue": self.queue,
+            "mode": self.mode,
+            "volume": self.volume,
+            "paused": self.paused,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, position: int = 0) -> "PlayerSnapshot":
+        return cls(position=position, **data)
+
+    async def restore(self, player: wavelink.Player):
+        """
+        Restore this snapshot onto a freshly connected player.
+        """
+        home = player.guild.get_channel(self.home_id) if self.home_id else None
+        if home is not None:
+            player.home = home
+
+        player.queue.mode = wavelink.QueueMode[self.mode]
+        if self.queue:
+            player.queue.put([wavelink.Playable(data=track) for track in self.queue])
+
+        if self.current:
+            await player.play(
+                wavelink.Playable(data=self.current),
+                start=self.position,
+                volume=self.volume,
+                paused=self.paused,
+            )
+        else:
+            await player.set_volume(self.volume)
+
+    async def reconnect(self, client: discord.Client, cls=wavelink.Player):
+        """
+        Connect a new player to the snapshot's voice channel and restore onto it.
+        Returns the new player, or None if the guild or channel no longer exists.
+        """
+        guild = client.get_guild(self.guild_id)
+        channel = guild.get_channel(self.channel_id) if guild else None
+        if channel is None:
+            return None
+
+        player = await channel.connect(cls=cls)
+        await self.restore(player)
+        return player
+
+
+class PlayerStore:
+    """
+    Saves a snapshot of every music player each `interval` seconds so queues survive
+    restarts and node failures.
+
+    Saves are incremental. Whatever changes a player's queue, track, loop mode, volume
+    or pause state calls `mark_dirty`, and only dirty players (and ones never saved) are
+    captured and written in full; the others only have their position updated, with one
+    statement covering every guild. The snapshots of players that went away while the
+    bot kept running are deleted, and snapshots older than `max_age` seconds are not
+    restored.
+    """
+
+    def __init__(
+        self,
+        client: discord.Client,
+        interval: float = PLAYER_STATE_CONFIG["interval"],
+        max_age: float = PLAYER_STATE_CONFIG["max_age"],
+    ):
+        self.client = client
+        self.interval = interval
+        self.max_age = max_age
+        self.restored = False
+
+        # Guilds with a snapshot in the database, and the positions saved with them
+        self.saved: Set[int] = set()
+        self.positions: Dict[int, int] = {}
+        # Guilds whose players changed since their last save
+        self.dirty: Set[int] = set()
+
+        self._lock = asyncio.Lock()
+        self._saver: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._saver is None or self._saver.done():
+            self._saver = asyncio.create_task(self._save_loop())
+
+    async def stop(self):
+        if self._saver is not None:
+            self._saver.cancel()
+            try:
+                await self._saver
+            except asyncio.CancelledError:
+                pass
+            self._saver = None
+
+        # Keep every snapshot, the players are only going away because we are
+        try:
+            await self.save(forget_missing=False)
+        except Exception as e:
+            logger.error(f"Failed to save player snapshots on shutdown: {e}")
+
+    def mark_dirty(self, guild_id: int):
+        """
+        Have the next save write a guild's full player state.
+        """
+        self.dirty.add(guild_id)
+
+    def players(self) -> List[wavelink.Player]:
+        return [
+            player
+            for player in self.client.voice_clients
+            if isinstance(player, wavelink.Player) and player.channel is not None
+        ]
+
+    async def save(self, forget_missing: bool = True):
+        """
+        Write the snapshots of every player that changed since the last save.
+        """
+        async with self._lock:
+            dirty, self.dirty = self.dirty, set()
+            changed = []
+            moved = []
+            present = set()
+            for player in self.players():
+                guild_id = player.guild.id
+                present.add(guild_id)
+
+                if guild_id in dirty or guild_id not in self.saved:
+                    snapshot = PlayerSnapshot.capture(player)
+                    state = json.dumps(snapshot.to_dict(), separators=(",", ":"))
+                    changed.append((guild_id, state, snapshot.position))
+                    continue
+                position = int(player.position)
+                if self.positions.get(guild_id) != position:
+                    moved.append((guild_id, position))
+
+            gone = []
+            if forget_missing:
+                gone = [guild_id for guild_id in self.saved if guild_id not in present]
+
+            if not (changed or moved or gone):
+                return
+
+            try:
+                async with DatabaseUtils.transaction() as conn:
+                    for guild_id, state, position in changed:
+                        await conn.execute(
+                            """
+                            INSERT INTO player_snapshots (guild_id, state, position)
+                            VALUES (%s, %s, %s)
+                            ON CONFLICT (guild_id) DO UPDATE
+                            SET state = EXCLUDED.state, position = EXCLUDED.position,
+                                updated_at = now()
+                            """,
+                            (guild_id, state, position),
+                        )
+                    if moved:
+                        await conn.execute(
+                            """
+                            UPDATE player_snapshots
+                            SET position = moved.position, updated_at = now()
+                            FROM unnest(%s::bigint[], %s::integer[])
+                                AS moved(guild_id, position)
+                            WHERE player_snapshots.guild_id = moved.guild_id
+                            """,
+                            (
+                                [guild_id for guild_id, _ in moved],
+                                [position for _, position in moved],
+                            ),
+                        )
+                    if gone:
+                        await conn.execute(
+                            "DELETE FROM player_snapshots WHERE guild_id = ANY(%s)",
+                            (gone,),
+                        )
+            except Exception:
+                # Written in full again next time
+                self.dirty |= dirty & present
+                raise
+
+            for guild_id, _, position in changed:
+                self.saved.add(guild_id)
+                self.positions[guild_id] = position
+            for guild_id, position in moved:
+                self.positions[guild_id] = position
+            for guild_id in gone:
+                self.saved.discard(guild_id)
+                self.positions.pop(guild_id, None)
+
+    async def forget(self, guild_id: int):
+        """
+        Delete a guild's snapshot, e.g. once its player was deliberately disconnected.
+        """
+        async with self._lock:
+            self.saved.discard(guild_id)
+            self.positions.pop(guild_id, None)
+            self.dirty.discard(guild_id)
+            await DatabaseUtils.execute(
+                "DELETE FROM player_snapshots WHERE guild_id = %s", (guild_id,)
+            )
+
+    async def load(self) -> List[PlayerSnapshot]:
+        """
+        Load every snapshot that is recent enough to restore, dropping older ones.
+        """
+        await DatabaseUtils.execute(
+            "DELETE FROM player_snapshots WHERE updated_at < now() - make_interval(secs => %s)",
+            (self.max_age,),
+        )
+        rows = await DatabaseUtils.execute(
+            "SELECT state, position FROM player_snapshots", fetch="all"
+        )
+        return [PlayerSnapshot.from_dict(state, position) for state, position in rows]
+
+    async def restore(self, cls=wavelink.Player) -> List[wavelink.Player]:
+        """
+        Reconnect and restore every saved player whose guild has none yet.
+        Only runs once, the first time it succeeds in loading the snapshots.
+        """
+        if self.restored:
+            return []
+        snapshots = await self.load()
+        self.restored = True
+
+        players = []
+        for snapshot in snapshots:
+            guild = self.client.get_guild(snapshot.guild_id)
+            if guild is not None and guild.voice_client is not None:
+                continue
+            try:
+                player = await snapshot.reconnect(self.client, cls=cls)
+            except Exception as e:
+                logger.warning(f"Failed to restore player {snapshot.guild_id}: {e}")
+                continue
+            if player is None:
+                await self.forget(snapshot.guild_id)
+                continue
+            players.append(player)
+
+        if players:
+            logger.info(f"Restored {len(players)} music player(s)")
+        return players
+
+    async def _save_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.save()
+            except Exception as e:
+                logger.error(f"Failed to save player snapshots: {e}")
@@ -0,0 +1,238 @@
+"""
+Durable scheduler for delayed jobs like temporary bans and jail releases
+"""
+
+import asyncio
+import heapq
+import time
+
+from dotenv import load_dotenv
+from os import getenv
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from psycopg2.extras import Json
+
+from src.utils.database import DatabaseUtils
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+load_dotenv()
+
+# Failed job retry configuration
+SCHEDULER_CONFIG = {
+    "retry_delay": float(getenv("SCHEDULER_RETRY_DELAY", 30)),
+    "max_retry_delay": float(getenv("SCHEDULER_MAX_RETRY_DELAY", 3600)),
+    "max_attempts": int(getenv("SCHEDULER_MAX_ATTEMPTS", 10)),
+}
+
+JobHandler = Callable[[dict], Awaitable[None]]
+
+
+class Scheduler:
+    """
+    Runs jobs at a given time, surviving restarts.
+
+    Every job is a row in `scheduled_jobs`. Pending jobs are kept in a heap of
+    (due, id, kind, payload) tuples and a single task sleeps until the earliest one
+    is due. Jobs that came due while the bot was offline run as soon as it starts.
+
+    A job is only deleted once its handler returns. When the handler raises, the job is
+    retried after `retry_delay` seconds, doubling up to `max_retry_delay`, and dropped
+    after `max_attempts` failures. Handlers return normally when there is nothing left
+    to do, like a member who already left.
+    """
+
+    def __init__(
+        self,
+        retry_delay: float = SCHEDULER_CONFIG["retry_delay"],
+        max_retry_delay: float = SCHEDULER_CONFIG["max_retry_delay"],
+        max_attempts: int = SCHEDULER_CONFIG["max_attempts"],
+    ):
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.max_attempts = max(1, max_attempts)
+        self.handlers: Dict[str, JobHandler] = {}
+        self.loaded = False
+
+        self._heap: List[Tuple[float, int, str, dict]] = []
+        self._wakeup = asyncio.Event()
+        self._runner: Optional[asyncio.Task] = None
+        self._running = set()
+        # Failed attempts so far of the jobs that have failed
+        self._attempts: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def register(self, kind: str, handler: JobHandler):
+        """
+        Register the coroutine that runs jobs of a kind. It is called with the job's payload.
+        """
+        self.handlers[kind] = handler
+
+    async def schedule(self, kind: str, delay: float, payload: dict) -> int:
+        """
+        Schedule a job to run in `delay` seconds.
+        Returns the id of the job.
+        """
+        due = time.time() + delay
+        result = await DatabaseUtils.execute(
+            """
+            INSERT INTO scheduled_jobs (kind, due_at, payload)
+            VALUES (%s, to_timestamp(%s), %s) RETURNING id
+            """,
+            (kind, due, Json(payload)),
+            fetch="one",
+        )
+        self._push((due, result[0], kind, payload))
+        return result[0]
+
+    async def cancel(self, job_id: int):
+        """
+        Cancel a pending job.
+        """
+        await DatabaseUtils.execute(
+            "DELETE FROM scheduled_jobs WHERE id = %s", (job_id,)
+        )
+        self._heap = [job for job in self._heap if job[1] != job_id]
+        heapq.heapify(self._heap)
+        self._attempts.pop(job_id, None)
+
+    async def cancel_all(self, kind: str, **match) -> int:
+        """
+        Cancel every pending job of a kind whose payload has the given values, like
+        `cancel_all("unban", guild_id=guild.id, user_id=user.id)`.
+        Returns the number of jobs cancelled.
+        """
+        rows = await DatabaseUtils.execute(
+            """
+            DELETE FROM scheduled_jobs WHERE kind = %s AND payload @> %s RETURNING id
+            """,
+            (kind, Json(match)),
+            fetch="all",
+        )
+        cancelled = {row[0] for row in rows}
+        self._heap = [job for job in self._heap if job[1] not in cancelled]
+        heapq.heapify(self._heap)
+        for job_id in cancelled:
+            self._attempts.pop(job_id, None)
+        return len(cancelled)
+
+    async def load(self):
+        """
+        Load every pending job from the database.
+        """
+        rows = await DatabaseUtils.execute(
+            """
+            SELECT EXTRACT(EPOCH FROM due_at), id, kind, payload, attempts
+            FROM scheduled_jobs
+            """,
+            fetch="all",
+        )
+        known = {job[1] for job in self._heap}
+        for due, job_id, kind, payload, attempts in rows:
+            if job_id not in known:
+                self._heap.append((float(due), job_id, kind, payload))
+                if attempts:
+                    self._attempts[job_id] = attempts
+        heapq.heapify(self._heap)
+        self._wakeup.set()
+        self.loaded = True
+        logger.info(f"Loaded {len(rows)} scheduled job(s)")
+
+    def start(self):
+        """
+        Start the timer task.
+        """
+        if self._runner is None or self._runner.done():
+            self._runner = asyncio.create_task(self._run_loop())
+
+    async def stop(self):
+        """
+        Stop the timer task. Jobs stay in the database and resume on the next start.
+        """
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except asyncio.CancelledError:
+                pass
+            self._runner = None
+
+    def _push(self, job: Tuple[float, int, str, dict]):
+        heapq.heappush(self._heap, job)
+        if self._heap[0] is job:
+            self._wakeup.set()
+
+    async def _run_loop(self):
+        while True:
+            self._wakeup.clear()
+            delay = self._heap[0][0] - time.time() if self._heap else None
+            if delay is None or delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            job = heapq.heappop(self._heap)
+            task = asyncio.create_task(self._run_job(*job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _run_job(self, due: float, job_id: int, kind: str, payload: dict):
+        handler = self.handlers.get(kind)
+        if handler is None:
+            logger.warning(f"No handler registered for scheduled job {job_id} ({kind})")
+            return
+
+        try:
+            await handler(payload)
+        except Exception as e:
+            await self._retry(job_id, kind, payload, e)
+            return
+
+        self._attempts.pop(job_id, None)
+        try:
+            await DatabaseUtils.execute(
+                "DELETE FROM scheduled_jobs WHERE id = %s", (job_id,)
+            )
+        except Exception as e:
+            logger.error(f"Failed to remove scheduled job {job_id}: {e}")
+
+    async def _retry(self, job_id: int, kind: str, payload: dict, error: Exception):
+        attempts = self._attempts.pop(job_id, 0) + 1
+        if attempts >= self.max_attempts:
+            logger.error(
+                f"Scheduled job {job_id} ({kind}) failed {attempts} times, dropping it: {error}"
+            )
+            try:
+                await DatabaseUtils.execute(
+                    "DELETE FROM scheduled_jobs WHERE id = %s", (job_id,)
+                )
+            except Exception as e:
+                logger.error(f"Failed to remove scheduled job {job_id}: {e}")
+            return
+
+        delay = min(self.retry_delay * 2 ** (attempts - 1), self.max_retry_delay)
+        logger.warning(
+            f"Scheduled job {job_id} ({kind}) failed, retrying in {delay:.0f}s: {error}"
+        )
+        due = time.time() + delay
+        try:
+            kept = await DatabaseUtils.execute(
+                """
+                UPDATE scheduled_jobs SET due_at = to_timestamp(%s), attempts = %s
+                WHERE id = %s RETURNING id
+                """,
+                (due, attempts, job_id),
+                fetch="one",
+            )
+            if kept is None:
+                # Cancelled while it was running
+                return
+        except Exception as e:
+            # Still retried from memory, and from its old due time after a restart
+            logger.error(f"Failed to reschedule job {job_id}: {e}")
+        self._attempts[job_id] = attempts
+        self._push((due, job_id, kind, payload))
@@ -0,0 +1,139 @@
+"""
+Bot-side cache for Lavalink track searches
+"""
+
+import asyncio
+import json
+
+from dotenv import load_dotenv
+from os import getenv
+from typing import Dict
+
+import wavelink
+import yarl
+
+from src.utils.cache import LRUCache, MISSING
+from src.utils.logger import setup_logger
+
+logger = setup_logger()
+load_dotenv()
+
+# Search cache configuration
+SEARCH_CACHE_CONFIG = {
+    "maxbytes": int(float(getenv("MUSIC_SEARCH_CACHE_MB", 32)) * 1024 * 1024),
+    "ttl": float(getenv("MUSIC_SEARCH_CACHE_TTL", 6 * 3600)),
+    "negative_ttl": float(getenv("MUSIC_SEARCH_CACHE_NEGATIVE_TTL", 300)),
+}
+
+# Query parameters that only track where a link was shared from
+TRACKING_PARAMS = {"si", "feature", "pp", "ab_channel", "fbclid", "igshid"}
+
+
+class SearchCache:
+    """
+    Caches the tracks Lavalink resolves for a query so repeat plays skip the round trip.
+
+    Results are stored as the raw Lavalink payload encoded to JSON, which keeps their
+    size exact for the byte limit and hands every caller fresh Playable objects.
+    Queries with no results are cached for a shorter `negative_ttl`, and identical
+    searches that are already in flight share a single Lavalink request.
+    """
+
+    def __init__(
+        self,
+        maxbytes: int = SEARCH_CACHE_CONFIG["maxbytes"],
+        ttl: float = SEARCH_CACHE_CONFIG["ttl"],
+        negative_ttl: float = SEARCH_CACHE_CONFIG["negative_ttl"],
+    ):
+        self.cache = LRUCache(maxsize=100_000, ttl=ttl, maxbytes=maxbytes)
+        self.negative_ttl = negative_ttl
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    @property
+    def stats(self) -> dict:
+        return self.cache.stats
+
+    @staticmethod
+    def normalize(query: str) -> str:
+        """
+        Normalize a query so equivalent searches and links share a cache key.
+        """
+        query = " ".join(query.split())
+        url = yarl.URL(query)
+        if not url.host:
+            return f"search:{query.casefold()}"
+
+        params = [
+            (key, value)
+            for key, value in url.query.items()
+            if key not in TRACKING_PARAMS and not key.startswith("utm_")
+        ]
+        url = url.with_host(url.host.lower()).with_fragment(None).with_query(params)
+        return f"url:{url}"
+
+    async def search(self, query: str) -> wavelink.Search:
+        """
+        Search for tracks like `wavelink.Playable.search`, answering from the cache when possible.
+        """
+        key = self.normalize(query)
+        cached = self.cache.get(key, MISSING)
+        if cached is not MISSING:
+            return self.decode(cached)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return self.decode(await asyncio.shield(inflight))
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            tracks = await wavelink.Playable.search(query)
+            encoded = self.encode(tracks)
+            future.set_result(encoded)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else was waiting on it
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+        if not tracks:
+            self.cache.put(key, encoded, size=len(encoded), ttl=self.negative_ttl)
+        elif not self.has_stream(tracks):
+            self.cache.put(key, encoded, size=len(encoded))
+        return tracks
+
+    @staticmethod
+    def has_stream(tracks: wavelink.Search) -> bool:
+        return any(track.is_stream for track in tracks)
+
+    @staticmethod
+    def encode(tracks: wavelink.Search) -> bytes:
+        if isinstance(tracks, wavelink.Playlist):
+            plugin = {
+                "type": tracks.type,
+                "url": tracks.url,
+                "artworkUrl": tracks.artwork,
+                "author": tracks.author,
+            }
+            data = {
+                "playlist": {
+                    "info": {"name": tracks.name, "selectedTrack": tracks.selected},
+                    "pluginInfo": {k: v for k, v in plugin.items() if v is not None},
+                    "tracks": [track.raw_data for track in tracks.tracks],
+                }
+            }
+        else:
+            data = {"tracks": [track.raw_data for track in tracks]}
+        return json.dumps(data, separators=(",", ":")).encode()
+
+    @staticmethod
+    def decode(encoded: bytes) -> wavelink.Search:
+        data = json.loads(encoded)
+        if "playlist" in data:
+            return wavelink.Playlist(data=data["playlist"])
+        return [wavelink.Playable(data=track) for track in data["tracks"]]
@@ -0,0 +1,55 @@
+import uuid
+
+from os import getenv
+
+import psycopg2
+import pytest
+
+from src.utils import database as database_module
+from src.utils.database import ConnectionPool, DatabaseUtils
+
+
+@pytest.fixture
+async def database(monkeypatch):
+    """
+    DatabaseUtils pointed at a fresh schema on the PostgreSQL server in
+    TEST_DATABASE_URL, with every table set up. The schema is dropped afterwards.
+    Tests using it are skipped when TEST_DATABASE_URL isn't set.
+    """
+    url = getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    schema = f"test_{uuid.uuid4().hex[:12]}"
+    admin = psycopg2.connect(url)
+    admin.autocommit = True
+    with admin.cursor() as cursor:
+        cursor.execute(f"CREATE SCHEMA {schema}")
+
+    # Tagged with the schema name so teardown can find connections that outlive the test
+    config = {
+        "dsn": url,
+        "options": f"-c search_path={schema}",
+        "application_name": schema,
+    }
+    monkeypatch.setattr(database_module, "DB_CONFIG", config)
+    DatabaseUtils.setup_tables()
+
+    pool = ConnectionPool(config, min_size=1, max_size=20, acquire_timeout=30)
+    monkeypatch.setattr(DatabaseUtils, "pool", pool)
+    try:
+        yield DatabaseUtils
+    finally:
+        await pool.close()
+        with admin.cursor() as cursor:
+            # A failed test can leave queries running on the pool's threads, holding
+            # locks the DROP would wait on forever
+            cursor.execute(
+                """
+                SELECT pg_terminate_backend(pid) FROM pg_stat_activity
+                WHERE application_name = %s AND pid <> pg_backend_pid()
+                """,
+                (schema,),
+            )
+            cursor.execute(f"DROP SCHEMA {schema} CASCADE")
+        admin.close()
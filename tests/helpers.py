@@ -0,0 +1,17 @@
+"""
+Shared helpers for the tests.
+"""
+
+import asyncio
+
+
+async def run_all(coroutines):
+    """
+    Run coroutines concurrently and raise the first error only once all of them have
+    finished, so none is still using the database when the test tears down.
+    """
+    results = await asyncio.gather(*coroutines, return_exceptions=True)
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        raise errors[0]
+    return results
@@ -0,0 +1,56 @@
+"""
+Shared cooldowns only counting real invocations.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from discord.ext import commands
+from discord.ext.commands.view import StringView
+
+from src.utils import cooldowns
+
+
+class FakeBot:
+    _before_invoke = None
+
+    async def can_run(self, ctx, *, call_once=False):
+        return True
+
+
+def command_context(command: commands.Command, user_id: int) -> commands.Context:
+    # The parts of discord.Message that preparing a command touches
+    message = SimpleNamespace(
+        author=SimpleNamespace(id=user_id), guild=None, attachments=[], _state=None
+    )
+    ctx = commands.Context(message=message, bot=FakeBot(), view=StringView(""))
+    ctx.command = command
+    return ctx
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    backend = cooldowns.MemoryCooldownBackend()
+    monkeypatch.setattr(cooldowns, "backend", backend)
+    yield backend
+    backend.windows.clear()
+
+
+async def test_checking_a_command_does_not_use_its_cooldown(backend):
+    @commands.command()
+    @cooldowns.shared_cooldown(1, 60, commands.BucketType.user)
+    async def beg(ctx):
+        pass
+
+    ctx = command_context(beg, 1)
+    for _ in range(3):
+        assert await beg.can_run(ctx)
+    assert backend.windows == {}
+
+    await beg.prepare(ctx)
+    with pytest.raises(commands.CommandOnCooldown):
+        await beg.prepare(ctx)
+    # Other users have their own window
+    await beg.prepare(command_context(beg, 2))
+    await backend.close()
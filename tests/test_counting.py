@@ -0,0 +1,99 @@
+"""
+Counting channels under concurrent messages.
+
+Run with `pytest -s` to see the throughput of the 500 channel benchmark.
+"""
+
+import asyncio
+import random
+import time
+
+from types import SimpleNamespace
+
+from src.cogs.games import Games
+
+CHANNELS = 500
+MESSAGES_PER_CHANNEL = 200
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int):
+        self.id = channel_id
+        self.sent = []
+
+    async def send(self, embed=None):
+        self.sent.append(embed)
+
+
+class FakeMessage:
+    """
+    The parts of discord.Message the counting listener touches. Reactions yield to the
+    event loop a random number of times, like a real HTTP call would.
+    """
+
+    def __init__(self, channel: FakeChannel, number: int, rng: random.Random):
+        self.author = SimpleNamespace(bot=False)
+        self.channel = channel
+        self.content = str(number)
+        self.reactions = []
+        self._yields = rng.randrange(4)
+
+    async def add_reaction(self, emoji: str):
+        for _ in range(self._yields):
+            await asyncio.sleep(0)
+        self.reactions.append(emoji)
+
+
+def counting_cog(channels):
+    cog = Games(bot=None)
+    cog.counting.counts = {channel.id: 1 for channel in channels}
+    cog.counting.loaded = True
+    return cog
+
+
+async def test_concurrent_channels_count_in_gateway_order():
+    rng = random.Random(4)
+    channels = [FakeChannel(channel_id) for channel_id in range(1, CHANNELS + 1)]
+    cog = counting_cog(channels)
+
+    # Gateway order: every channel's next number, round after round, so each channel
+    # always has many messages in flight at once
+    messages = [
+        FakeMessage(channel, number, rng)
+        for number in range(1, MESSAGES_PER_CHANNEL + 1)
+        for channel in channels
+    ]
+
+    started = time.perf_counter()
+    # discord.py dispatches every listener call as its own task, in gateway order
+    await asyncio.gather(*(cog.on_message(message) for message in messages))
+    elapsed = time.perf_counter() - started
+
+    for channel in channels:
+        assert cog.counting.get(channel.id) == MESSAGES_PER_CHANNEL + 1
+        assert channel.sent == []
+    assert all(message.reactions == ["✅"] for message in messages)
+    assert sum(cog.counting.pending.values()) == len(messages)
+
+    print(
+        f"\n{len(messages)} messages across {CHANNELS} channels in {elapsed:.2f}s "
+        f"({len(messages) / elapsed:,.0f} messages/s)"
+    )
+
+
+async def test_wrong_number_resets_only_its_channel():
+    channels = [FakeChannel(1), FakeChannel(2)]
+    cog = counting_cog(channels)
+    rng = random.Random(0)
+
+    await asyncio.gather(
+        cog.on_message(FakeMessage(channels[0], 1, rng)),
+        cog.on_message(FakeMessage(channels[1], 1, rng)),
+        cog.on_message(FakeMessage(channels[0], 1, rng)),
+        cog.on_message(FakeMessage(channels[1], 2, rng)),
+    )
+
+    assert cog.counting.get(1) == 1
+    assert len(channels[0].sent) == 1
+    assert cog.counting.get(2) == 3
+    assert channels[1].sent == []
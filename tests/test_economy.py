@@ -0,0 +1,132 @@
+"""
+Economy transactions against PostgreSQL (set TEST_DATABASE_URL to run them).
+
+Run with `pytest -s` to see the throughput of the transfer stress test.
+"""
+
+import random
+import time
+
+from src.utils.economy import EconomyService
+from src.utils.errors import InvalidFunds
+from tests.helpers import run_all
+
+USERS = 20
+OPERATIONS = 2000
+TRANSFERS = 1000
+REPLAYS = 20
+
+
+class Abort(Exception):
+    pass
+
+
+async def total_money(database) -> int:
+    data = await database.execute(
+        "SELECT SUM(wallet + bank), MIN(wallet), MIN(bank), BOOL_AND(bank <= maxbank) "
+        "FROM bank",
+        fetch="one",
+    )
+    total, min_wallet, min_bank, within_maxbank = data
+    assert min_wallet >= 0 and min_bank >= 0 and within_maxbank
+    return total
+
+
+async def test_concurrent_operations_conserve_money(database):
+    service = EconomyService()
+    rng = random.Random(6)
+    user_ids = list(range(1, USERS + 1))
+    for user_id in user_ids:
+        await service.create_account(user_id)
+    await database.execute("UPDATE bank SET wallet = 1000")
+    before = await total_money(database)
+
+    async def shuffle_money():
+        # Several users in one transaction, locked in whatever order they come
+        users = rng.sample(user_ids, rng.randint(2, 4))
+        amounts = [rng.randint(1, 300) for _ in users[1:]]
+        abort = rng.random() < 0.2
+        async with service.transaction(*users) as txn:
+            for recipient, amount in zip(users[1:], amounts):
+                await txn.update(users[0], wallet=-amount)
+                await txn.update(recipient, bank=amount)
+            if abort:
+                raise Abort()
+
+    async def operation():
+        kind = rng.random()
+        user_id = rng.choice(user_ids)
+        amount = rng.randint(1, 500)
+        try:
+            if kind < 0.3:
+                await service.withdraw(user_id, amount)
+            elif kind < 0.6:
+                await service.deposit(user_id, amount)
+            else:
+                await shuffle_money()
+        except (InvalidFunds, Abort):
+            pass
+
+    await run_all(operation() for _ in range(OPERATIONS))
+
+    assert await total_money(database) == before
+
+
+async def test_failed_transaction_rolls_back(database):
+    service = EconomyService()
+    await service.create_account(1)
+    await service.create_account(2)
+
+    try:
+        async with service.transaction(1, 2) as txn:
+            await txn.update(1, bank=-50)
+            await txn.update(2, wallet=500)
+            await txn.update(1, bank=-500)
+    except InvalidFunds:
+        pass
+
+    assert await service.get_balance(1) == (0, 100, 25000)
+    assert await service.get_balance(2) == (0, 100, 25000)
+
+
+async def test_concurrent_transfers_between_overlapping_pairs(database):
+    service = EconomyService()
+    rng = random.Random(24)
+    user_ids = list(range(1, USERS + 1))
+    for user_id in user_ids:
+        await service.create_account(user_id)
+    await database.execute("UPDATE bank SET wallet = 1000")
+    before = await total_money(database)
+
+    # The same request retried concurrently moves money once
+    retries = await run_all(
+        service.transfer(1, 2, 10, "retried") for _ in range(REPLAYS)
+    )
+    assert sum(1 for result in retries if not result.replayed) == 1
+    assert await service.get_balance(1) == (990, 100, 25000)
+    assert await service.get_balance(2) == (1010, 100, 25000)
+
+    async def transfer(number: int):
+        sender, recipient = rng.sample(user_ids, 2)
+        try:
+            return await service.transfer(
+                sender, recipient, rng.randint(1, 200), f"transfer-{number}"
+            )
+        except InvalidFunds:
+            return None
+
+    # Every pair overlaps with others and transfers run both ways between the same
+    # users. A deadlock would fail the test as QueryFailed
+    started = time.perf_counter()
+    results = await run_all(transfer(number) for number in range(TRANSFERS))
+    elapsed = time.perf_counter() - started
+
+    assert await total_money(database) == before
+    assert not any(result and result.replayed for result in results)
+    applied = await database.execute("SELECT COUNT(*) FROM transfers", fetch="one")
+    assert applied[0] == 1 + sum(1 for result in results if result)
+
+    print(
+        f"\n{TRANSFERS} transfers between {USERS} users in {elapsed:.2f}s "
+        f"({TRANSFERS / elapsed:,.0f} transfers/s)"
+    )
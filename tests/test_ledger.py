@@ -0,0 +1,123 @@
+"""
+Ledger credits folded into balances (set TEST_DATABASE_URL to run them).
+"""
+
+import random
+
+import psycopg2
+
+from src.utils import database as database_module
+from src.utils.economy import EconomyService
+from src.utils.errors import InvalidFunds
+from tests.helpers import run_all
+
+USERS = 10
+OPERATIONS = 1500
+
+
+async def net_worths(database) -> dict:
+    rows = await database.execute(
+        """
+        SELECT user_id, wallet + bank + ledger_unsettled_wallet(user_id, ledger_xmin)
+        FROM bank
+        """,
+        fetch="all",
+    )
+    return {user_id: int(net_worth) for user_id, net_worth in rows}
+
+
+async def test_credits_are_folded_exactly_once(database):
+    service = EconomyService()
+    service.ledger.max_pending = 20
+    rng = random.Random(25)
+    user_ids = list(range(1, USERS + 1))
+    credited = {user_id: 0 for user_id in user_ids}
+
+    async def operation():
+        kind = rng.random()
+        user_id = rng.choice(user_ids)
+        try:
+            if kind < 0.5:
+                amount = rng.randint(1, 100)
+                credited[user_id] += amount
+                await service.update_balance(user_id, wallet=amount, reason="beg")
+            elif kind < 0.7:
+                await service.deposit(user_id, rng.randint(1, 200))
+            elif kind < 0.8:
+                await service.withdraw(user_id, rng.randint(1, 200))
+            elif kind < 0.9:
+                await service.ledger.flush()
+            elif kind < 0.95:
+                await service.ledger.compact()
+            else:
+                await service.get_balance(user_id)
+        except InvalidFunds:
+            pass
+
+    for user_id in user_ids:
+        await service.create_account(user_id)
+    await run_all(operation() for _ in range(OPERATIONS))
+    await service.ledger.flush()
+    await service.ledger.compact()
+
+    expected = {user_id: 100 + credited[user_id] for user_id in user_ids}
+    assert await net_worths(database) == expected
+    balances = await run_all(service.get_balance(user_id) for user_id in user_ids)
+    assert [balance.wallet + balance.bank for balance in balances] == [
+        expected[user_id] for user_id in user_ids
+    ]
+
+    # Compaction folded everything into the rows themselves
+    rows = await database.execute(
+        "SELECT user_id, wallet + bank FROM bank ORDER BY user_id", fetch="all"
+    )
+    assert dict(rows) == expected
+
+
+async def test_balance_read_during_flush_counts_credits_once(database):
+    service = EconomyService()
+    await service.create_account(1)
+    for _ in range(50):
+        service.ledger.credit(1, 10, "beg")
+
+    balances = await run_all(
+        [service.ledger.flush()] + [service.get_balance(1) for _ in range(50)]
+    )
+
+    assert {balance.wallet for balance in balances[1:]} == {500}
+    assert service.ledger.pending_wallet == {}
+
+
+async def test_credit_committed_late_is_folded(database):
+    service = EconomyService()
+    await service.create_account(1)
+    await service.withdraw(1, 100)
+
+    # A credit written by a transaction that commits after later ones have folded
+    config = database_module.DB_CONFIG
+    late = psycopg2.connect(**config)
+    with late.cursor() as cursor:
+        cursor.execute("""
+            INSERT INTO ledger (user_id, wallet_delta, reason, deferred)
+            VALUES (1, 40, 'late', TRUE)
+            """)
+    try:
+        service.ledger.credit(1, 5, "beg")
+        await service.deposit(1, 10)
+        await service.ledger.compact()
+        assert await service.get_balance(1) == (95, 10, 25000)
+    finally:
+        late.commit()
+        late.close()
+
+    assert await service.get_balance(1) == (135, 10, 25000)
+    await service.deposit(1, 135)
+    await service.ledger.compact()
+    assert await service.get_balance(1) == (0, 145, 25000)
+    assert [entry.reason for entry in await service.ledger.history(1, 10)] == [
+        "deposit",
+        "deposit",
+        "beg",
+        "late",
+        "withdraw",
+    ]
@@ -0,0 +1,35 @@
+"""
+Lyrics cache keys built from video titles and channel names.
+"""
+
+import pytest
+
+from src.utils.lyrics import LyricsService
+
+
+@pytest.mark.parametrize(
+    "title, artist, key",
+    [
+        ("Bohemian Rhapsody - Remastered 2011", "Queen", "queen|bohemian rhapsody"),
+        ("Track - 2009 Remaster", "Some Artist - Topic", "some artist|track"),
+        ("Song - Radio Edit", "Artist", "artist|song"),
+        ("Song (feat. Someone)", "Artist", "artist|song"),
+        ("Song [ft. Someone] (Official Video)", "Artist", "artist|song"),
+        ("Artist feat. Someone - Song", "Artist", "artist|song"),
+        (
+            "Queen - Bohemian Rhapsody (Official Video)",
+            "Queen",
+            "queen|bohemian rhapsody",
+        ),
+        (
+            "Rick Astley - Never Gonna Give You Up",
+            "RickAstleyVEVO",
+            "rick astley|never gonna give you up",
+        ),
+        ("Artist - Song", "Some Label", "some label|artist - song"),
+        ("Song - Part 2", "Artist", "artist|song - part 2"),
+        ("Oasis - Live Forever", "Oasis", "oasis|live forever"),
+    ],
+)
+def test_normalize(title, artist, key):
+    assert LyricsService.normalize(title, artist) == key
@@ -0,0 +1,232 @@
+"""
+Lavalink node selection, draining and failover against stub nodes.
+"""
+
+import asyncio
+import itertools
+
+from types import SimpleNamespace
+
+import pytest
+import wavelink
+
+from src.utils import nodes as nodes_module
+from src.utils.nodes import NodeBalancer, parse_nodes
+from src.utils.player_state import PlayerSnapshot
+
+
+def stats(players: int = 0, cpu: float = 0.0, deficit: int = 0, nulled: int = 0):
+    return wavelink.StatsResponsePayload(
+        {
+            "players": players,
+            "playingPlayers": players,
+            "uptime": 0,
+            "memory": {"free": 0, "used": 0, "allocated": 0, "reservable": 0},
+            "cpu": {"cores": 4, "systemLoad": cpu, "lavalinkLoad": cpu},
+            "frameStats": {"sent": 3000, "nulled": nulled, "deficit": deficit},
+        }
+    )
+
+
+class StubNode:
+    """
+    The parts of wavelink.Node the balancer uses. Its stats report the players it
+    holds, with the given CPU load, or raise `error` when set.
+    """
+
+    def __init__(self, identifier: str, cpu: float = 0.0):
+        self.identifier = identifier
+        self.status = wavelink.NodeStatus.CONNECTED
+        self.players = {}
+        self.cpu = cpu
+        self.error = None
+
+    async def fetch_stats(self):
+        if self.error is not None:
+            raise self.error
+        return stats(players=len(self.players), cpu=self.cpu)
+
+
+class StubGuild:
+    def __init__(self, guild_id: int):
+        self.id = guild_id
+        self.voice_channel = "voice"
+
+    async def change_voice_state(self, channel=None):
+        self.voice_channel = channel
+
+
+class StubPlayer:
+    def __init__(self, node: StubNode, guild_id: int):
+        self.node = node
+        self.guild = StubGuild(guild_id)
+        self.channel = SimpleNamespace(id=guild_id * 10)
+        node.players[guild_id] = self
+
+    async def disconnect(self):
+        del self.node.players[self.guild.id]
+
+
+class StubSnapshot:
+    """
+    Reconnects the way a BalancedPlayer does, onto the balancer's best node.
+    """
+
+    def __init__(self, balancer: NodeBalancer, player: StubPlayer):
+        self.balancer = balancer
+        self.guild_id = player.guild.id
+
+    async def reconnect(self, client, cls):
+        await asyncio.sleep(0)
+        return StubPlayer(self.balancer.best_node(), self.guild_id)
+
+
+@pytest.fixture
+def nodes(monkeypatch):
+    """
+    Replaces wavelink's node pool. Call it with stub nodes, and optionally how many
+    players each already holds, to add them.
+    """
+    pool = {}
+    guild_ids = itertools.count(1000)
+    monkeypatch.setattr(wavelink.Pool, "_Pool__nodes", pool)
+
+    def add(*new_nodes, players=()):
+        for node, count in zip(new_nodes, players or [0] * len(new_nodes)):
+            pool[node.identifier] = node
+            for _ in range(count):
+                StubPlayer(node, next(guild_ids))
+        return new_nodes
+
+    return add
+
+
+def stubbed_balancer(monkeypatch, **kwargs) -> NodeBalancer:
+    balancer = NodeBalancer(client=None, **kwargs)
+    monkeypatch.setattr(
+        PlayerSnapshot,
+        "capture",
+        classmethod(lambda cls, player: StubSnapshot(balancer, player)),
+    )
+    return balancer
+
+
+def test_parse_nodes():
+    assert parse_nodes("eu=http://eu:2333|secret, http://us:2333|other,broken, ,") == [
+        {"identifier": "eu", "uri": "http://eu:2333", "password": "secret"},
+        {"identifier": "node-1", "uri": "http://us:2333", "password": "other"},
+    ]
+    assert parse_nodes(None) == []
+
+
+def test_penalty_grows_with_players_cpu_and_frame_loss():
+    idle = NodeBalancer.penalty(stats())
+    assert idle == 0
+    assert NodeBalancer.penalty(stats(players=10)) == 10
+    assert NodeBalancer.penalty(stats(cpu=0.8)) > NodeBalancer.penalty(stats(cpu=0.2))
+    assert NodeBalancer.penalty(stats(deficit=300)) > NodeBalancer.penalty(
+        stats(players=50)
+    )
+    assert NodeBalancer.penalty(stats(nulled=300)) > NodeBalancer.penalty(
+        stats(players=50)
+    )
+
+
+async def test_best_node_skips_loaded_drained_and_disconnected_nodes(nodes):
+    busy, loaded, idle, down = nodes(
+        StubNode("busy"),
+        StubNode("loaded", cpu=0.9),
+        StubNode("idle"),
+        StubNode("down"),
+        players=[40, 5, 10, 0],
+    )
+    down.status = wavelink.NodeStatus.DISCONNECTED
+    balancer = NodeBalancer(client=None)
+    await balancer.poll()
+    assert balancer.best_node() is idle
+
+    # Players connected since the poll count straight away
+    for guild_id in range(31):
+        StubPlayer(idle, guild_id)
+    assert balancer.best_node() is busy
+
+    await balancer.drain("busy")
+    assert balancer.best_node() is idle
+    balancer.undrain("busy")
+    assert balancer.best_node() is busy
+
+    for node in (busy, loaded, idle):
+        await balancer.drain(node.identifier)
+    assert balancer.best_node() is None
+
+
+async def test_poll_keeps_the_last_stats_of_nodes_that_fail_to_report(nodes):
+    first, second = nodes(StubNode("first"), StubNode("second"))
+    balancer = NodeBalancer(client=None)
+    await balancer.poll()
+
+    first.cpu = 0.9
+    second.cpu = 0.5
+    second.error = RuntimeError("timed out")
+    await balancer.poll()
+
+    assert balancer.penalties["first"] > 0
+    assert balancer.penalties["second"] == 0
+    assert balancer.best_node() is second
+
+
+async def test_drain_moves_players_to_other_nodes(nodes, monkeypatch):
+    old, new = nodes(StubNode("old"), StubNode("new"), players=[0, 20])
+    for guild_id in range(10):
+        StubPlayer(old, guild_id)
+    balancer = stubbed_balancer(monkeypatch)
+    await balancer.poll()
+
+    assert await balancer.drain("old", migrate=True) == 10
+    # Migrations already running aren't started twice
+    assert balancer.migrate_from("old") == 0
+    await asyncio.gather(*balancer._migrating.values())
+
+    assert old.players == {}
+    assert len(new.players) == 30
+    assert balancer._migrating == {}
+
+
+async def test_migration_needs_another_node(nodes, monkeypatch):
+    (only,) = nodes(StubNode("only"))
+    player = StubPlayer(only, 1)
+    balancer = stubbed_balancer(monkeypatch)
+
+    assert await balancer.migrate(player) is None
+    assert only.players == {1: player}
+    assert player.guild.voice_channel == "voice"
+
+
+async def test_players_fail_over_after_the_grace_period(nodes, monkeypatch):
+    lost, spare = nodes(StubNode("lost"), StubNode("spare"))
+    for guild_id in range(5):
+        StubPlayer(lost, guild_id)
+    balancer = stubbed_balancer(monkeypatch, failover_grace=60)
+    clock = [1000.0]
+    monkeypatch.setattr(
+        nodes_module, "time", SimpleNamespace(monotonic=lambda: clock[0])
+    )
+
+    lost.status = wavelink.NodeStatus.DISCONNECTED
+    await balancer.poll()
+    assert balancer._migrating == {}
+
+    # Back before the grace period ran out, nothing moves
+    clock[0] += 30
+    lost.status = wavelink.NodeStatus.CONNECTED
+    await balancer.poll()
+    lost.status = wavelink.NodeStatus.DISCONNECTED
+    clock[0] += 30
+    await balancer.poll()
+    assert balancer._migrating == {}
+
+    clock[0] += 60
+    await balancer.poll()
+    assert len(balancer._migrating) == 5
+    await asyncio.gather(*balancer._migrating.values())
+    assert sorted(spare.players) == list(range(5))
@@ -0,0 +1,71 @@
+"""
+Incremental music player snapshots (set TEST_DATABASE_URL to run them).
+"""
+
+from types import SimpleNamespace
+
+from src.utils.player_state import PlayerSnapshot, PlayerStore
+
+PLAYERS = 100
+
+
+class FakeQueue(list):
+    mode = SimpleNamespace(name="normal")
+
+
+def fake_player(guild_id: int):
+    """
+    The parts of wavelink.Player a snapshot captures.
+    """
+    return SimpleNamespace(
+        guild=SimpleNamespace(id=guild_id),
+        channel=SimpleNamespace(id=guild_id * 10),
+        current=None,
+        position=0,
+        queue=FakeQueue(),
+        volume=50,
+        paused=False,
+    )
+
+
+async def test_only_dirty_players_are_written_in_full(database, monkeypatch):
+    players = [fake_player(guild_id) for guild_id in range(1, PLAYERS + 1)]
+    store = PlayerStore(client=None)
+    monkeypatch.setattr(store, "players", lambda: players)
+
+    captured = []
+    capture = PlayerSnapshot.capture.__func__
+    monkeypatch.setattr(
+        PlayerSnapshot,
+        "capture",
+        classmethod(
+            lambda cls, player: captured.append(player) or capture(cls, player)
+        ),
+    )
+
+    await store.save()
+    assert len(captured) == PLAYERS
+
+    # Only positions moved, nothing is serialised
+    captured.clear()
+    players[3].position = 5000
+    await store.save()
+    assert captured == []
+    row = await database.execute(
+        "SELECT position FROM player_snapshots WHERE guild_id = 4", fetch="one"
+    )
+    assert row[0] == 5000
+
+    players[5].volume = 80
+    store.mark_dirty(6)
+    await store.save()
+    assert captured == [players[5]]
+    row = await database.execute(
+        "SELECT state->>'volume' FROM player_snapshots WHERE guild_id = 6", fetch="one"
+    )
+    assert row[0] == "80"
+
+    players.pop()
+    await store.save()
+    row = await database.execute("SELECT COUNT(*) FROM player_snapshots", fetch="one")
+    assert row[0] == PLAYERS - 1
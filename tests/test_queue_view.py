@@ -0,0 +1,132 @@
+"""
+Paging, jumping and searching through a 10,000 track queue.
+"""
+
+from types import SimpleNamespace
+
+import wavelink
+
+from src.cogs.music import QueueSearchModal, QueueView
+
+TRACKS = 10_000
+
+
+def track(number: int) -> wavelink.Playable:
+    return wavelink.Playable(
+        {
+            "encoded": f"encoded-{number}",
+            "info": {
+                "identifier": f"track-{number}",
+                "isSeekable": True,
+                "author": f"Artist {number % 100}",
+                "length": 180_000,
+                "isStream": False,
+                "position": 0,
+                "title": f"Song {number}",
+                "uri": f"https://example.com/{number}",
+                "sourceName": "youtube",
+            },
+            "pluginInfo": {},
+            "userData": {},
+        }
+    )
+
+
+def queued_player(tracks: int = TRACKS):
+    queue = wavelink.Queue()
+    queue.put([track(number) for number in range(tracks)])
+    return SimpleNamespace(
+        guild=SimpleNamespace(name="Guild"), current=track(-1), queue=queue
+    )
+
+
+class FakeResponse:
+    def __init__(self):
+        self.edited = []
+        self.sent = []
+
+    async def edit_message(self, embed=None, view=None):
+        self.edited.append(embed)
+
+    async def send_message(self, embed=None, ephemeral=False):
+        self.sent.append(embed)
+
+
+def fake_interaction():
+    followups = []
+
+    async def send(embed=None, ephemeral=False):
+        followups.append(embed)
+
+    return SimpleNamespace(
+        response=FakeResponse(), followup=SimpleNamespace(send=send, sent=followups)
+    )
+
+
+def titles(embed) -> list:
+    # The first two fields are the current track and the divider
+    return [field.name for field in embed.fields[2:]]
+
+
+async def test_last_page_shows_only_the_remaining_tracks():
+    player = queued_player(TRACKS + 3)
+    view = QueueView(player)
+
+    view.current_page = view.page_count - 1
+    embed = view.render_current()
+
+    assert titles(embed) == [
+        f"{number + 1}. Song {number}" for number in range(TRACKS, TRACKS + 3)
+    ]
+    assert embed.footer.text == f"Page 1001/1001 | {TRACKS + 3} track(s)"
+    assert view.previous_page.disabled is False
+
+
+async def test_pages_follow_the_queue_as_it_changes():
+    player = queued_player()
+    view = QueueView(player)
+    interaction = fake_interaction()
+
+    await view.show_page(interaction, 999)
+    assert titles(interaction.response.edited[-1])[-1] == "10000. Song 9999"
+
+    # The queue shrank under the open view, the page is clamped to the new end
+    for _ in range(5_000):
+        player.queue.delete(0)
+    await view.show_page(interaction, view.current_page + 1)
+    assert view.current_page == 499
+    assert titles(interaction.response.edited[-1]) == [
+        f"{index + 1}. Song {index + 5_000}" for index in range(4_990, 5_000)
+    ]
+
+    player.queue.clear()
+    embed = view.render_current()
+    assert view.current_page == 0
+    assert titles(embed) == []
+    assert embed.footer.text == "Page 1/1 | 0 track(s)"
+    assert view.first_page.disabled and view.previous_page.disabled
+
+
+async def test_search_jumps_to_the_page_of_the_first_match():
+    player = queued_player()
+    view = QueueView(player)
+    interaction = fake_interaction()
+
+    modal = QueueSearchModal(view)
+    modal.query._value = "song 9876"
+    await modal.on_submit(interaction)
+
+    assert view.current_page == 987
+    assert "9877. Song 9876" in titles(interaction.response.edited[-1])
+    assert interaction.followup.sent[-1].description == (
+        "`9877.` Song 9876 by `Artist 76`"
+    )
+
+    matches = view.search("artist 42")
+    assert len(matches) == QueueView.MAX_MATCHES
+    assert [index for index, _ in matches] == list(range(42, 1_000, 100))
+
+    modal.query._value = "nothing like this"
+    await modal.on_submit(interaction)
+    assert len(interaction.response.sent) == 1
+    assert view.current_page == 987
@@ -0,0 +1,81 @@
+"""
+Scheduled jobs against PostgreSQL (set TEST_DATABASE_URL to run them).
+"""
+
+import asyncio
+
+from src.utils.scheduler import Scheduler
+
+
+async def wait_for(condition, timeout: float = 5):
+    for _ in range(int(timeout / 0.01)):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("Timed out")
+
+
+async def pending_jobs(database) -> list:
+    rows = await database.execute(
+        "SELECT kind, attempts FROM scheduled_jobs ORDER BY id", fetch="all"
+    )
+    return [tuple(row) for row in rows]
+
+
+async def test_failed_job_is_kept_and_retried(database):
+    scheduler = Scheduler(retry_delay=0.05, max_attempts=5)
+    calls = []
+
+    async def flaky(payload):
+        calls.append(payload)
+        if len(calls) < 3:
+            raise RuntimeError("Discord is down")
+
+    scheduler.register("unban", flaky)
+    scheduler.start()
+    try:
+        job_id = await scheduler.schedule("unban", 0, {"user_id": 1})
+        await wait_for(lambda: scheduler._attempts.get(job_id) == 2)
+        # Kept between attempts, with its failures counted
+        assert await pending_jobs(database) == [("unban", 2)]
+
+        await wait_for(lambda: len(calls) == 3 and not scheduler._running)
+        assert await pending_jobs(database) == []
+        assert len(scheduler) == 0
+    finally:
+        await scheduler.stop()
+
+
+async def test_job_is_dropped_after_max_attempts(database):
+    scheduler = Scheduler(retry_delay=0.01, max_attempts=3)
+    calls = []
+
+    async def broken(payload):
+        calls.append(payload)
+        raise RuntimeError("Missing permissions")
+
+    scheduler.register("unjail", broken)
+    scheduler.start()
+    try:
+        await scheduler.schedule("unjail", 0, {"user_id": 1})
+        await wait_for(lambda: len(calls) == 3 and not scheduler._running)
+        assert await pending_jobs(database) == []
+        assert len(scheduler) == 0
+    finally:
+        await scheduler.stop()
+
+
+async def test_cancel_all_only_cancels_matching_jobs(database):
+    scheduler = Scheduler()
+    await scheduler.schedule("unban", 60, {"guild_id": 1, "user_id": 1})
+    await scheduler.schedule("unban", 60, {"guild_id": 1, "user_id": 1})
+    await scheduler.schedule("unban", 60, {"guild_id": 1, "user_id": 2})
+    await scheduler.schedule("unjail", 60, {"guild_id": 1, "user_id": 1})
+
+    assert await scheduler.cancel_all("unban", guild_id=1, user_id=1) == 2
+
+    assert await pending_jobs(database) == [("unban", 0), ("unjail", 0)]
+    assert sorted((job[2], job[3]["user_id"]) for job in scheduler._heap) == [
+        ("unban", 2),
+        ("unjail", 1),
+    ]